@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""Hot-path benchmarks for the balancing_robot brick.
+
+Runs the brick in-process against ``fakes.FakeWebUI``/``FakeBridge`` and
+prints one JSON document:
+
+- ``loop``: achieved rate, jitter and overruns at 5-200 Hz;
+- ``ingest``: ``record_telemetry`` calls/s, ``record_telemetry_batch``
+  samples/s and fused ``record_imu_raw_batch`` samples/s;
+- ``calls``: microseconds per ``get_state()`` and ``http_*`` setter call;
+- ``alloc``: net allocated blocks per control step;
+- ``host``: ``RobotHost`` tick cost for many simulated robots, scalar and
+  vectorized;
+- ``emulated``: real mode against ``emulator.EmulatedBridge`` at telemetry
+  rates up to 2 kHz: samples ingested per second, loop rate and the
+  ``apply_config`` round trip until the sketch acks the new version.
+
+Usage:
+    python3 benchmarks/bench_brick.py [--quick] [--output results.json]
+    python3 benchmarks/bench_brick.py --compare baseline.json [--tolerance 0.25]
+
+With ``--compare`` the exit status is 1 when a tracked metric regressed by
+more than the tolerance against the baseline file.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "unoq" / "ArduinoApps" / "balancing_bot_app" / "python"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from arduino.app_bricks.balancing_robot import BalancingRobot, RobotHost  # noqa: E402
+from arduino.app_bricks.balancing_robot.emulator import EmulatedBridge  # noqa: E402
+from arduino.app_bricks.balancing_robot.history import np  # noqa: E402
+from arduino.app_bricks.balancing_robot.protocol import encode_imu_raw_batch, encode_telemetry_batch  # noqa: E402
+from fakes import FakeBridge, FakeWebUI  # noqa: E402
+
+LOOP_RATES = (5, 20, 50, 100, 200)
+HOST_ROBOTS = (8, 32, 64)
+EMULATED_HZ = (200, 500, 2000)
+REPEATS = 5
+
+# (section, key, direction): +1 means higher is better.
+TRACKED = (
+    ("ingest", "record_telemetry_per_s", +1),
+    ("ingest", "batch_samples_per_s", +1),
+    ("calls", "get_state_us", -1),
+    ("calls", "http_set_pid_us", -1),
+    ("alloc", "blocks_per_step", -1),
+)
+
+
+def make_robot(**kwargs):
+    ui = FakeWebUI()
+    bridge = FakeBridge()
+    bot = BalancingRobot(history_seconds=30, **kwargs)
+    bot.attach_webui(ui)
+    bot.attach_bridge(bridge)
+    return bot, ui, bridge
+
+
+def bench_loop(seconds: float):
+    results = {}
+    for hz in LOOP_RATES:
+        bot, ui, _bridge = make_robot(update_hz=hz)
+        bot.start()
+        # At least 20 ticks so the low rates produce usable percentiles.
+        time.sleep(max(seconds, 20.0 / hz))
+        timing = bot.get_state()["timing"]
+        bot.stop()
+        results[str(hz)] = {
+            "achieved_hz": timing["achieved_hz"],
+            "jitter_p50_ms": timing["jitter_p50_ms"],
+            "jitter_p99_ms": timing["jitter_p99_ms"],
+            "overruns": timing["overruns"],
+            "skipped": timing["skipped"],
+            "ticks": timing["ticks"],
+            "webui_messages": sum(ui.counts.values()),
+        }
+    return results
+
+
+def _best_seconds(fn, n: int) -> float:
+    """Fastest of REPEATS timed runs of ``n`` calls (least scheduler noise)."""
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for _ in range(n):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _rate(fn, n: int) -> float:
+    return n / _best_seconds(fn, n)
+
+
+def bench_ingest(n: int):
+    bot, _ui, bridge = make_robot(simulated=False)
+    single = bridge.provided["record_telemetry"]
+    calls_per_s = _rate(lambda: single(1.5, -3.0, 0.98, 40, 100, 101, "real", "mpu6050"), n)
+
+    batch = encode_telemetry_batch([(k * 5, 1.5, -3.0, 0.98, 40, 100 + k, 101 + k) for k in range(8)])
+    batched = bridge.provided["record_telemetry_batch"]
+    batches_per_s = _rate(lambda: batched(batch), max(1, n // 4))
+
+    results = {
+        "record_telemetry_per_s": round(calls_per_s, 1),
+        "batch_samples_per_s": round(batches_per_s * 8, 1),
+        "batch_calls_per_s": round(batches_per_s, 1),
+    }
+    if np is not None:
+        imu_raw = bridge.provided["record_imu_raw_batch"]
+        clock = [0]
+
+        def push_raw():
+            # Fresh timestamps so the duplicate check does not drop the batch.
+            clock[0] += 32000
+            imu_raw(encode_imu_raw_batch([(clock[0] + k * 2000, 0, 800, 16300, 0, 120, 0, 0, 2.8) for k in range(16)]))
+
+        raw_batches_per_s = _rate(push_raw, max(1, n // 20))
+        results["imu_raw_samples_per_s"] = round(raw_batches_per_s * 16, 1)
+    bot.stop()
+    return results
+
+
+def _cost_us(fn, n: int) -> float:
+    return _best_seconds(fn, n) / n * 1e6
+
+
+def bench_calls(n: int):
+    bot, _ui, _bridge = make_robot(simulated=False)
+    bot.start()
+    results = {
+        "get_state_us": _cost_us(bot.get_state, n),
+        "http_set_pid_us": _cost_us(lambda: bot.http_set_pid(12.0, 0.1, 0.4), n),
+        "http_set_setpoint_us": _cost_us(lambda: bot.http_set_setpoint(0.5), n),
+        "http_set_axis_sign_us": _cost_us(lambda: bot.http_set_axis_sign(1), n),
+        "http_set_motor_invert_us": _cost_us(lambda: bot.http_set_motor_invert(1, -1), n),
+        "http_history_us": _cost_us(lambda: bot.http_history(seconds=10, points=200), max(1, n // 10)),
+    }
+    bot.stop()
+    return {k: round(v, 2) for k, v in results.items()}
+
+
+def bench_alloc(n: int):
+    results = {}
+    for simulated in (True, False):
+        bot, _ui, bridge = make_robot(simulated=simulated)
+        if not simulated:
+            bridge.push("record_telemetry", 1.5, -3.0, 0.98, 40, 100, 101, "real", "mpu6050")
+        dt = 1.0 / 50
+        for _ in range(1000):  # warm caches, history slots, etc.
+            bot._step(dt)
+        before = sys.getallocatedblocks()
+        for _ in range(n):
+            bot._step(dt)
+        after = sys.getallocatedblocks()
+        bot.stop()
+        results["sim" if simulated else "real"] = round((after - before) / n, 4)
+    return {"blocks_per_step": max(results.values()), "by_mode": results}
+
+
+def bench_host(n: int):
+    results = {}
+    for robots in HOST_ROBOTS:
+        for vectorize in (False, True):
+            host = RobotHost(update_hz=50, vectorize=vectorize, seed=0)
+            for k in range(robots):
+                host.add(f"bot{k}", BalancingRobot(history_seconds=30))
+            host.attach_webui(FakeWebUI())
+            tick_s = _best_seconds(lambda: host.step(1.0 / 50), n) / n
+            host.stop()
+            results[f"{robots}_{'vector' if vectorize else 'scalar'}_us_per_robot"] = round(tick_s / robots * 1e6, 2)
+    return results
+
+
+def _wait_in_sync(bot, timeout: float = 2.0) -> bool:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if bot.get_state()["bridge"]["config"]["in_sync"]:
+            return True
+        time.sleep(0.001)
+    return False
+
+
+def bench_emulated(seconds: float):
+    results = {}
+    for hz in EMULATED_HZ:
+        emu = EmulatedBridge(telemetry_hz=hz, max_telemetry_hz=max(EMULATED_HZ), seed=0)
+        emu.start()
+        bot = BalancingRobot(simulated=False, update_hz=200, history_seconds=30)
+        bot.attach_webui(FakeWebUI())
+        bot.attach_bridge(emu)
+        bot.start()
+        bot.http_set_mode("real")
+        _wait_in_sync(bot)
+        # The brick clamps telemetry_hz to what the sketch accepts; go around it.
+        emu.set_telemetry_rate(hz)
+        time.sleep(0.5)
+        before = bot._metrics.ingest_samples
+        start = time.perf_counter()
+        time.sleep(seconds)
+        ingested = bot._metrics.ingest_samples - before
+        elapsed = time.perf_counter() - start
+
+        t0 = time.perf_counter()
+        bot.http_set_pid(11.0 + hz / 1000.0, 0.1, 0.4)
+        acked = (time.perf_counter() - t0) * 1000.0 if _wait_in_sync(bot) else None
+        timing = bot.get_state()["timing"]
+        bot.stop()
+        emu.stop()
+        results[str(hz)] = {
+            "ingest_samples_per_s": round(ingested / elapsed, 1),
+            "loop_achieved_hz": timing["achieved_hz"],
+            "loop_event_wakes": timing["wakes"],
+            "config_ack_ms": round(acked, 2) if acked is not None else None,
+        }
+    return results
+
+
+def run(quick: bool):
+    scale = 0.25 if quick else 1.0
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "numpy": np.__version__ if np is not None else None,
+            "timestamp": time.time(),
+            "quick": quick,
+        },
+        "loop": bench_loop(2.0 * scale),
+        "ingest": bench_ingest(int(20000 * scale)),
+        "calls": bench_calls(int(2000 * scale)),
+        "alloc": bench_alloc(int(10000 * scale)),
+        "host": bench_host(int(200 * scale)),
+        "emulated": bench_emulated(2.0 * scale),
+    }
+
+
+def compare(results, baseline, tolerance: float):
+    """Return human-readable regressions of TRACKED metrics."""
+    regressions = []
+    for section, key, direction in TRACKED:
+        old = baseline.get(section, {}).get(key)
+        new = results.get(section, {}).get(key)
+        if old is None or new is None:
+            continue
+        if key == "blocks_per_step":
+            # Absolute: any steady allocation growth per tick is a regression.
+            if new - old > 0.5:
+                regressions.append(f"{section}.{key}: {old} -> {new}")
+            continue
+        change = (new - old) / old if old else 0.0
+        if change * direction < -tolerance:
+            regressions.append(f"{section}.{key}: {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--quick", action="store_true", help="shorter runs (about a quarter of the time)")
+    parser.add_argument("--output", help="also write the JSON results to this file")
+    parser.add_argument("--compare", help="baseline JSON from a previous run")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression (default 0.25)")
+    args = parser.parse_args()
+
+    results = run(args.quick)
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        results["regressions"] = compare(results, baseline, args.tolerance)
+
+    text = json.dumps(results, indent=2, sort_keys=True)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    return 1 if results.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
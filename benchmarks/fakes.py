@@ -0,0 +1,75 @@
+"""In-process stand-ins for the App Lab WebUI and Router Bridge.
+
+They implement just the calls ``BalancingRobot`` makes and record traffic,
+so the brick can run on any host without ``arduino.app_utils``.
+"""
+
+from collections import Counter, deque
+from typing import Any, Callable, Dict
+
+
+class FakeWebUI:
+    """Records ``send_message`` traffic and lets callers emit client messages."""
+
+    def __init__(self, keep: int = 256):
+        self.handlers: Dict[str, Callable] = {}
+        self.connect_handlers = []
+        self.disconnect_handlers = []
+        self.routes: Dict[str, Callable] = {}
+        self.counts: Counter = Counter()
+        self.messages: deque = deque(maxlen=keep)
+
+    def on_connect(self, fn: Callable) -> None:
+        self.connect_handlers.append(fn)
+
+    def on_disconnect(self, fn: Callable) -> None:
+        self.disconnect_handlers.append(fn)
+
+    def on_message(self, name: str, fn: Callable) -> None:
+        self.handlers[name] = fn
+
+    def send_message(self, message_type: str, data: Any, room=None) -> None:
+        self.counts[message_type] += 1
+        self.messages.append((message_type, data, room))
+
+    def expose_api(self, method: str, path: str, fn: Callable) -> None:
+        self.routes[f"{method} {path}"] = fn
+
+    def emit(self, name: str, data: Any, client: str = "bench") -> None:
+        """Deliver a client message as socket.io would."""
+        self.handlers[name](client, data)
+
+    def connect(self, client: str = "bench") -> None:
+        for fn in self.connect_handlers:
+            fn(client)
+
+    def disconnect(self, client: str = "bench") -> None:
+        for fn in self.disconnect_handlers:
+            fn(client)
+
+
+class FakeBridge:
+    """Records notifies and exposes the brick's provided callbacks."""
+
+    def __init__(self, status: str = "ok:sim:ready:mpu6050:pitch:1:v0"):
+        self.provided: Dict[str, Callable] = {}
+        self.counts: Counter = Counter()
+        self.notifies: deque = deque(maxlen=256)
+        self.status = status
+
+    def provide(self, name: str, fn: Callable) -> None:
+        self.provided[name] = fn
+
+    def notify(self, method: str, *params: Any) -> None:
+        self.counts[method] += 1
+        self.notifies.append((method, params))
+
+    def call(self, method: str, *params: Any, timeout: float = 0) -> Any:
+        self.counts[method] += 1
+        if method == "get_status":
+            return self.status
+        return None
+
+    def push(self, name: str, *params: Any) -> Any:
+        """Invoke a provided callback as if the MCU had sent ``name``."""
+        return self.provided[name](*params)
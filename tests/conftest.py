@@ -0,0 +1,8 @@
+"""Make the brick and the benchmark fakes importable without installing anything."""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "unoq" / "ArduinoApps" / "balancing_bot_app" / "python"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
@@ -0,0 +1,53 @@
+import math
+
+import pytest
+
+from arduino.app_bricks.balancing_robot.analytics import ControlQuality
+
+HZ = 200.0
+
+
+def _run(quality, seconds, error, pid_out=lambda t: 0.0):
+    dt = 1.0 / HZ
+    for k in range(int(seconds * HZ)):
+        t = k * dt
+        quality.update(dt, error(t), pid_out(t))
+    return quality.snapshot()
+
+
+def test_sine_error_gives_rms_frequency_and_amplitude():
+    amp, freq = 3.0, 2.0
+    # Long enough for the 5 s exponential window to forget its zero start.
+    snap = _run(ControlQuality(), 40.0, lambda t: amp * math.sin(2.0 * math.pi * freq * t))
+
+    assert snap["rms_error_deg"] == pytest.approx(amp / math.sqrt(2.0), rel=0.03)
+    assert snap["dominant_hz"] == pytest.approx(freq, abs=0.1)
+    assert snap["dominant_amp_deg"] == pytest.approx(amp, rel=0.1)
+    assert snap["saturation"] == 0.0
+
+
+def test_constant_offset_is_not_an_oscillation():
+    snap = _run(ControlQuality(), 40.0, lambda t: 1.5)
+
+    assert snap["rms_error_deg"] == pytest.approx(1.5, rel=0.01)
+    assert snap["dominant_amp_deg"] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_saturation_fraction():
+    snap = _run(ControlQuality(), 30.0, lambda t: 0.0, lambda t: 255.0 if (t % 1.0) < 0.25 else 0.0)
+
+    assert snap["saturation"] == pytest.approx(0.25, abs=0.05)
+
+
+def test_kick_response_overshoot_and_settling():
+    quality = ControlQuality(settle_band=2.0, settle_hold_s=1.0)
+    quality.mark_kick()
+    # Angle displaced to +10 deg (error -10), decaying oscillation at 1 Hz.
+    snap = _run(quality, 8.0, lambda t: -10.0 * math.exp(-t) * math.cos(2.0 * math.pi * t))
+
+    assert snap["responses"] == 1 and snap["settled"]
+    assert snap["peak_deg"] == pytest.approx(10.0, abs=0.01)
+    # First swing past the setpoint is half a period later.
+    assert snap["overshoot_deg"] == pytest.approx(10.0 * math.exp(-0.5), rel=0.05)
+    # |error| last exceeds the 2 deg band at the swing around t=1.5 s.
+    assert snap["settling_s"] == pytest.approx(1.55, abs=0.05)
@@ -0,0 +1,98 @@
+import time
+
+from arduino.app_bricks.balancing_robot.commands import BridgeCommandQueue
+
+
+class Recorder:
+    def __init__(self, fail_first=0):
+        self.fail_first = fail_first
+        self.calls = []
+
+    def __call__(self, method, *params):
+        self.calls.append((time.monotonic(), method, params))
+        if len(self.calls) <= self.fail_first:
+            raise ConnectionError("bridge busy")
+
+
+def _drain(queue, sent):
+    queue.start()
+    try:
+        deadline = time.monotonic() + 2.0
+        while queue.stats()["sent"] < sent and time.monotonic() < deadline:
+            time.sleep(0.005)
+    finally:
+        queue.stop()
+
+
+def test_same_method_coalesces_to_the_latest_params():
+    notify = Recorder()
+    queue = BridgeCommandQueue(notify, lambda: True)
+    queue.submit("set_pid", 1.0)
+    queue.submit("set_pid", 2.0)
+    queue.submit("set_mode", "real")
+    queue.submit("set_pid", 3.0)
+    assert len(queue) == 2
+
+    _drain(queue, 2)
+    # A coalesced command moves behind the ones queued before its latest submit.
+    assert [(m, p) for _t, m, p in notify.calls] == [("set_mode", ("real",)), ("set_pid", (3.0,))]
+    assert queue.stats()["coalesced"] == 2
+    assert queue.stats()["sent"] == 2
+
+
+def test_uncoalesced_commands_are_all_sent_in_order():
+    notify = Recorder()
+    queue = BridgeCommandQueue(notify, lambda: True)
+    for k in range(3):
+        queue.submit("kick", k, coalesce=False)
+
+    _drain(queue, 3)
+    assert [p for _t, _m, p in notify.calls] == [(0,), (1,), (2,)]
+
+
+def test_full_queue_drops_the_oldest():
+    queue = BridgeCommandQueue(Recorder(), lambda: True, maxsize=2)
+    assert queue.submit("a")
+    assert queue.submit("b")
+    assert not queue.submit("c")
+    assert queue.stats()["dropped"] == 1
+    assert len(queue) == 2
+
+
+def test_failures_retry_with_growing_backoff():
+    notify = Recorder(fail_first=3)
+    queue = BridgeCommandQueue(notify, lambda: True, retry_base_s=0.02, retry_max_s=1.0)
+    queue.submit("set_pid", 1.0)
+
+    _drain(queue, 1)
+    times = [t for t, _m, _p in notify.calls]
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    assert len(times) == 4
+    # 0.02, 0.04, 0.08 s between attempts.
+    assert gaps[0] >= 0.015 and gaps[1] >= 0.035 and gaps[2] >= 0.075
+    stats = queue.stats()
+    assert (stats["retries"], stats["sent"], stats["failed"]) == (3, 1, 0)
+
+
+def test_gives_up_after_max_attempts_and_waits_for_readiness():
+    notify = Recorder(fail_first=100)
+    queue = BridgeCommandQueue(notify, lambda: True, retry_base_s=0.001, max_attempts=3)
+    queue.submit("set_pid", 1.0)
+    queue.start()
+    try:
+        deadline = time.monotonic() + 2.0
+        while queue.stats()["failed"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.005)
+    finally:
+        queue.stop()
+    assert len(notify.calls) == 3
+    assert queue.stats()["failed"] == 1
+
+    not_ready = Recorder()
+    queue = BridgeCommandQueue(not_ready, lambda: False, retry_base_s=0.001, max_attempts=2)
+    queue.submit("set_pid", 1.0)
+    queue.start()
+    time.sleep(0.05)
+    queue.stop()
+    assert not not_ready.calls
+    assert queue.stats()["failed"] == 1
@@ -0,0 +1,89 @@
+import threading
+
+from arduino.app_bricks.balancing_robot.commands import BridgeCommandQueue
+from arduino.app_bricks.balancing_robot.config import VERSION_BASE_MAX, BridgeConfig
+
+
+def _config():
+    config = BridgeConfig(resend_after_s=0.5, base=100)
+    config.update(p=10.0, i=0.0, mode="sim")
+    return config
+
+
+def _fields(config):
+    message = config.message()
+    return None if message is None else (message[1][0], message[1][1])
+
+
+def test_ack_sends_only_newer_fields():
+    config = _config()
+    assert _fields(config) == (101, "p=10.0;i=0.0;mode=sim")
+    config.ack(101)
+    assert config.in_sync and config.message() is None
+
+    config.update(p=12.0, i=0.0, mode="sim")
+    assert not config.in_sync
+    assert _fields(config) == (102, "p=12.0")
+
+
+def test_acks_only_move_forward():
+    config = _config()
+    config.update(p=12.0, i=0.0, mode="sim")
+    config.ack(102)
+    config.ack(101)  # a late ack for an older send
+    assert config.acked == 102 and config.in_sync
+
+
+def test_mcu_reset_or_foreign_version_resends_everything():
+    config = _config()
+    config.ack(101)
+    config.ack(0)  # MCU reset
+    assert not config.in_sync
+    assert _fields(config) == (101, "p=10.0;i=0.0;mode=sim")
+
+    # A version this brick never sent, e.g. from a previous brick process.
+    for foreign in (1, 100, 5000):
+        config.ack(101)
+        config.ack(foreign)
+        assert config.acked == 0
+
+
+def test_versions_start_at_a_per_process_base():
+    config = BridgeConfig()
+    assert 0 < config.base < VERSION_BASE_MAX
+    config.update(p=1.0)
+    assert config.version == config.base + 1
+
+
+def test_resend_timer_and_failed_send():
+    config = _config()
+    config.message()
+    sent_at = config._sent_at
+    assert not config.needs_resend(sent_at + 0.1)
+    assert config.needs_resend(sent_at + 0.6)
+
+    config.message()
+    config.send_failed()
+    assert config.needs_resend()
+
+
+def test_dropped_apply_config_rearms_the_resend():
+    config = _config()
+    gave_up = threading.Event()
+
+    def notify(*_args):
+        raise ConnectionError("bridge gone")
+
+    def send_failed():
+        config.send_failed()
+        gave_up.set()
+
+    queue = BridgeCommandQueue(notify, lambda: True, retry_base_s=0.001, max_attempts=2)
+    queue.start()
+    try:
+        queue.submit("apply_config", build=config.message, on_fail=send_failed)
+        assert gave_up.wait(2.0)
+    finally:
+        queue.stop()
+    assert queue.failed == 1
+    assert config.needs_resend()
@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+from arduino.app_bricks.balancing_robot import BalancingRobot
+from arduino.app_bricks.balancing_robot.emulator import EmulatedBridge
+from fakes import FakeWebUI
+
+# Batch ingestion into the history needs numpy.
+pytest.importorskip("numpy")
+
+
+def _wait(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+@pytest.fixture
+def rig(request, tmp_path):
+    emu = EmulatedBridge(seed=0, **getattr(request, "param", {}))
+    emu.start()
+    bot = BalancingRobot(simulated=False, update_hz=200, history_seconds=30, record_dir=str(tmp_path))
+    bot.attach_webui(FakeWebUI())
+    bot.attach_bridge(emu)
+    bot.start()
+    yield bot, emu
+    bot.stop()
+    emu.stop()
+
+
+def _in_sync(bot):
+    return bot.get_state()["bridge"]["config"]["in_sync"]
+
+
+def test_real_mode_applies_config_and_ingests_batches(rig):
+    bot, emu = rig
+    bot.http_set_mode("real")
+    assert _wait(lambda: _in_sync(bot))
+    assert emu.config_version == bot._bridge_config.version
+    assert not emu.simulated and emu.imu_ready
+
+    bot.http_set_pid(p=15.5, i=0.25, d=0.75)
+    assert _wait(lambda: _in_sync(bot) and emu.kp == 15.5)
+    assert (emu.ki, emu.kd) == (0.25, 0.75)
+
+    assert _wait(lambda: bot._metrics.ingest_batches >= 5)
+    seq = bot._history.since(0)["seq"]
+    assert seq == list(range(seq[0], seq[0] + len(seq)))
+    assert emu.received["apply_config"] >= 2
+    assert bot._metrics.duplicate_samples == 0
+
+
+def test_mcu_reset_gets_the_whole_config_again(rig):
+    bot, emu = rig
+    bot.http_set_mode("real")
+    bot.http_set_pid(p=15.5, i=0.25, d=0.75)
+    assert _wait(lambda: _in_sync(bot) and emu.kp == 15.5)
+
+    # A sketch reset: defaults back, applied version 0.
+    with emu._lock:
+        emu.kp, emu.ki, emu.kd = 12.0, 0.0, 0.4
+        emu.simulated = True
+        emu.config_version = 0
+    assert _wait(lambda: emu.config_version == bot._bridge_config.version and emu.kp == 15.5)
+    assert not emu.simulated
+
+
+@pytest.mark.parametrize("rig", [{"drop_rate": 0.3, "latency_s": 0.002, "jitter_s": 0.002}], indirect=True)
+def test_lossy_link_still_converges(rig):
+    bot, emu = rig
+    bot.http_set_mode("real")
+    bot.http_set_pid(p=9.0, i=0.5, d=1.0)
+
+    assert _wait(lambda: _in_sync(bot) and emu.kp == 9.0, timeout=10.0)
+    assert sum(emu.dropped.values()) > 0
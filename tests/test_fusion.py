@@ -0,0 +1,41 @@
+import pytest
+
+from arduino.app_bricks.balancing_robot.fusion import ComplementaryFilter
+
+np = pytest.importorskip("numpy")
+
+
+def _reference(alpha, dt, gyro, accel, angle=None):
+    out = []
+    x = float(accel[0]) if angle is None else angle
+    for h, rate, measured in zip(dt.tolist(), gyro.tolist(), accel.tolist()):
+        x = alpha * (x + rate * h) + (1.0 - alpha) * measured
+        out.append(x)
+    return out
+
+
+def _batch(n, seed=0):
+    rng = np.random.default_rng(seed)
+    dt = rng.uniform(0.004, 0.006, n)
+    gyro = rng.normal(0.0, 50.0, n)
+    accel = 10.0 * np.sin(np.linspace(0.0, 20.0, n)) + rng.normal(0.0, 1.0, n)
+    return dt, gyro, accel
+
+
+@pytest.mark.parametrize("alpha", [0.0, 0.3, 0.9, 0.98, 0.999])
+def test_closed_form_matches_the_recursive_filter(alpha):
+    dt, gyro, accel = _batch(3000)
+    filt = ComplementaryFilter(alpha)
+
+    assert filt.run(dt, gyro, accel) == pytest.approx(_reference(alpha, dt, gyro, accel), rel=1e-9, abs=1e-9)
+
+
+def test_state_carries_across_batches():
+    dt, gyro, accel = _batch(1000, seed=1)
+    filt = ComplementaryFilter(0.98)
+    parts = [filt.run(dt[a:b], gyro[a:b], accel[a:b]) for a, b in ((0, 1), (1, 400), (400, 400), (400, 1000))]
+
+    assert np.concatenate(parts) == pytest.approx(_reference(0.98, dt, gyro, accel), rel=1e-9, abs=1e-9)
+    assert filt.angle == pytest.approx(parts[-1][-1])
+    filt.reset()
+    assert filt.angle is None
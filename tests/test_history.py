@@ -0,0 +1,66 @@
+import pytest
+
+from arduino.app_bricks.balancing_robot.history import HISTORY_FIELDS, TelemetryHistory
+
+np = pytest.importorskip("numpy")
+
+
+def _filled(capacity=64, rows=100):
+    history = TelemetryHistory(capacity)
+    for seq in range(1, rows + 1):
+        history.append(seq, seq * 0.01, float(seq), -float(seq), 0.0, seq % 7, seq, -seq, 0.5)
+    return history
+
+
+def test_ring_keeps_the_newest_rows():
+    history = _filled(capacity=64, rows=100)
+
+    assert len(history) == 64
+    assert history.last_seq == 100
+    assert history.since(0, limit=1000)["seq"] == list(range(37, 101))
+
+
+def test_since_returns_only_newer_rows_up_to_limit():
+    history = _filled()
+
+    rows = history.since(95, fields=["angle_deg", "pwm"])
+    assert rows["seq"] == [96, 97, 98, 99, 100]
+    assert rows["angle_deg"] == [96.0, 97.0, 98.0, 99.0, 100.0]
+    assert set(rows) == {"seq", "ts", "angle_deg", "pwm"}
+    assert history.since(90, limit=3)["seq"] == [98, 99, 100]
+    assert history.since(100)["seq"] == []
+
+
+def test_query_small_range_is_returned_as_is():
+    history = _filled()
+
+    result = history.query(start=0.95, end=0.975, fields=["angle_deg"])
+    assert result["count"] == 3
+    assert result["fields"]["angle_deg"]["min"] == result["fields"]["angle_deg"]["max"] == [95.0, 96.0, 97.0]
+    assert result["bucket_s"] == 0.0
+
+
+def test_query_downsampling_keeps_peaks():
+    history = TelemetryHistory(1024)
+    for seq in range(1, 1001):
+        # One spike in an otherwise flat signal.
+        angle = 50.0 if seq == 501 else 0.0
+        history.append(seq, seq * 0.01, angle, 0.0, 0.0, 0, 0, 0, 0.0)
+
+    result = history.query(max_points=10)
+    angle = result["fields"]["angle_deg"]
+    assert result["count"] == 1000
+    assert len(result["ts"]) == len(angle["max"]) == 10
+    assert max(angle["max"]) == 50.0
+    assert min(angle["min"]) == 0.0
+    assert set(result["fields"]) == set(HISTORY_FIELDS)
+
+
+def test_extend_matches_append():
+    appended = _filled(capacity=32, rows=40)
+    extended = TelemetryHistory(32)
+    seq = np.arange(1, 41)
+    columns = np.array([seq, -seq, 0 * seq, seq % 7, seq, -seq, 0 * seq + 0.5], dtype=np.float32)
+    extended.extend(seq, seq * 0.01, columns)
+
+    assert extended.since(0) == appended.since(0)
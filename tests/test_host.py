@@ -0,0 +1,32 @@
+import pytest
+
+from arduino.app_bricks.balancing_robot import BalancingRobot, RobotHost
+from arduino.app_bricks.balancing_robot.host import VECTOR_MIN
+
+pytest.importorskip("numpy")
+
+FIELDS = ("seq", "angle_deg", "gyro_dps", "accel_g", "motor_pwm", "encoders", "pid", "setpoint")
+
+
+def _host(vectorize):
+    host = RobotHost(vectorize=vectorize, seed=7)
+    for k in range(VECTOR_MIN + 4):
+        robot = host.add(f"bot{k}", BalancingRobot(simulated=True, history_seconds=0))
+        robot.http_set_pid(p=10.0 + k, i=0.1 * k, d=0.5 + 0.05 * k)
+        robot.http_set_setpoint(setpoint=0.5 * (k % 3))
+    host.get("bot3").http_kick(angle=8.0)
+    return host
+
+
+def _frames(host):
+    return {name: {key: host.get(name)._frames.snapshot()[key] for key in FIELDS} for name in host.names()}
+
+
+def test_vectorized_and_scalar_stepping_match():
+    vector, scalar = _host(True), _host(False)
+    for _ in range(50):
+        vector.step(0.02)
+        scalar.step(0.02)
+        assert _frames(vector) == _frames(scalar)
+    assert vector.vector_steps and not vector.scalar_steps
+    assert scalar.scalar_steps and not scalar.vector_steps
@@ -0,0 +1,28 @@
+import threading
+
+from arduino.app_bricks.balancing_robot.latency import LatencyTracer
+
+
+def test_concurrent_writers_lose_no_samples():
+    tracer = LatencyTracer()
+    per_thread = 5000
+
+    def observe():
+        for k in range(per_thread):
+            tracer.observe("bridge_to_loop", 0.5 + k % 7)
+
+    def send():
+        for seq in range(1, per_thread + 1):
+            tracer.sent(seq, 1.0)
+
+    threads = [threading.Thread(target=observe) for _ in range(3)] + [threading.Thread(target=send)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stages = tracer.stats()["stages"]
+    assert stages["bridge_to_loop"]["count"] == 3 * per_thread
+    assert stages["loop_to_publish"]["count"] == per_thread
+    tracer.reset()
+    assert tracer.stats()["stages"]["bridge_to_loop"]["count"] == 0
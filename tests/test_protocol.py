@@ -0,0 +1,94 @@
+import struct
+import time
+
+import pytest
+
+from arduino.app_bricks.balancing_robot import BalancingRobot
+from arduino.app_bricks.balancing_robot.protocol import (
+    BATCH_HEADER_V1,
+    TELEMETRY_SAMPLE,
+    decode_telemetry_batch,
+    encode_telemetry_batch,
+    is_retransmit,
+    mcu_ms_diff,
+)
+
+np = pytest.importorskip("numpy")
+
+
+def _samples(first_ms, n, step_ms=5):
+    return [((first_ms + k * step_ms) & 0xFFFFFFFF, 0.5 * k, -1.0 * k, 0.25, k - 3, 100 + k, -100 - k) for k in range(n)]
+
+
+def test_v3_batch_round_trip():
+    samples = _samples(1000, 4)
+    decoded, header = decode_telemetry_batch(
+        encode_telemetry_batch(samples, flags=2, config_version=7, control_hz=200, control_max_us=850)
+    )
+
+    assert (header.version, header.flags, header.count) == (3, 2, 4)
+    assert (header.config_version, header.control_hz, header.control_max_us) == (7, 200, 850)
+    assert decoded["mcu_ms"].tolist() == [s[0] for s in samples]
+    assert decoded["angle_deg"].tolist() == pytest.approx([s[1] for s in samples])
+    assert decoded["pwm"].tolist() == [s[4] for s in samples]
+    assert decoded["enc_right"].tolist() == [s[6] for s in samples]
+
+
+def test_v1_header_and_truncated_payload():
+    payload = BATCH_HEADER_V1.pack(1, 0, 3) + b"".join(TELEMETRY_SAMPLE.pack(*s) for s in _samples(0, 3))
+    decoded, header = decode_telemetry_batch(payload[:-1])
+
+    # The count is clamped to the samples actually present.
+    assert header.count == 2 and len(decoded) == 2
+    assert header.config_version is None and header.control_hz is None
+    with pytest.raises(ValueError):
+        decode_telemetry_batch(b"\x09\x00\x00\x00")
+    with pytest.raises(ValueError):
+        decode_telemetry_batch(b"\x03")
+
+
+def test_mcu_ms_diff_wraps():
+    assert mcu_ms_diff(5, 0xFFFFFFFB) == 10
+    assert mcu_ms_diff(0xFFFFFFFB, 5) == -10
+    assert mcu_ms_diff(2000, 1000) == 1000
+
+
+def test_retransmit_detection():
+    assert not is_retransmit(100, None)
+    assert is_retransmit(100, 100)
+    assert is_retransmit(90, 100)
+    assert is_retransmit(0xFFFFFFF0, 4)
+    assert not is_retransmit(110, 100)
+    assert not is_retransmit(4, 0xFFFFFFF0)
+    # Far behind the newest batch: the MCU restarted millis().
+    assert not is_retransmit(200, 600000)
+
+
+def _real_robot(tmp_path):
+    return BalancingRobot(simulated=False, history_seconds=10, record_dir=str(tmp_path))
+
+
+def test_batch_ingest_drops_retransmits(tmp_path):
+    robot = _real_robot(tmp_path)
+    first = encode_telemetry_batch(_samples(1000, 4))
+    robot.record_telemetry_batch(first)
+    robot.record_telemetry_batch(first)
+    robot.record_telemetry_batch(encode_telemetry_batch(_samples(1020, 4)))
+
+    metrics = robot._metrics
+    assert (metrics.ingest_samples, metrics.duplicate_samples) == (8, 4)
+    assert robot._history.since(0)["seq"] == list(range(1, 9))
+
+
+def test_batch_across_millis_wrap_keeps_recent_timestamps(tmp_path):
+    robot = _real_robot(tmp_path)
+    before = time.time()
+    robot.record_telemetry_batch(encode_telemetry_batch(_samples(0xFFFFFFF6, 4)))
+    robot.record_telemetry_batch(encode_telemetry_batch(_samples(0xFFFFFFF6 + 20, 4)))
+
+    rows = robot._history.since(0)
+    assert robot._metrics.duplicate_samples == 0
+    assert len(rows["seq"]) == 8
+    assert min(rows["ts"]) > before - 1.0
+    assert rows["ts"] == sorted(rows["ts"])
+    assert rows["ts"][3] - rows["ts"][0] == pytest.approx(0.015, abs=1e-6)
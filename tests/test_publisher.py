@@ -0,0 +1,45 @@
+from arduino.app_bricks.balancing_robot import BalancingRobot
+from fakes import FakeWebUI
+
+
+def _robot_with_clients(*clients):
+    robot = BalancingRobot(simulated=True, history_seconds=0)
+    ui = FakeWebUI()
+    robot.attach_webui(ui)
+    for client in clients:
+        ui.connect(client)
+    ui.messages.clear()
+    return robot, ui
+
+
+def _push(robot, ui):
+    robot._step(0.02)
+    robot._publisher.publish_once()
+    return [(name, room) for name, _data, room in ui.messages]
+
+
+def test_binary_client_does_not_switch_json_clients():
+    robot, ui = _robot_with_clients("a", "b")
+    ui.emit("set_wire_format", {"format": "binary"}, client="b")
+
+    sent = _push(robot, ui)
+
+    assert ("telemetry", "a") in sent
+    assert ("telemetry_bin", "b") in sent
+    assert ("telemetry_bin", "a") not in sent
+    assert ("telemetry", "b") not in sent
+    assert ("telemetry", None) not in sent
+    assert ("telemetry_bin", None) not in sent
+
+
+def test_binary_client_reverting_or_leaving_stops_binary():
+    robot, ui = _robot_with_clients("a", "b")
+    ui.emit("set_wire_format", {"format": "binary"}, client="a")
+    ui.emit("set_wire_format", {"format": "binary"}, client="b")
+    ui.emit("set_wire_format", {"format": "json"}, client="a")
+    ui.disconnect("b")
+
+    sent = _push(robot, ui)
+
+    assert ("telemetry", None) in sent
+    assert not [name for name, _room in sent if name == "telemetry_bin"]
@@ -0,0 +1,68 @@
+import time
+
+from arduino.app_bricks.balancing_robot.recorder import (
+    KIND_CONFIG,
+    RECORD,
+    SEGMENT_HEADER_SIZE,
+    TelemetryRecorder,
+    list_segments,
+)
+
+# 16 records per segment, the smallest the recorder allows.
+SEGMENT_BYTES = SEGMENT_HEADER_SIZE + 16 * RECORD.size
+
+
+def _recorder(directory, **kwargs):
+    return TelemetryRecorder(directory, segment_bytes=SEGMENT_BYTES, flush_interval_s=0.001, **kwargs)
+
+
+def _record(recorder, rows, session="run"):
+    assert recorder.start(session)
+    for k in range(rows):
+        recorder.record(k + 1, 1000.0 + k * 0.01, float(k), 0.0, 0.0, k % 100, k, -k, 0.0, False)
+        if k % 8 == 7:
+            # Let the writer keep up with the small queue.
+            time.sleep(recorder.flush_interval_s)
+    recorder.stop()
+
+
+def _disk_bytes(directory):
+    return sum(path.stat().st_size for path in list_segments(directory))
+
+
+def test_eviction_keeps_the_session_under_budget(tmp_path):
+    recorder = _recorder(tmp_path, budget_bytes=3 * SEGMENT_BYTES)
+    _record(recorder, 160)
+
+    status = recorder.status()
+    segments = list_segments(tmp_path)
+    assert status["error"] is None
+    assert status["records"] == 160 and status["dropped"] == 0
+    assert status["segments"] == 10
+    assert status["evicted"] == 10 - len(segments)
+    # The oldest segments went first.
+    assert segments[-1].name == "run-00010.btr"
+    assert segments[0].name != "run-00001.btr"
+    # The writer-maintained totals match the directory.
+    assert status["disk_bytes"] == _disk_bytes(tmp_path) <= recorder.budget_bytes
+    assert status["disk_segments"] == len(segments)
+
+
+def test_eviction_counts_segments_left_by_earlier_sessions(tmp_path):
+    recorder = _recorder(tmp_path, budget_bytes=3 * SEGMENT_BYTES)
+    _record(recorder, 48, session="old")
+    _record(recorder, 48, session="new")
+
+    names = [path.name for path in list_segments(tmp_path)]
+    assert all(name.startswith("new-") for name in names)
+    assert recorder.status()["disk_bytes"] == _disk_bytes(tmp_path) <= recorder.budget_bytes
+
+
+def test_every_segment_starts_with_the_current_config(tmp_path):
+    recorder = _recorder(tmp_path)
+    recorder.record_config({"pid": {"p": 12.0, "i": 0.0, "d": 0.5}, "setpoint": 0.0}, version=3)
+    _record(recorder, 40)
+
+    for path in list_segments(tmp_path):
+        first = RECORD.unpack_from(path.read_bytes(), SEGMENT_HEADER_SIZE)
+        assert first[0] == KIND_CONFIG and first[3] == 3
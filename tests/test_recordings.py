@@ -0,0 +1,67 @@
+import gc
+import os
+import warnings
+
+import pytest
+
+from arduino.app_bricks.balancing_robot import BalancingRobot
+
+# Export and segment replay need numpy.
+pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def robot(tmp_path):
+    robot = BalancingRobot(simulated=True, history_seconds=10, record_dir=str(tmp_path / "recordings"))
+    robot.start_recording("run")
+    for _ in range(50):
+        robot._step(0.02)
+    robot.stop_recording()
+    (tmp_path / "secret.csv").write_text("ts,angle_deg\n1.0,2.0\n")
+    yield robot
+    robot.stop_replay()
+
+
+@pytest.mark.parametrize("name", ["run", "run-00001.btr"])
+def test_recordings_open_by_name(robot, name):
+    assert b"".join(robot.export_telemetry(name)).startswith(b"seq,ts,")
+    assert robot.start_replay(name)["error"] is None
+
+
+@pytest.mark.parametrize("name", ["../secret.csv", "..", "/etc/passwd", "sub/run"])
+def test_paths_outside_record_dir_are_rejected(robot, tmp_path, name):
+    assert "error" in robot.http_export(source=name)
+    assert robot.start_replay(name)["error"]
+    assert "error" in robot.http_export(source=str(tmp_path / "secret.csv"))
+
+
+def test_symlink_out_of_record_dir_is_rejected(robot, tmp_path):
+    os.symlink(tmp_path / "secret.csv", tmp_path / "recordings" / "link.csv")
+    assert "error" in robot.http_export(source="link.csv")
+
+
+def _open_fds():
+    return len(os.listdir("/proc/self/fd")) if os.path.isdir("/proc/self/fd") else None
+
+
+def test_replay_skips_an_empty_last_segment(robot, tmp_path):
+    # What a recorder that crashed right after creating its next segment leaves.
+    (tmp_path / "recordings" / "run-00002.btr").write_bytes(b"")
+    fds = _open_fds()
+
+    assert robot.start_replay("run")["error"] is None
+    robot.stop_replay()
+    assert b"".join(robot.export_telemetry("run")).count(b"\n") == 51
+    assert _open_fds() == fds
+
+
+def test_bad_segment_closes_the_ones_already_opened(robot, tmp_path):
+    (tmp_path / "recordings" / "run-00002.btr").write_bytes(b"\0" * 64)
+    fds = _open_fds()
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        assert robot.start_replay("run")["error"]
+        gc.collect()
+    assert not [w for w in caught if issubclass(w.category, ResourceWarning)]
+    assert _open_fds() == fds
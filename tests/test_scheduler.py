@@ -0,0 +1,54 @@
+import pytest
+
+from arduino.app_bricks.balancing_robot.scheduler import DeadlineScheduler
+
+
+class FakeClock:
+    """Monotonic clock that only moves when told to (or when waited on)."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def wait(self, delay):
+        self.now += delay
+        return False
+
+
+def _run(policy):
+    clock = FakeClock()
+    scheduler = DeadlineScheduler(10.0, policy=policy, clock=clock)
+    # The first tick's work overruns by 2.5 periods.
+    clock.now = 0.35
+    dts = [scheduler.wait(clock) for _ in range(4)]
+    return scheduler, clock, dts
+
+
+def test_skip_drops_missed_ticks_and_reports_measured_dt():
+    scheduler, clock, dts = _run("skip")
+
+    assert dts == pytest.approx([0.35, 0.05, 0.1, 0.1])
+    assert scheduler.skipped == 2
+    assert clock.now == pytest.approx(0.6)
+
+
+def test_catch_up_runs_missed_ticks_one_period_each():
+    scheduler, clock, dts = _run("catch_up")
+
+    # Three ticks run back-to-back at t=0.35, then the schedule is met again;
+    # simulated time (sum of dt) matches the clock.
+    assert dts == pytest.approx([0.1, 0.1, 0.1, 0.1])
+    assert scheduler.skipped == 0
+    assert clock.now == pytest.approx(0.4)
+    assert sum(dts) == pytest.approx(clock.now)
+
+
+def test_catch_up_realigns_past_max_catch_up():
+    clock = FakeClock()
+    scheduler = DeadlineScheduler(10.0, policy="catch_up", max_catch_up=2, clock=clock)
+    clock.now = 0.55
+
+    assert scheduler.wait(clock) == pytest.approx(0.55)
+    assert scheduler.skipped == 4
@@ -0,0 +1,61 @@
+import pytest
+
+from arduino.app_bricks.balancing_robot import wire
+
+STATIC = {"pid": {"p": 12.0, "i": 0.1, "d": 0.5}, "setpoint": 0.0, "mode": "real", "imu_model": "mpu6050"}
+
+
+def test_round_trip_with_static_fields():
+    rows = [
+        (1, 1700000000.125, 1.5, -20.25, 0.5, 100, -100, 12345, -12345),
+        (2, 1700000000.130, -3.0, 4.0, -0.25, 255, 255, 0, 7),
+    ]
+    packet = wire.encode(rows, STATIC)
+    decoded = wire.decode(packet)
+
+    assert decoded["static"] == STATIC
+    for sent, got in zip(rows, decoded["frames"]):
+        assert got[0] == sent[0]
+        assert got[1] == sent[1]  # ts is a double
+        assert got[2:5] == pytest.approx(sent[2:5])
+        assert got[5:] == sent[5:]
+
+
+def test_frames_are_36_bytes_and_out_of_range_values_clamp():
+    packet = wire.encode([(2**32 + 5, 0.0, 0.0, 0.0, 0.0, 40000, -40000, 2**40, -(2**40))])
+    assert wire.FRAME.size == 36
+    assert len(packet) == wire.HEADER.size + 36
+
+    (frame,) = wire.decode(packet)["frames"]
+    assert frame[0] == 5
+    assert frame[5:] == (32767, -32768, 2**31 - 1, -(2**31))
+    assert wire.decode(packet)["static"] is None
+
+
+def test_bad_magic_is_rejected():
+    with pytest.raises(ValueError):
+        wire.decode(b"XX" + wire.encode([])[2:])
+
+
+def test_encoder_only_resends_changed_static_fields():
+    encoder = wire.WireEncoder(static_every_s=3600.0)
+    row = [(1, 0.0, 0.0, 0.0, 0.0, 0, 0, 0, 0)]
+
+    assert wire.decode(encoder.encode(row, STATIC))["static"] == STATIC
+    assert wire.decode(encoder.encode(row, STATIC))["static"] is None
+    changed = dict(STATIC, setpoint=1.0)
+    assert wire.decode(encoder.encode(row, changed))["static"] == changed
+    encoder.force_static()
+    assert wire.decode(encoder.encode(row, changed))["static"] == changed
+
+
+def test_frame_and_history_rows_agree():
+    frame = {
+        "seq": 9, "ts": 1.0, "angle_deg": 2.0, "gyro_dps": 3.0, "accel_g": 0.5,
+        "motor_pwm": {"left": 10, "right": 10}, "encoders": {"left": 4, "right": 5},
+    }
+    history = {
+        "seq": [9], "ts": [1.0], "angle_deg": [2.0], "gyro_dps": [3.0], "accel_g": [0.5],
+        "pwm": [10], "enc_left": [4], "enc_right": [5],
+    }
+    assert wire.rows_from_history(history) == [tuple(wire.row_from_frame(frame))]
@@ -1,5 +1,11 @@
 let socket;
 let pollTimer = null;
+let longPollActive = false;
+let statusSeq = 0;
+let statusCrc = null;
+// Long polls return at once when frames are pending; space them out and let
+// each response carry the intermediate frames instead.
+const LONG_POLL_MIN_INTERVAL_MS = 100;
 let lastTelemetry = null;
 let kickOverlayMagnitude = 0;
 let kickOverlayStart = 0;
@@ -16,6 +22,8 @@ const motorEl = document.getElementById('motor');
 const encEl = document.getElementById('enc');
 const modeEl = document.getElementById('mode');
 const imuEl = document.getElementById('imu');
+const sampleAgeEl = document.getElementById('sample-age');
+const controlHzEl = document.getElementById('control-hz');
 
 const pidP = document.getElementById('pid-p');
 const pidI = document.getElementById('pid-i');
@@ -23,6 +31,41 @@ const pidD = document.getElementById('pid-d');
 const pidApply = document.getElementById('pid-apply');
 const pidHz = document.getElementById('pid-hz');
 const pidHzApply = document.getElementById('pid-hz-apply');
+const telemetryHz = document.getElementById('telemetry-hz');
+const telemetryHzApply = document.getElementById('telemetry-hz-apply');
+
+const autotuneStatus = document.getElementById('autotune-status');
+const autotuneStart = document.getElementById('autotune-start');
+const autotuneApply = document.getElementById('autotune-apply');
+let autotuneTimer = null;
+
+const recordStatus = document.getElementById('record-status');
+const recordStart = document.getElementById('record-start');
+const recordStop = document.getElementById('record-stop');
+
+const replayPath = document.getElementById('replay-path');
+const replaySpeed = document.getElementById('replay-speed');
+const replayStart = document.getElementById('replay-start');
+const replayPause = document.getElementById('replay-pause');
+const replayStop = document.getElementById('replay-stop');
+const replaySeek = document.getElementById('replay-seek');
+const replayStatus = document.getElementById('replay-status');
+let replayState = 'idle';
+let replayTimer = null;
+
+const latencyEl = document.getElementById('latency');
+const LATENCY_STAGES = [
+    ['batch_wait', 'MCU batch'],
+    ['mcu_to_bridge', 'MCU → bridge'],
+    ['bridge_to_loop', 'Bridge → loop'],
+    ['loop_to_publish', 'Loop → send'],
+    ['publish_to_browser', 'Socket'],
+    ['browser_render', 'Render'],
+];
+const LATENCY_REPORT_MS = 500;
+let lastLatencyReport = 0;
+
+const qualityEl = document.getElementById('quality');
 
 const setpointEl = document.getElementById('setpoint');
 const setpointApply = document.getElementById('setpoint-apply');
@@ -62,12 +105,30 @@ const chartCtx = chart.getContext('2d');
 const wire = document.getElementById('wireframe');
 const wireCtx = wire.getContext('2d');
 
-const angleHistory = [];
-const MAX_POINTS = 200;
+// Angle history: a fixed Float32Array ring filled at the telemetry rate.
+// Rendering happens at most once per animation frame and decimates the ring
+// to one min/max pair per pixel column, so its cost does not depend on how
+// fast samples arrive.
+const HISTORY_CAPACITY = 8192;
+const angleRing = new Float32Array(HISTORY_CAPACITY);
+let ringHead = 0;
+let ringCount = 0;
+let ringLastSeq = 0;
+let colMin = new Float32Array(0);
+let colMax = new Float32Array(0);
+let chartDirty = true;
+let renderPending = false;
 
 const UI_ANGLE_SCALE = 6.0;
 let chartScale = UI_ANGLE_SCALE;
 
+// Opt-in compact binary telemetry: open the dashboard with ?wire=binary.
+const WIRE_BINARY = new URLSearchParams(window.location.search).get('wire') === 'binary';
+const WIRE_FRAME_SIZE = 36;
+let wireStatic = null;
+let wireSeq = 0;
+let wireCrc = null;
+
 function applyTheme(theme) {
     document.body.dataset.theme = theme;
     localStorage.setItem('bb_theme', theme);
@@ -120,10 +181,77 @@ function resizeCanvases() {
         wire.width = Math.round(wireRect.width);
         wire.height = Math.round(wireRect.height);
     }
-    drawChart();
+    chartDirty = true;
+    scheduleRender();
+}
+
+function pushAngle(seq, angle) {
+    // Samples can arrive twice (telemetry_batch plus telemetry, long-poll
+    // frames plus telemetry); a seq at or just below the newest is a repeat.
+    if (seq > 0 && seq <= ringLastSeq && ringLastSeq - seq < HISTORY_CAPACITY) return;
+    if (seq > 0) ringLastSeq = seq;
+    angleRing[ringHead] = angle;
+    ringHead = (ringHead + 1) % HISTORY_CAPACITY;
+    if (ringCount < HISTORY_CAPACITY) ringCount++;
+    chartDirty = true;
+}
+
+function clearAngles() {
+    ringHead = 0;
+    ringCount = 0;
+    ringLastSeq = 0;
+    chartDirty = true;
+}
+
+function scheduleRender() {
+    if (renderPending) return;
+    renderPending = true;
+    requestAnimationFrame(renderFrame);
+}
+
+function renderFrame() {
+    renderPending = false;
+    if (chartDirty) {
+        chartDirty = false;
+        drawChart();
+    }
     if (lastTelemetry) {
         drawWireframe(lastTelemetry.angle_deg);
     }
+    if (kickOverlayDuration) {
+        // Keep the kick wobble animating between telemetry updates.
+        scheduleRender();
+    }
+}
+
+function decimateAngles(columns) {
+    // One min/max pair per pixel column over the HISTORY_CAPACITY-slot
+    // window (filled from the left, like a strip chart). Returns max |angle|.
+    if (colMin.length !== columns) {
+        colMin = new Float32Array(columns);
+        colMax = new Float32Array(columns);
+    }
+    colMin.fill(NaN);
+    colMax.fill(NaN);
+    const start = (ringHead - ringCount + HISTORY_CAPACITY) % HISTORY_CAPACITY;
+    const perColumn = HISTORY_CAPACITY / columns;
+    let maxAbs = 0;
+    for (let c = 0; c < columns; c++) {
+        const from = Math.floor(c * perColumn);
+        const to = Math.min(ringCount, Math.max(from + 1, Math.floor((c + 1) * perColumn)));
+        if (from >= ringCount) break;
+        let lo = Infinity;
+        let hi = -Infinity;
+        for (let i = from; i < to; i++) {
+            const v = angleRing[(start + i) % HISTORY_CAPACITY];
+            if (v < lo) lo = v;
+            if (v > hi) hi = v;
+        }
+        colMin[c] = lo;
+        colMax[c] = hi;
+        maxAbs = Math.max(maxAbs, -lo, hi);
+    }
+    return maxAbs;
 }
 
 function setStatus(text, isError = false) {
@@ -137,7 +265,11 @@ function setStatus(text, isError = false) {
 }
 
 function drawChart() {
-    const maxAbs = angleHistory.reduce((acc, v) => Math.max(acc, Math.abs(v)), 0);
+    const padLeft = 46;
+    const padRight = 6;
+    const usableWidth = chart.width - padLeft - padRight;
+    const columns = Math.max(1, Math.floor(usableWidth));
+    const maxAbs = decimateAngles(columns);
     if (maxAbs > 0) {
         const maxScale = (chart.height * 0.45) / maxAbs;
         chartScale = Math.min(UI_ANGLE_SCALE, maxScale);
@@ -150,9 +282,6 @@ function drawChart() {
     const gridColor = styles.getPropertyValue('--border').trim() || '#e6e6e6';
     const labelColor = styles.getPropertyValue('--muted').trim() || '#6a6a6a';
     const labelFont = '12px "Avenir", "Gill Sans", "Trebuchet MS", sans-serif';
-    const padLeft = 46;
-    const padRight = 6;
-    const usableWidth = chart.width - padLeft - padRight;
 
     const maxVisibleDeg = (chart.height * 0.45) / chartScale;
     const maxTicks = Math.min(6, Math.max(4, Math.floor(chart.height / 40)));
@@ -195,12 +324,21 @@ function drawChart() {
     chartCtx.strokeStyle = '#1fd1c7';
     chartCtx.lineWidth = 2;
     chartCtx.beginPath();
-    angleHistory.forEach((v, i) => {
-        const x = padLeft + (i / (MAX_POINTS - 1)) * usableWidth;
-        const y = chart.height / 2 - (v * chartScale);
-        if (i === 0) chartCtx.moveTo(x, y);
-        else chartCtx.lineTo(x, y);
-    });
+    const mid = chart.height / 2;
+    let started = false;
+    for (let c = 0; c < columns; c++) {
+        if (Number.isNaN(colMin[c])) break;
+        const x = padLeft + c + 0.5;
+        const yHi = mid - colMax[c] * chartScale;
+        const yLo = mid - colMin[c] * chartScale;
+        if (!started) {
+            chartCtx.moveTo(x, yHi);
+            started = true;
+        } else {
+            chartCtx.lineTo(x, yHi);
+        }
+        if (yLo !== yHi) chartCtx.lineTo(x, yLo);
+    }
     chartCtx.stroke();
 }
 
@@ -289,6 +427,7 @@ function applyConfig(cfg) {
     pidI.value = cfg.pid.i;
     pidD.value = cfg.pid.d;
     pidHz.value = cfg.pid_hz || 50;
+    telemetryHz.value = cfg.telemetry_hz || 200;
     setpointEl.value = cfg.setpoint;
     imuModel.value = cfg.imu_model;
     axisMode.value = cfg.axis_mode || 'pitch';
@@ -302,6 +441,146 @@ function applyConfig(cfg) {
     imuEl.textContent = cfg.imu_model;
 }
 
+function renderAutotune(st) {
+    if (!st) return;
+    if (st.state === 'error') {
+        autotuneStatus.textContent = `error: ${st.error}`;
+        return;
+    }
+    const pct = Math.round((st.progress || 0) * 100);
+    let text = `${st.state} ${pct}%`;
+    if (st.best) {
+        text += ` best P ${st.best.p.toFixed(2)} I ${st.best.i.toFixed(2)} D ${st.best.d.toFixed(2)} (score ${st.best.score.toFixed(2)})`;
+    }
+    autotuneStatus.textContent = text;
+}
+
+function renderRecorder(st) {
+    if (!st) return;
+    if (st.error) {
+        recordStatus.textContent = `error: ${st.error}`;
+        return;
+    }
+    if (!st.running) {
+        recordStatus.textContent = st.records ? `stopped (${st.records} records)` : 'stopped';
+        return;
+    }
+    const mb = (st.disk_bytes / (1024 * 1024)).toFixed(1);
+    let text = `recording ${st.session}: ${st.records} records, ${mb} MB`;
+    if (st.dropped) {
+        text += `, ${st.dropped} dropped`;
+    }
+    recordStatus.textContent = text;
+}
+
+async function sendRecorder(path) {
+    const res = await fetch(path);
+    renderRecorder(await res.json());
+}
+
+function renderReplay(st) {
+    if (!st || st.sessions) return;
+    replayState = st.state;
+    if (st.error) {
+        replayStatus.textContent = `error: ${st.error}`;
+    } else if (st.state === 'idle') {
+        replayStatus.textContent = 'idle';
+    } else {
+        replayStatus.textContent = `${st.state} ${st.position_s.toFixed(1)} / ${st.duration_s.toFixed(1)} s`;
+    }
+    replaySeek.max = String(st.duration_s || 0);
+    if (document.activeElement !== replaySeek) {
+        replaySeek.value = String(st.position_s || 0);
+    }
+    replayPause.textContent = st.state === 'paused' ? 'Resume' : 'Pause';
+}
+
+function watchReplay() {
+    if (replayTimer) return;
+    replayTimer = setInterval(async () => {
+        if (replayState !== 'playing' && replayState !== 'paused') {
+            clearInterval(replayTimer);
+            replayTimer = null;
+            return;
+        }
+        if (socket) {
+            socket.emit('replay', {});
+        } else {
+            const res = await fetch('/replay');
+            renderReplay(await res.json());
+        }
+    }, 500);
+}
+
+async function sendReplay(params) {
+    if (socket) {
+        socket.emit('replay', params);
+        // The reply updates replayState before the first watch tick.
+        watchReplay();
+        return;
+    }
+    const url = new URL('/replay', window.location.origin);
+    Object.entries(params).forEach(([k, v]) => url.searchParams.set(k, v));
+    const res = await fetch(url.toString());
+    renderReplay(await res.json());
+    watchReplay();
+}
+
+function renderLatency(stats) {
+    if (!stats || !stats.stages) return;
+    const rows = LATENCY_STAGES.map(([key, label]) => {
+        const s = stats.stages[key];
+        const value = s && s.count ? `${s.p50_ms.toFixed(1)} / ${s.p99_ms.toFixed(1)}` : '-';
+        return `<div>${label}: <span>${value}</span></div>`;
+    });
+    rows.push(`<div>Total: <span>${stats.total_p50_ms.toFixed(1)} / ${stats.total_p99_ms.toFixed(1)}</span></div>`);
+    latencyEl.innerHTML = rows.join('');
+}
+
+async function pollLatency() {
+    const res = await fetch('/latency');
+    renderLatency(await res.json());
+}
+
+function renderQuality(q) {
+    if (!q) return;
+    const fmt = (v, digits) => (v === null || v === undefined ? '-' : v.toFixed(digits));
+    qualityEl.innerHTML = [
+        `<div>RMS error: <span>${fmt(q.rms_error_deg, 2)}</span> deg</div>`,
+        `<div>Saturation: <span>${fmt(q.saturation * 100, 1)}</span> %</div>`,
+        `<div>Oscillation: <span>${fmt(q.dominant_hz, 2)}</span> Hz (${fmt(q.dominant_amp_deg, 2)} deg)</div>`,
+        `<div>Overshoot: <span>${fmt(q.overshoot_deg, 2)}</span> deg</div>`,
+        `<div>Settling: <span>${q.settled === false ? 'no' : fmt(q.settling_s, 2)}</span> s</div>`,
+    ].join('');
+}
+
+async function pollQuality() {
+    // The brick pushes `quality` over the socket; poll only without one.
+    if (socket && socket.connected) return;
+    const res = await fetch('/quality');
+    renderQuality(await res.json());
+}
+
+function reportRenderLatency(seq, receivedAt) {
+    // Echo a sampled seq after the frame is painted; the brick derives
+    // socket and render latency from it (see latency.py).
+    if (!socket || !seq || receivedAt - lastLatencyReport < LATENCY_REPORT_MS) return;
+    lastLatencyReport = receivedAt;
+    requestAnimationFrame(() => {
+        socket.emit('latency_report', { seq, render_ms: performance.now() - receivedAt });
+    });
+}
+
+async function pollAutotune() {
+    const res = await fetch('/autotune');
+    const st = await res.json();
+    renderAutotune(st);
+    if (st.state !== 'running' && autotuneTimer) {
+        clearInterval(autotuneTimer);
+        autotuneTimer = null;
+    }
+}
+
 function updateTelemetry(t) {
     lastTelemetry = t;
     angleEl.textContent = t.angle_deg.toFixed(2);
@@ -311,11 +590,88 @@ function updateTelemetry(t) {
     encEl.textContent = `${t.encoders.left}/${t.encoders.right}`;
     modeEl.textContent = t.mode;
     imuEl.textContent = t.imu_model;
+    sampleAgeEl.textContent = (t.sample_age_ms || 0).toFixed(1);
+    controlHzEl.textContent = t.control_hz ? String(t.control_hz) : '-';
+
+    pushAngle(t.seq || 0, t.angle_deg);
+    scheduleRender();
+}
 
-    angleHistory.push(t.angle_deg);
-    if (angleHistory.length > MAX_POINTS) angleHistory.shift();
-    drawChart();
-    drawWireframe(t.angle_deg);
+function applyTelemetryBatch(batch) {
+    // Samples the publisher coalesced since its previous push (publish_batch).
+    if (!batch || !batch.angle_deg) return;
+    const seqs = batch.seq || [];
+    for (let i = 0; i < batch.angle_deg.length; i++) {
+        pushAngle(seqs[i] || 0, batch.angle_deg[i]);
+    }
+    scheduleRender();
+}
+
+function decodeTelemetryPacket(buffer) {
+    // Mirrors python/arduino/app_bricks/balancing_robot/wire.py
+    const view = new DataView(buffer);
+    if (view.getUint8(0) !== 0x42 || view.getUint8(1) !== 0x54 || view.getUint8(2) !== 1) {
+        throw new Error('unknown telemetry packet');
+    }
+    const flags = view.getUint8(3);
+    const count = view.getUint16(4, true);
+    let offset = 6;
+    let staticFields = null;
+    if (flags & 0x01) {
+        const len = view.getUint16(offset, true);
+        offset += 2;
+        staticFields = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, offset, len)));
+        offset += len;
+    }
+    const frames = [];
+    for (let i = 0; i < count; i++, offset += WIRE_FRAME_SIZE) {
+        frames.push({
+            seq: view.getUint32(offset, true),
+            ts: view.getFloat64(offset + 4, true),
+            angle_deg: view.getFloat32(offset + 12, true),
+            gyro_dps: view.getFloat32(offset + 16, true),
+            accel_g: view.getFloat32(offset + 20, true),
+            motor_pwm: { left: view.getInt16(offset + 24, true), right: view.getInt16(offset + 26, true) },
+            encoders: { left: view.getInt32(offset + 28, true), right: view.getInt32(offset + 32, true) }
+        });
+    }
+    return { staticFields, frames };
+}
+
+function applyTelemetryPacket(buffer) {
+    const packet = decodeTelemetryPacket(buffer);
+    if (packet.staticFields) {
+        wireStatic = packet.staticFields;
+    }
+    const frames = packet.frames;
+    if (!wireStatic || frames.length === 0) {
+        return;
+    }
+    for (let i = 0; i < frames.length - 1; i++) {
+        pushAngle(frames[i].seq, frames[i].angle_deg);
+    }
+    const last = frames[frames.length - 1];
+    wireSeq = last.seq;
+    updateTelemetry({ ...wireStatic, ...last });
+}
+
+function base64ToBuffer(text) {
+    const raw = atob(text);
+    const bytes = new Uint8Array(raw.length);
+    for (let i = 0; i < raw.length; i++) {
+        bytes[i] = raw.charCodeAt(i);
+    }
+    return bytes.buffer;
+}
+
+async function fetchStatusBinOnce() {
+    const crc = wireCrc === null ? '' : `&crc=${wireCrc}`;
+    const res = await fetch(`/status_bin?since=${wireSeq}${crc}`);
+    const data = await res.json();
+    if (data && data.data) {
+        wireCrc = data.crc;
+        applyTelemetryPacket(base64ToBuffer(data.data));
+    }
 }
 
 async function fetchStatusOnce() {
@@ -327,6 +683,75 @@ async function fetchStatusOnce() {
     if (data && data.telemetry) {
         updateTelemetry(data.telemetry);
     }
+    if (data && data.recorder) {
+        renderRecorder(data.recorder);
+    }
+    if (data && data.replay) {
+        renderReplay(data.replay);
+    }
+}
+
+async function longPollStatus() {
+    const crc = statusCrc === null ? '' : `&crc=${statusCrc}`;
+    const res = await fetch(`/status?since=${statusSeq}&timeout=10${crc}`);
+    const data = await res.json();
+    if (!data) {
+        return;
+    }
+    if (data.config) {
+        applyConfig(data.config);
+    }
+    if (data.config_crc !== undefined) {
+        statusCrc = data.config_crc;
+    }
+    applyTelemetryBatch(data.frames);
+    if (data.telemetry && data.seq !== statusSeq) {
+        updateTelemetry(data.telemetry);
+    }
+    statusSeq = data.seq || 0;
+    if (data.recorder) {
+        renderRecorder(data.recorder);
+    }
+    if (data.replay) {
+        renderReplay(data.replay);
+    }
+}
+
+async function runLongPoll() {
+    while (longPollActive) {
+        const started = performance.now();
+        try {
+            await longPollStatus();
+        } catch (err) {
+            setStatus(`Polling error: ${err.message}`, true);
+            await new Promise((resolve) => setTimeout(resolve, 1000));
+        }
+        const wait = LONG_POLL_MIN_INTERVAL_MS - (performance.now() - started);
+        if (wait > 0) {
+            await new Promise((resolve) => setTimeout(resolve, wait));
+        }
+    }
+}
+
+async function fetchHistoryOnce() {
+    // Seed the chart from the brick's history so reloads keep recent context.
+    // The brick stores samples at the loop rate (at most 200 Hz).
+    const rate = Math.min(200, parseInt(pidHz.value, 10) || 50);
+    const seconds = HISTORY_CAPACITY / rate;
+    const res = await fetch(`/history?seconds=${seconds}&points=${HISTORY_CAPACITY}&fields=angle_deg`);
+    const data = await res.json();
+    if (!data || !data.fields || !data.fields.angle_deg) {
+        return;
+    }
+    const mins = data.fields.angle_deg.min;
+    const maxs = data.fields.angle_deg.max;
+    const newest = ringLastSeq;
+    clearAngles();
+    for (let i = 0; i < mins.length; i++) {
+        pushAngle(0, (mins[i] + maxs[i]) / 2);
+    }
+    ringLastSeq = Math.max(newest, data.seq || 0);
+    scheduleRender();
 }
 
 async function sendHttp(path, params) {
@@ -340,11 +765,16 @@ async function sendHttp(path, params) {
 }
 
 function startPolling() {
-    if (pollTimer) return;
+    if (pollTimer || longPollActive) return;
     setStatus('Connected (polling)');
+    if (!WIRE_BINARY) {
+        longPollActive = true;
+        runLongPoll();
+        return;
+    }
     pollTimer = setInterval(async () => {
         try {
-            await fetchStatusOnce();
+            await fetchStatusBinOnce();
         } catch (err) {
             setStatus(`Polling error: ${err.message}`, true);
         }
@@ -352,6 +782,7 @@ function startPolling() {
 }
 
 function stopPolling() {
+    longPollActive = false;
     if (pollTimer) {
         clearInterval(pollTimer);
         pollTimer = null;
@@ -371,6 +802,9 @@ function initSocket() {
         stopPolling();
         setStatus('Connected');
         socket.emit('get_initial_state', {});
+        if (WIRE_BINARY) {
+            socket.emit('set_wire_format', { format: 'binary' });
+        }
     });
 
     socket.on('disconnect', () => {
@@ -387,8 +821,44 @@ function initSocket() {
         applyConfig(cfg);
     });
 
+    // JSON telemetry is broadcast to every client; once binary packets
+    // arrive they carry the same samples, so the JSON copies are ignored.
+    socket.on('telemetry_batch', (batch) => {
+        if (WIRE_BINARY && wireSeq) return;
+        applyTelemetryBatch(batch);
+    });
+
     socket.on('telemetry', (t) => {
+        if (WIRE_BINARY && wireSeq) return;
+        const receivedAt = performance.now();
         updateTelemetry(t);
+        reportRenderLatency(t.seq, receivedAt);
+    });
+
+    socket.on('quality', (q) => {
+        renderQuality(q);
+    });
+
+    socket.on('autotune', (st) => {
+        renderAutotune(st);
+    });
+
+    socket.on('recorder', (st) => {
+        renderRecorder(st);
+    });
+
+    socket.on('replay', (st) => {
+        renderReplay(st);
+    });
+
+    socket.on('telemetry_bin', (buffer) => {
+        try {
+            const receivedAt = performance.now();
+            applyTelemetryPacket(buffer);
+            reportRenderLatency(wireSeq, receivedAt);
+        } catch (err) {
+            setStatus(`Telemetry decode error: ${err.message}`, true);
+        }
     });
 }
 
@@ -429,6 +899,76 @@ pidHzApply.addEventListener('click', async () => {
     }
 });
 
+telemetryHzApply.addEventListener('click', async () => {
+    const payload = { telemetry_hz: parseInt(telemetryHz.value, 10) };
+    if (socket) {
+        socket.emit('set_telemetry_hz', payload);
+    } else {
+        await sendHttp('/set_telemetry_hz', payload);
+    }
+});
+
+autotuneStart.addEventListener('click', async () => {
+    const payload = { action: 'start' };
+    if (socket) {
+        socket.emit('autotune', payload);
+    } else {
+        await sendHttp('/autotune', payload);
+        if (!autotuneTimer) {
+            autotuneTimer = setInterval(() => pollAutotune().catch(() => {}), 500);
+        }
+    }
+});
+
+autotuneApply.addEventListener('click', async () => {
+    const payload = { action: 'apply' };
+    if (socket) {
+        socket.emit('autotune', payload);
+    } else {
+        await sendHttp('/autotune', payload);
+        await fetchStatusOnce();
+    }
+});
+
+recordStart.addEventListener('click', async () => {
+    if (socket) {
+        socket.emit('recorder', { action: 'start' });
+    } else {
+        await sendRecorder('/record_start');
+    }
+});
+
+recordStop.addEventListener('click', async () => {
+    if (socket) {
+        socket.emit('recorder', { action: 'stop' });
+    } else {
+        await sendRecorder('/record_stop');
+    }
+});
+
+replayStart.addEventListener('click', async () => {
+    if (!replayPath.value) return;
+    await sendReplay({ action: 'start', path: replayPath.value, speed: parseFloat(replaySpeed.value) || 1 });
+});
+
+replayPause.addEventListener('click', async () => {
+    await sendReplay({ action: replayState === 'paused' ? 'resume' : 'pause' });
+});
+
+replayStop.addEventListener('click', async () => {
+    await sendReplay({ action: 'stop' });
+});
+
+replaySpeed.addEventListener('change', async () => {
+    if (replayState === 'playing' || replayState === 'paused') {
+        await sendReplay({ action: 'speed', speed: parseFloat(replaySpeed.value) || 1 });
+    }
+});
+
+replaySeek.addEventListener('change', async () => {
+    await sendReplay({ action: 'seek', position: parseFloat(replaySeek.value) });
+});
+
 setpointApply.addEventListener('click', async () => {
     const payload = { setpoint: parseFloat(setpointEl.value) };
     if (socket) {
@@ -562,5 +1102,7 @@ motorTestStop.addEventListener('click', async () => {
 });
 
 setStatus('Connecting...');
-fetchStatusOnce().catch(() => {});
+fetchStatusOnce().then(fetchHistoryOnce).catch(() => {});
+setInterval(() => pollLatency().catch(() => {}), 2000);
+setInterval(() => pollQuality().catch(() => {}), 2000);
 initSocket();
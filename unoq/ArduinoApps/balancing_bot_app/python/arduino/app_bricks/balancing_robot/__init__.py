@@ -1,17 +1,63 @@
 """Balancing robot brick API + simulation."""
 
+import base64
 import math
+import os
 import random
+import struct
 import threading
 import time
+from pathlib import Path
 from typing import Any, Dict, Optional, Callable
 
+from .autotune import AutoTuner
+from .commands import BridgeCommandQueue
+from .config import BridgeConfig, ConfigSnapshot
+from . import export
+from .history import TelemetryHistory, np
+from .host import RobotHost
+from .analytics import ControlQuality
+from .fusion import DEFAULT_FUSION, FILTERS, ImuFusion
+from .latency import LatencyTracer
+from . import metrics
+from .protocol import decode_imu_raw_batch, decode_telemetry_batch, is_retransmit, mcu_ms_age
+from .publisher import TelemetryPublisher
+from .recorder import TelemetryRecorder
+from .replay import TelemetryReplayer, list_sessions, open_source
+from .scheduler import DeadlineScheduler
+from .sim import live_step
+from .telemetry import HardwareSample, TelemetryBuffer
+from . import wire
+
+# Upper bound for /status long polls, below typical proxy idle timeouts.
+LONG_POLL_MAX_S = 25.0
+# pid_hz drives the MCU PID in real mode (the sketch clamps it to 50-500 Hz);
+# the Python loop, and the history sized for it, stop at MAX_LOOP_HZ.
+MAX_PID_HZ = 500
+MAX_LOOP_HZ = 200
+# Raw IMU samples kept for /imu_raw: 30 s at the maximum MCU PID rate.
+IMU_RAW_SECONDS = 30
+
 
 class BalancingRobot:
-    def __init__(self, imu_model: str = "mpu6050", simulated: bool = True, update_hz: int = 50):
+    def __init__(
+        self,
+        imu_model: str = "mpu6050",
+        simulated: bool = True,
+        update_hz: int = 50,
+        schedule_policy: str = "skip",
+        history_seconds: int = 300,
+        publish_hz: float = 30.0,
+        publish_batch: bool = False,
+        record_dir: Optional[str] = None,
+        record_budget_mb: int = 256,
+        telemetry_hz: int = 200,
+        seed: Optional[int] = None,
+    ):
         self.imu_model = imu_model
         self.simulated = simulated
         self.update_hz = update_hz
+        self.telemetry_hz = telemetry_hz
         self.axis_mode = "pitch"
         self.axis_sign = 1
         self._sim_angle = 12.0
@@ -19,30 +65,87 @@ class BalancingRobot:
         self._kick_wave_t = 0.0
         self._kick_wave_strength = 0.0
         self._kick_wave_sign = 1.0
+        # Simulator noise; RobotHost draws from it too, so both paths agree.
+        self._noise = random.Random(seed)
+        self._accel = 0.0
+        self._enc_l = 0
+        self._enc_r = 0
+        self._pid_out = 0.0
         self.motor_invert = {"left": 1, "right": 1}
         self.encoder_invert = {"left": 1, "right": 1}
+        self.raw_imu = False
+        self.fusion = dict(DEFAULT_FUSION)
 
         self.pid = {"p": 12.0, "i": 0.0, "d": 0.4}
         self.setpoint = 0.0
         self._integral = 0.0
         self._last_error = 0.0
+        # Config changes go through _update_config(), which swaps in a new
+        # immutable snapshot; readers (including the loop) use self._config.
+        self._config_lock = threading.Lock()
+        self._config = ConfigSnapshot(1, self._config_dict())
 
-        self._telemetry: Dict[str, Any] = {
-            "ts": 0.0,
-            "angle_deg": 0.0,
-            "gyro_dps": 0.0,
-            "accel_g": 0.0,
-            "pid": self.pid.copy(),
-            "setpoint": self.setpoint,
-            "motor_pwm": {"left": 0, "right": 0},
-            "encoders": {"left": 0, "right": 0},
-            "mode": "sim" if self.simulated else "real",
-            "imu_model": self.imu_model,
-        }
+        self._frames = TelemetryBuffer("sim" if self.simulated else "real", self.imu_model)
+        self._seq = 0
+        # Bridge, replay and loop threads all number samples; seq allocation,
+        # the history/recorder write and the replay check share this lock so
+        # the history keeps a single writer at a time, in seq order.
+        self._seq_lock = threading.Lock()
+
+        # Full-rate history sized for the maximum loop rate (200 Hz).
+        self._history: Optional[TelemetryHistory] = None
+        if np is not None and history_seconds > 0:
+            self._history = TelemetryHistory(int(history_seconds) * 200)
+        self._history_ts = 0.0
+        # Session recorder; idle until start_recording().
+        self._recorder = TelemetryRecorder(
+            record_dir or os.path.join(os.getcwd(), "recordings"),
+            budget_bytes=int(record_budget_mb) * 1024 * 1024,
+        )
+        # Replayed samples enter through the same path as bridge telemetry.
+        self._replayer = TelemetryReplayer(
+            self._on_replay_sample,
+            self._on_replay_config,
+            lambda status: self._publish("replay", status),
+        )
+        self._replay_pid = self.pid.copy()
+        self._replay_setpoint = 0.0
+
+        self._latency = LatencyTracer()
+        self._metrics = metrics.LoopMetrics()
+        # Control-quality metrics, updated by the loop in _emit().
+        self._quality = ControlQuality()
+        # Raw IMU ring and fusion; allocated on the first raw batch.
+        self._imu: Optional[ImuFusion] = None
+        self._imu_last_us = -1
+        self._hw_consumed = 0
+        # Set by every new bridge/replay sample; wakes the real-mode loop.
+        self._hw_ready = threading.Event()
+        self._hw_last_mcu_ms: Optional[int] = None
+        # Control rate the sketch reports in v3 batch headers.
+        self._mcu_control_hz = 0
+        self._mcu_control_max_us = 0
+        # /status long polls; the loop only notifies when someone is waiting.
+        self._frame_cond = threading.Condition()
+        self._frame_waiters = 0
+
+        # WebUI pushes happen on the publisher thread, never in _run_loop.
+        self._publisher = TelemetryPublisher(
+            self._frames,
+            self._publish,
+            publish_hz,
+            self._history,
+            publish_batch,
+            tracer=self._latency,
+            quality=self._quality.snapshot,
+        )
 
         self._ui = None
+        self._prefix = ""
         self._thread: Optional[threading.Thread] = None
         self._stop = threading.Event()
+        self._autotuner = AutoTuner(on_progress=lambda status: self._publish("autotune", status))
+        self._scheduler = DeadlineScheduler(max(1, int(update_hz)), policy=schedule_policy)
 
         # Optional hooks for real hardware integration.
         self._sensor_provider: Optional[Callable[[], Dict[str, Any]]] = None
@@ -52,24 +155,41 @@ class BalancingRobot:
         self._bridge = None
         self._bridge_ready = False
         self._hw_lock = threading.Lock()
-        self._latest_hw: Dict[str, Any] = {}
+        # Outbound notifies go through a worker so handlers never block on the bridge.
+        self._commands = BridgeCommandQueue(self._send_bridge, self._ensure_bridge_ready)
+        # MCU config is pushed as one versioned apply_config; the sketch acks the version.
+        self._bridge_config = BridgeConfig()
+        self._bridge_config.update(**self._config_fields())
+        self._latest_hw = HardwareSample()
 
-    def attach_webui(self, ui) -> None:
+    def attach_webui(self, ui, prefix: str = "") -> None:
+        """Register WebUI handlers; ``prefix`` namespaces every message name."""
         self._ui = ui
-        ui.on_connect(lambda sid: self._send_config(sid))
-        ui.on_message("get_initial_state", self._on_get_initial_state)
-        ui.on_message("set_pid", self._on_set_pid)
-        ui.on_message("set_pid_hz", self._on_set_pid_hz)
-        ui.on_message("set_setpoint", self._on_set_setpoint)
-        ui.on_message("set_imu_model", self._on_set_imu_model)
-        ui.on_message("set_axis_mode", self._on_set_axis_mode)
-        ui.on_message("set_axis_sign", self._on_set_axis_sign)
-        ui.on_message("set_motor_invert", self._on_set_motor_invert)
-        ui.on_message("set_encoder_invert", self._on_set_encoder_invert)
-        ui.on_message("motor_test", self._on_motor_test)
-        ui.on_message("stop_motor_test", self._on_stop_motor_test)
-        ui.on_message("set_mode", self._on_set_mode)
-        ui.on_message("kick", self._on_kick)
+        self._prefix = prefix
+        ui.on_connect(self._on_connect)
+        if hasattr(ui, "on_disconnect"):
+            ui.on_disconnect(self._publisher.drop_client)
+        ui.on_message(prefix + "get_initial_state", self._on_get_initial_state)
+        ui.on_message(prefix + "set_pid", self._on_set_pid)
+        ui.on_message(prefix + "set_pid_hz", self._on_set_pid_hz)
+        ui.on_message(prefix + "set_telemetry_hz", self._on_set_telemetry_hz)
+        ui.on_message(prefix + "set_setpoint", self._on_set_setpoint)
+        ui.on_message(prefix + "set_imu_model", self._on_set_imu_model)
+        ui.on_message(prefix + "set_axis_mode", self._on_set_axis_mode)
+        ui.on_message(prefix + "set_axis_sign", self._on_set_axis_sign)
+        ui.on_message(prefix + "set_motor_invert", self._on_set_motor_invert)
+        ui.on_message(prefix + "set_encoder_invert", self._on_set_encoder_invert)
+        ui.on_message(prefix + "set_raw_imu", self._on_set_raw_imu)
+        ui.on_message(prefix + "set_fusion", self._on_set_fusion)
+        ui.on_message(prefix + "motor_test", self._on_motor_test)
+        ui.on_message(prefix + "stop_motor_test", self._on_stop_motor_test)
+        ui.on_message(prefix + "set_mode", self._on_set_mode)
+        ui.on_message(prefix + "kick", self._on_kick)
+        ui.on_message(prefix + "set_wire_format", self._on_set_wire_format)
+        ui.on_message(prefix + "autotune", self._on_autotune)
+        ui.on_message(prefix + "recorder", self._on_recorder)
+        ui.on_message(prefix + "replay", self._on_replay)
+        ui.on_message(prefix + "latency_report", self._on_latency_report)
 
     def attach_bridge(self, bridge) -> None:
         self._bridge = bridge
@@ -77,7 +197,16 @@ class BalancingRobot:
             bridge.provide("record_telemetry", self.record_telemetry)
         except RuntimeError:
             pass
+        try:
+            bridge.provide("record_telemetry_batch", self.record_telemetry_batch)
+        except RuntimeError:
+            pass
+        try:
+            bridge.provide("record_imu_raw_batch", self.record_imu_raw_batch)
+        except RuntimeError:
+            pass
         self._ensure_bridge_ready()
+        self._commands.start()
 
     def set_sensor_provider(self, fn: Callable[[], Dict[str, Any]]) -> None:
         """Provide a callable that returns sensor telemetry for real mode."""
@@ -93,28 +222,269 @@ class BalancingRobot:
         self._stop.clear()
         self._thread = threading.Thread(target=self._run_loop, daemon=True)
         self._thread.start()
+        self._publisher.start()
+        if self._bridge:
+            self._commands.start()
 
     def stop(self) -> None:
         self._stop.set()
+        self._hw_ready.set()
+        with self._frame_cond:
+            self._frame_cond.notify_all()
+        self._publisher.stop()
+        self._commands.stop()
+        self._recorder.stop()
+        self._replayer.stop()
         if self._thread:
             self._thread.join(timeout=2.0)
 
+    def set_publish_rate(self, hz: float, batch: Optional[bool] = None) -> None:
+        """Set the WebUI telemetry push rate and optional skipped-sample batches."""
+        self._publisher.set_rate(hz, batch)
+
+    def set_wire_format(self, wire_format: str, client=None) -> None:
+        """Select the WebUI telemetry encoding for ``client`` (all clients if None)."""
+        self._publisher.set_wire_format(wire_format, client)
+
+    def autotune(
+        self,
+        samples: int = 2000,
+        rounds: int = 3,
+        duration_s: float = 15.0,
+        bounds: Optional[Dict[str, Any]] = None,
+        seed: int = 0,
+    ) -> Dict[str, Any]:
+        """Start a background PID search against the batch simulator.
+
+        Runs on a process pool; progress is pushed as ``autotune`` WebUI
+        messages and is available from ``autotune_status()``.
+        """
+        self._autotuner.start(
+            bounds=bounds,
+            samples=samples,
+            rounds=rounds,
+            duration_s=duration_s,
+            seed=seed,
+            dt=1.0 / max(1, int(self.update_hz)),
+            setpoint=self.setpoint,
+            kick_at=duration_s / 2.0,
+        )
+        return self._autotuner.status()
+
+    def autotune_status(self) -> Dict[str, Any]:
+        return self._autotuner.status()
+
+    def cancel_autotune(self) -> Dict[str, Any]:
+        self._autotuner.cancel()
+        return self._autotuner.status()
+
+    def apply_autotune(self) -> Dict[str, Any]:
+        """Apply the best gains found so far, like a set_pid call."""
+        best = self._autotuner.best()
+        if best:
+            self._on_set_pid(None, {"p": best["p"], "i": best["i"], "d": best["d"]})
+        return self._autotuner.status()
+
+    def start_recording(self, session: Optional[str] = None) -> Dict[str, Any]:
+        """Start writing telemetry and config changes to rotating segment files."""
+        try:
+            started = self._recorder.start(session)
+        except ValueError as exc:
+            return dict(self._recorder.status(), error=str(exc))
+        if started:
+            self._recorder.record_config(self._config_snapshot(), self._bridge_config.version)
+        return self._recorder.status()
+
+    def stop_recording(self) -> Dict[str, Any]:
+        self._recorder.stop()
+        return self._recorder.status()
+
+    def recording_status(self) -> Dict[str, Any]:
+        return self._recorder.status()
+
+    def start_replay(
+        self,
+        path: str,
+        speed: float = 1.0,
+        start_s: float = 0.0,
+        loop: bool = False,
+    ) -> Dict[str, Any]:
+        """Replay a recorded session (name, segment or CSV file name) as live telemetry.
+
+        While replaying, bridge samples and the simulator are ignored, motors
+        are not driven, and frames report mode ``"replay"``.
+        """
+        try:
+            source = self._open_recording(path)
+        except (OSError, ValueError) as exc:
+            return dict(self._replayer.status(), error=str(exc))
+        self._replay_pid = self.pid.copy()
+        self._replay_setpoint = self.setpoint
+        # Stop any running replay first: its thread may be waiting on _seq_lock.
+        self._replayer.stop()
+        with self._seq_lock:
+            # Bridge callbacks check active under the same lock, so none can
+            # append a live sample after the first replayed one.
+            self._replayer.start(source, str(path), speed, start_s, loop)
+        return self._replayer.status()
+
+    def _open_recording(self, name: str):
+        """Open a session name, segment file or CSV; only names inside the record dir."""
+        return open_source(name, self._recorder.directory)
+
+    def stop_replay(self) -> Dict[str, Any]:
+        self._replayer.stop()
+        return self._replayer.status()
+
+    def pause_replay(self) -> Dict[str, Any]:
+        self._replayer.pause()
+        return self._replayer.status()
+
+    def resume_replay(self) -> Dict[str, Any]:
+        self._replayer.resume()
+        return self._replayer.status()
+
+    def seek_replay(self, seconds: float) -> Dict[str, Any]:
+        """Jump to ``seconds`` from the start of the replayed session."""
+        self._replayer.seek(seconds)
+        return self._replayer.status()
+
+    def set_replay_speed(self, speed: float) -> Dict[str, Any]:
+        self._replayer.set_speed(speed)
+        return self._replayer.status()
+
+    def replay_status(self) -> Dict[str, Any]:
+        return self._replayer.status()
+
+    def list_recordings(self):
+        return list_sessions(self._recorder.directory)
+
+    def latency_stats(self) -> Dict[str, Any]:
+        """Per-stage latency histograms (see latency.py for the stages)."""
+        return self._latency.stats()
+
+    def metrics_text(self) -> str:
+        """Counters and loop/bridge/WebUI stats in Prometheus text format."""
+        return metrics.render(
+            self._metrics,
+            self._scheduler.stats(),
+            self._commands.stats(),
+            self._publisher.stats(),
+            "real" if not self.simulated else "sim",
+            self.mcu_stats(),
+            self._quality.snapshot(),
+        )
+
+    def reset_latency(self) -> Dict[str, Any]:
+        self._latency.reset()
+        return self._latency.stats()
+
+    def quality_stats(self) -> Dict[str, Any]:
+        """Rolling control-quality metrics (see analytics.py)."""
+        return self._quality.snapshot()
+
+    def reset_quality(self) -> Dict[str, Any]:
+        self._quality.reset()
+        return self._quality.snapshot()
+
+    def _config_snapshot(self) -> Dict[str, Any]:
+        return self._config.data
+
+    def _config_dict(self) -> Dict[str, Any]:
+        return {
+            "imu_model": self.imu_model,
+            "pid": self.pid.copy(),
+            "pid_hz": self.update_hz,
+            "telemetry_hz": self.telemetry_hz,
+            "setpoint": self.setpoint,
+            "mode": "real" if not self.simulated else "sim",
+            "axis_mode": self.axis_mode,
+            "axis_sign": self.axis_sign,
+            "motor_invert": self.motor_invert.copy(),
+            "encoder_invert": self.encoder_invert.copy(),
+            "raw_imu": self.raw_imu,
+            "fusion": self.fusion.copy(),
+        }
+
     def get_state(self) -> Dict[str, Any]:
         return {
-            "config": {
-                "imu_model": self.imu_model,
-                "pid": self.pid.copy(),
-                "pid_hz": self.update_hz,
-                "setpoint": self.setpoint,
-                "mode": "real" if not self.simulated else "sim",
-                "axis_mode": self.axis_mode,
-                "axis_sign": self.axis_sign,
-                "motor_invert": self.motor_invert.copy(),
-                "encoder_invert": self.encoder_invert.copy(),
-            },
-            "telemetry": self._telemetry,
+            "config": self._config_snapshot(),
+            "telemetry": self._frames.snapshot(),
+            "timing": self._scheduler.stats(),
+            "publisher": self._publisher.stats(),
+            "bridge": dict(self._commands.stats(), config=self._bridge_config.stats(), mcu=self.mcu_stats()),
+            "recorder": self._recorder.status(),
+            "replay": self._replayer.status(),
+            "quality": self._quality.snapshot(),
+            "imu": self.imu_stats(),
         }
 
+    def mcu_stats(self) -> Dict[str, Any]:
+        """Control rate the sketch reported in its last v3 batch header."""
+        return {"control_hz": self._mcu_control_hz, "control_max_us": self._mcu_control_max_us}
+
+    def wait_for_frame(self, since: int, timeout: float) -> bool:
+        """Block until the latest frame's seq differs from ``since``."""
+        with self._frame_cond:
+            self._frame_waiters += 1
+            try:
+                return self._frame_cond.wait_for(
+                    lambda: self._frames.latest().seq != since or self._stop.is_set(), timeout
+                )
+            finally:
+                self._frame_waiters -= 1
+
+    def history(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        max_points: int = 500,
+        fields=None,
+    ) -> Dict[str, Any]:
+        """Query recorded telemetry between wall-clock ``start`` and ``end``.
+
+        Long ranges are downsampled to ``max_points`` min/max buckets.
+        """
+        if self._history is None:
+            return {"error": "history unavailable (numpy not installed)"}
+        return self._history.query(start, end, max_points, fields)
+
+    def export_telemetry(
+        self,
+        source: Optional[str] = None,
+        fmt: str = "csv",
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        fields=None,
+        rows: int = export.CHUNK_ROWS,
+        seconds: Optional[float] = None,
+    ):
+        """Encoded chunks of raw telemetry rows between ``start`` and ``end``.
+
+        ``source`` names a recording in the record dir (session, segment file
+        or CSV; paths outside it raise ValueError); the live history is used
+        when it is empty. ``seconds`` selects the last N
+        seconds of the source when ``start`` is not given. Nothing is read
+        until the returned iterator is consumed.
+        """
+        if np is None:
+            raise ValueError("export unavailable (numpy not installed)")
+        if fmt not in export.FORMATS:
+            raise ValueError(f"unknown export format {fmt!r}")
+        names = export.export_fields(fields)
+        if not source:
+            if self._history is None:
+                raise ValueError("history unavailable")
+            if seconds is not None and start is None:
+                start = (end if end is not None else time.time()) - seconds
+            blocks = export.history_blocks(self._history, start, end, names, rows)
+        else:
+            recording = self._open_recording(source)
+            if seconds is not None and start is None:
+                start = (end if end is not None else recording.last_ts) - seconds
+            blocks = export.source_blocks(recording, start, end, names, rows)
+        return export.encode(blocks, names, fmt)
+
     def record_telemetry(
         self,
         angle_deg: float,
@@ -126,67 +496,367 @@ class BalancingRobot:
         mode: str,
         imu_model: str,
     ) -> None:
-        with self._hw_lock:
-            self._latest_hw = {
-                "angle_deg": float(angle_deg),
-                "gyro_dps": float(gyro_dps),
-                "accel_g": float(accel_g),
-                "motor_pwm": {"left": int(pwm), "right": int(pwm)},
-                "encoders": {"left": int(enc_left), "right": int(enc_right)},
-                "mode": str(mode),
-                "imu_model": str(imu_model),
-            }
+        angle_deg = float(angle_deg)
+        gyro_dps = float(gyro_dps)
+        accel_g = float(accel_g)
+        pwm = int(pwm)
+        enc_left = int(enc_left)
+        enc_right = int(enc_right)
+        received = time.monotonic()
+        with self._seq_lock:
+            if self._replayer.active:
+                return
+            self._metrics.ingest_samples += 1
+            self._metrics.ingest_batches += 1
+            ts = time.time()
+            # In sim mode the loop owns seq/history; bridge samples are display-only
+            # and keep seq 0, so the loop never consumes them after a mode switch.
+            seq = 0
+            if not self.simulated:
+                self._seq += 1
+                seq = self._seq
+                if self._history is not None:
+                    self._history.append(
+                        seq, ts, angle_deg, gyro_dps, accel_g, pwm, enc_left, enc_right, self.setpoint
+                    )
+                    self._history_ts = ts
+                self._recorder.record(
+                    seq, ts, angle_deg, gyro_dps, accel_g, pwm, enc_left, enc_right, self.setpoint, True
+                )
+            hw = self._latest_hw
+            with self._hw_lock:
+                hw.seq = seq
+                hw.angle_deg = angle_deg
+                hw.gyro_dps = gyro_dps
+                hw.accel_g = accel_g
+                hw.pwm = pwm
+                hw.enc_left = enc_left
+                hw.enc_right = enc_right
+                hw.mode = str(mode)
+                hw.imu_model = str(imu_model)
+                hw.received = received
+                hw.valid = True
+        self._hw_ready.set()
         self._bridge_ready = True
 
+    def record_telemetry_batch(self, payload) -> None:
+        """Bridge callback: ingest a packed batch of MCU samples (see protocol.py).
+
+        The batch omits mode/model strings; samples carry MCU ``millis()``
+        timestamps, which are mapped onto wall-clock time relative to arrival.
+        """
+        received = time.monotonic()
+        try:
+            samples, header = decode_telemetry_batch(payload)
+        except (ValueError, TypeError, struct.error):
+            return
+        if header.config_version is not None:
+            self._on_config_ack(header.config_version)
+        if header.control_hz is not None:
+            self._mcu_control_hz = header.control_hz
+            self._mcu_control_max_us = header.control_max_us
+        n = len(samples)
+        if n == 0:
+            return
+        with self._seq_lock:
+            if self._replayer.active:
+                return
+            last_ms = int(samples["mcu_ms"][-1]) if np is not None else samples[-1][0]
+            if is_retransmit(last_ms, self._hw_last_mcu_ms):
+                # Ends at or just before the newest batch: a retransmit.
+                self._metrics.duplicate_samples += n
+                return
+            self._hw_last_mcu_ms = last_ms
+            self._metrics.ingest_samples += n
+            self._metrics.ingest_batches += 1
+            now = time.time()
+            seq = 0
+            if np is not None:
+                if not self.simulated:
+                    first_seq = self._seq + 1
+                    self._seq += n
+                    ts = now - mcu_ms_age(last_ms, samples["mcu_ms"]) / 1000.0
+                    # Arrival jitter must not move samples before ones already stored.
+                    np.maximum(ts, self._history_ts, out=ts)
+                    self._history_ts = float(ts[-1])
+                    self._recorder.record_batch(first_seq, ts, samples, self.setpoint, True)
+                    if self._history is not None:
+                        columns = np.empty((7, n), dtype=np.float32)
+                        columns[0] = samples["angle_deg"]
+                        columns[1] = samples["gyro_dps"]
+                        columns[2] = samples["accel_g"]
+                        columns[3] = samples["pwm"]
+                        columns[4] = samples["enc_left"]
+                        columns[5] = samples["enc_right"]
+                        columns[6] = self.setpoint
+                        self._history.extend(np.arange(first_seq, self._seq + 1), ts, columns)
+                    seq = self._seq
+                self._latency.mcu_batch(int(samples["mcu_ms"][0]), last_ms, received)
+                last = samples[-1]
+                angle_deg, gyro_dps = float(last["angle_deg"]), float(last["gyro_dps"])
+                accel_g = float(last["accel_g"])
+                pwm, enc_left, enc_right = int(last["pwm"]), int(last["enc_left"]), int(last["enc_right"])
+            else:
+                if not self.simulated:
+                    first_seq = self._seq + 1
+                    self._seq += n
+                    self._recorder.record_batch(first_seq, [now] * n, samples, self.setpoint, True)
+                    seq = self._seq
+                _ms, angle_deg, gyro_dps, accel_g, pwm, enc_left, enc_right = samples[-1]
+                self._latency.mcu_batch(samples[0][0], last_ms, received)
+            hw = self._latest_hw
+            with self._hw_lock:
+                hw.seq = seq
+                hw.angle_deg = angle_deg
+                hw.gyro_dps = gyro_dps
+                hw.accel_g = accel_g
+                hw.pwm = pwm
+                hw.enc_left = enc_left
+                hw.enc_right = enc_right
+                hw.received = received
+                hw.valid = True
+        self._hw_ready.set()
+        self._bridge_ready = True
+
+    def record_imu_raw_batch(self, payload) -> None:
+        """Bridge callback: fuse a batch of raw IMU samples (see fusion.py).
+
+        Raw samples are kept apart from the telemetry history; they are not
+        fed to the control loop, the MCU keeps running its own estimate.
+        """
+        try:
+            samples, _flags = decode_imu_raw_batch(payload)
+        except (ValueError, TypeError, struct.error):
+            return
+        n = len(samples)
+        if n == 0 or np is None or self._replayer.active:
+            return
+        last_us = int(samples["mcu_us"][-1])
+        if last_us == self._imu_last_us:
+            self._metrics.duplicate_samples += n
+            return
+        self._imu_last_us = last_us
+        self._metrics.imu_raw_samples += n
+        if self._imu is None:
+            self._imu = ImuFusion(IMU_RAW_SECONDS * MAX_PID_HZ, self.fusion)
+        now = time.time()
+        ts = now - ((last_us - samples["mcu_us"].astype(np.int64)) & 0xFFFFFFFF) / 1e6
+        config = self._config.data
+        self._imu.ingest(samples, ts, config["axis_mode"], config["axis_sign"])
+
+    def imu_stats(self) -> Dict[str, Any]:
+        """Raw IMU stream rate and the brick's vs. the MCU's fused angle."""
+        stats: Dict[str, Any] = {"raw_imu": self.raw_imu}
+        if self._imu is not None:
+            stats.update(self._imu.stats())
+        return stats
+
+    def imu_raw(self, points: int = 500, fields=None, evaluate: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Newest raw IMU samples with MCU-fused and brick-fused angles.
+
+        ``evaluate`` re-fuses the same window with other filter settings and
+        adds it as ``candidate_angle``.
+        """
+        if self._imu is None:
+            return {"count": 0, "ts": [], "mcu_us": [], "settings": self.fusion.copy()}
+        return self._imu.tail(points, fields, evaluate)
+
     # HTTP setters for polling mode
     def http_set_pid(self, p=None, i=None, d=None) -> Dict[str, Any]:
         data = {"p": p, "i": i, "d": d}
         self._on_set_pid(None, data)
-        return self.get_state()["config"]
+        return self._config.data
 
     def http_set_pid_hz(self, pid_hz=None) -> Dict[str, Any]:
         self._on_set_pid_hz(None, {"pid_hz": pid_hz})
-        return self.get_state()["config"]
+        return self._config.data
+
+    def http_set_telemetry_hz(self, telemetry_hz=None) -> Dict[str, Any]:
+        self._on_set_telemetry_hz(None, {"telemetry_hz": telemetry_hz})
+        return self._config.data
+
+    def http_set_raw_imu(self, enabled=None) -> Dict[str, Any]:
+        self._on_set_raw_imu(None, {"enabled": enabled})
+        return self._config.data
+
+    def http_set_fusion(self, filter=None, alpha=None, q_angle=None, q_bias=None, r_measure=None) -> Dict[str, Any]:
+        data = {"filter": filter, "alpha": alpha, "q_angle": q_angle, "q_bias": q_bias, "r_measure": r_measure}
+        self._on_set_fusion(None, data)
+        return self._config.data
+
+    def http_imu_raw(self, points=None, fields=None, filter=None, alpha=None, q_angle=None, q_bias=None, r_measure=None) -> Dict[str, Any]:
+        try:
+            points = int(points) if points is not None else 500
+        except (ValueError, TypeError):
+            points = 500
+        names = [f.strip() for f in str(fields).split(",") if f.strip()] if fields else None
+        candidate = self._fusion_settings(
+            {"filter": filter, "alpha": alpha, "q_angle": q_angle, "q_bias": q_bias, "r_measure": r_measure}, {}
+        )
+        return self.imu_raw(points, names, candidate or None)
 
     def http_set_setpoint(self, setpoint=None) -> Dict[str, Any]:
         self._on_set_setpoint(None, {"setpoint": setpoint})
-        return self.get_state()["config"]
+        return self._config.data
 
     def http_set_imu_model(self, imu_model=None) -> Dict[str, Any]:
         self._on_set_imu_model(None, {"imu_model": imu_model})
-        return self.get_state()["config"]
+        return self._config.data
 
     def http_set_axis_mode(self, axis_mode=None) -> Dict[str, Any]:
         self._on_set_axis_mode(None, {"axis_mode": axis_mode})
-        return self.get_state()["config"]
+        return self._config.data
 
     def http_set_axis_sign(self, axis_sign=None) -> Dict[str, Any]:
         self._on_set_axis_sign(None, {"axis_sign": axis_sign})
-        return self.get_state()["config"]
+        return self._config.data
 
     def http_set_motor_invert(self, left=None, right=None) -> Dict[str, Any]:
         self._on_set_motor_invert(None, {"left": left, "right": right})
-        return self.get_state()["config"]
+        return self._config.data
 
     def http_set_encoder_invert(self, left=None, right=None) -> Dict[str, Any]:
         self._on_set_encoder_invert(None, {"left": left, "right": right})
-        return self.get_state()["config"]
+        return self._config.data
 
     def http_motor_test(self, left=None, right=None, duration_ms=None) -> Dict[str, Any]:
         self._on_motor_test(None, {"left": left, "right": right, "duration_ms": duration_ms})
-        return self.get_state()["config"]
+        return self._config.data
 
     def http_stop_motor_test(self) -> Dict[str, Any]:
         self._on_stop_motor_test(None, {})
-        return self.get_state()["config"]
+        return self._config.data
 
     def http_set_mode(self, mode=None) -> Dict[str, Any]:
         self._on_set_mode(None, {"mode": mode})
-        return self.get_state()["config"]
+        return self._config.data
 
     def http_kick(self, angle=None) -> Dict[str, Any]:
         self._on_kick(None, {"angle": angle})
-        return self.get_state()["config"]
+        return self._config.data
+
+    def http_history(self, seconds=None, start=None, end=None, points=None, fields=None) -> Dict[str, Any]:
+        try:
+            start = float(start) if start not in (None, "") else None
+            end = float(end) if end not in (None, "") else None
+            if seconds not in (None, "") and start is None:
+                start = (end if end is not None else time.time()) - float(seconds)
+            points = int(points) if points not in (None, "") else 500
+        except (ValueError, TypeError):
+            return {"error": "invalid history parameters"}
+        points = max(10, min(5000, points))
+        if isinstance(fields, str):
+            fields = [f.strip() for f in fields.split(",") if f.strip()]
+        return self.history(start, end, points, fields)
+
+    def http_export(self, source=None, format=None, seconds=None, start=None, end=None, fields=None):
+        """/export: stream raw rows as CSV or npz blocks (see ``export.py``)."""
+        fmt = str(format or "csv").lower()
+        try:
+            start = float(start) if start not in (None, "") else None
+            end = float(end) if end not in (None, "") else None
+            seconds = float(seconds) if seconds not in (None, "") else None
+        except (ValueError, TypeError):
+            return {"error": "invalid export parameters"}
+        if isinstance(fields, str):
+            fields = [f.strip() for f in fields.split(",") if f.strip()]
+        try:
+            chunks = self.export_telemetry(source, fmt, start, end, fields, seconds=seconds)
+        except (OSError, ValueError) as exc:
+            return {"error": str(exc)}
+        name = Path(str(source)).stem if source else "history"
+        return export.response(chunks, fmt, f"{name}.{fmt}")
+
+    def http_autotune(self, action=None, samples=None, rounds=None, duration=None) -> Dict[str, Any]:
+        return self._handle_autotune({"action": action, "samples": samples, "rounds": rounds, "duration": duration})
+
+    def http_record_start(self, session=None) -> Dict[str, Any]:
+        return self.start_recording(str(session) if session else None)
+
+    def http_record_stop(self) -> Dict[str, Any]:
+        return self.stop_recording()
+
+    def http_record_status(self) -> Dict[str, Any]:
+        return self.recording_status()
+
+    def http_replay(self, action=None, path=None, speed=None, position=None, loop=None) -> Dict[str, Any]:
+        return self._handle_replay(
+            {"action": action, "path": path, "speed": speed, "position": position, "loop": loop}
+        )
+
+    def http_metrics(self):
+        return metrics.response(self.metrics_text())
+
+    def http_latency(self, reset=None) -> Dict[str, Any]:
+        if str(reset).lower() in ("1", "true", "yes"):
+            return self.reset_latency()
+        return self.latency_stats()
+
+    def http_quality(self, reset=None) -> Dict[str, Any]:
+        if str(reset).lower() in ("1", "true", "yes"):
+            return self.reset_quality()
+        return self.quality_stats()
+
+    def http_status(self, since=None, timeout=None, crc=None) -> Dict[str, Any]:
+        """/status: full state, or a long poll when ``since`` is given.
+
+        The long poll waits up to ``timeout`` seconds for a frame newer than
+        ``since`` and returns every history row after it. ``config`` is left
+        out when ``crc`` matches ``config_crc``.
+        """
+        if since in (None, ""):
+            return self.get_state()
+        try:
+            since = int(since)
+        except (ValueError, TypeError):
+            since = 0
+        try:
+            timeout = float(timeout) if timeout not in (None, "") else 10.0
+        except (ValueError, TypeError):
+            timeout = 10.0
+        self.wait_for_frame(since, max(0.0, min(LONG_POLL_MAX_S, timeout)))
+        data = self._frames.snapshot()
+        seq = data.get("seq", 0)
+        result: Dict[str, Any] = {"seq": seq, "telemetry": data}
+        if since and seq != since and self._history is not None:
+            result["frames"] = self._history.since(since)
+        config = self._config
+        result["config_version"] = config.version
+        result["config_crc"] = config.crc
+        if str(crc) != str(config.crc):
+            result["config"] = config.data
+        result["recorder"] = self._recorder.status()
+        result["replay"] = self._replayer.status()
+        return result
+
+    def http_config(self):
+        """/config: the cached config JSON bytes (no per-request serialization)."""
+        return self._config.response()
+
+    def http_status_bin(self, since=None, crc=None) -> Dict[str, Any]:
+        """Binary /status variant: base64 packet of the frames after ``since``.
+
+        Static fields are omitted when ``crc`` matches the current ones.
+        """
+        data = self._frames.snapshot()
+        static = wire.static_fields(data)
+        static_crc = wire.static_crc(static)
+        try:
+            since = int(since) if since not in (None, "") else 0
+        except (ValueError, TypeError):
+            since = 0
+        rows = []
+        if since and self._history is not None:
+            rows = wire.rows_from_history(self._history.since(since))
+        if not rows and data.get("seq", 0) != since:
+            rows = [wire.row_from_frame(data)]
+        packet = wire.encode(rows, None if str(crc) == str(static_crc) else static)
+        return {
+            "format": "bt1",
+            "seq": data.get("seq", 0),
+            "crc": static_crc,
+            "data": base64.b64encode(packet).decode("ascii"),
+        }
 
     def _ensure_bridge_ready(self) -> bool:
         if not self._bridge:
@@ -194,130 +864,236 @@ class BalancingRobot:
         if self._bridge_ready:
             return True
         try:
-            self._bridge.call("get_status", timeout=2)
+            status = self._bridge.call("get_status", timeout=2)
             self._bridge_ready = True
         except Exception:
             self._bridge_ready = False
+            return False
+        # "ok:mode:ready:model:axis:sign:v<config version>"
+        for part in reversed(str(status).split(":")):
+            if part.startswith("v") and part[1:].isdigit():
+                self._bridge_config.ack(int(part[1:]))
+                break
         return self._bridge_ready
 
     def _bridge_notify(self, method: str, *params) -> None:
         if not self._bridge:
             return
-        if not self._ensure_bridge_ready():
-            return
+        self._commands.submit(method, *params)
+
+    def _config_fields(self) -> Dict[str, Any]:
+        config = self._config.data
+        return {
+            "p": float(config["pid"]["p"]),
+            "i": float(config["pid"]["i"]),
+            "d": float(config["pid"]["d"]),
+            "hz": int(config["pid_hz"]),
+            "th": int(config["telemetry_hz"]),
+            "sp": float(config["setpoint"]),
+            "imu": config["imu_model"],
+            "axis": config["axis_mode"],
+            "sign": config["axis_sign"],
+            "mi": (config["motor_invert"]["left"], config["motor_invert"]["right"]),
+            "ei": (config["encoder_invert"]["left"], config["encoder_invert"]["right"]),
+            "raw": int(config["raw_imu"]),
+            "mode": config["mode"],
+        }
+
+    def _update_config(self, force: bool = False, **changes) -> ConfigSnapshot:
+        """Single config mutation path: apply, re-snapshot, then fan out.
+
+        ``changes`` are attribute names with replacement values (dicts are
+        replaced, never mutated in place, so older snapshots stay valid).
+        """
+        with self._config_lock:
+            changed = False
+            for name, value in changes.items():
+                if getattr(self, name) != value:
+                    setattr(self, name, value)
+                    changed = True
+            if changed:
+                self._config = ConfigSnapshot(self._config.version + 1, self._config_dict())
+            snapshot = self._config
+        if not changed and not force:
+            # Repeated setter calls (e.g. slider drags) must not rebroadcast.
+            return snapshot
+        self._sync_bridge_config(force)
+        self._send_config()
+        return snapshot
+
+    def _sync_bridge_config(self, force: bool = False) -> None:
+        """Record MCU config changes and queue one apply_config for the MCU.
+
+        In sim mode changes are only recorded; they go out together with the
+        next mode switch. The message is built on the command worker, so a
+        burst of setter calls still results in a single send.
+        """
+        changed = self._bridge_config.update(**self._config_fields())
+        if changed:
+            self._recorder.record_config(self._config_snapshot(), self._bridge_config.version)
+        if self._bridge and (force or (changed and not self.simulated)):
+            self._queue_apply_config()
+
+    def _queue_apply_config(self) -> None:
+        config = self._bridge_config
+        self._commands.submit("apply_config", build=config.message, on_fail=config.send_failed)
+
+    def _on_config_ack(self, version: int) -> None:
+        config = self._bridge_config
+        config.ack(version)
+        if self._bridge and not self.simulated and config.needs_resend():
+            self._queue_apply_config()
+
+    def _send_bridge(self, method: str, *params) -> None:
+        # Runs on the command queue worker; exceptions trigger a retry.
         try:
             self._bridge.notify(method, *params)
         except Exception:
-            pass
+            self._bridge_ready = False
+            raise
+
+    def _publish(self, message: str, data: Any, client=None) -> None:
+        """Every WebUI send goes through here so the webui_* counters see it."""
+        if self._ui:
+            try:
+                self._ui.send_message(self._prefix + message, data, client)
+            except Exception:
+                self._metrics.webui_dropped += 1
+                raise
+            self._metrics.webui_sent += 1
 
     def _send_config(self, client=None) -> None:
-        if not self._ui:
-            return
-        self._ui.send_message("config", self.get_state()["config"], client)
+        self._publish("config", self._config.data, client)
+
+    def _on_connect(self, client) -> None:
+        self._publisher.add_client(client)
+        self._send_config(client)
 
     def _on_get_initial_state(self, client, _data) -> None:
         self._send_config(client)
 
     def _on_set_pid(self, _client, data) -> None:
+        pid = dict(self.pid)
         try:
             if data.get("p") is not None:
-                self.pid["p"] = float(data.get("p"))
+                pid["p"] = float(data.get("p"))
             if data.get("i") is not None:
-                self.pid["i"] = float(data.get("i"))
+                pid["i"] = float(data.get("i"))
             if data.get("d") is not None:
-                self.pid["d"] = float(data.get("d"))
+                pid["d"] = float(data.get("d"))
         except (ValueError, TypeError):
             return
-        if not self.simulated:
-            self._bridge_notify("set_pid", self.pid["p"], self.pid["i"], self.pid["d"])
-        self._send_config()
+        self._update_config(pid=pid)
 
     def _on_set_pid_hz(self, _client, data) -> None:
         try:
             pid_hz = int(data.get("pid_hz", self.update_hz))
         except (ValueError, TypeError):
             pid_hz = self.update_hz
-        pid_hz = max(5, min(200, pid_hz))
-        self.update_hz = pid_hz
-        self._send_config()
+        pid_hz = max(5, min(MAX_PID_HZ, pid_hz))
+        # Sim: the Python loop rate. Real: forwarded to the MCU PID as "hz".
+        self._update_config(update_hz=pid_hz)
+
+    def _on_set_telemetry_hz(self, _client, data) -> None:
+        try:
+            telemetry_hz = int(data.get("telemetry_hz", self.telemetry_hz))
+        except (ValueError, TypeError):
+            telemetry_hz = self.telemetry_hz
+        self._update_config(telemetry_hz=max(10, min(500, telemetry_hz)))
 
     def _on_set_setpoint(self, _client, data) -> None:
         try:
-            if data.get("setpoint") is not None:
-                self.setpoint = float(data.get("setpoint"))
+            if data.get("setpoint") is None:
+                return
+            setpoint = float(data.get("setpoint"))
         except (ValueError, TypeError):
             return
-        if not self.simulated:
-            self._bridge_notify("set_setpoint", self.setpoint)
-        self._send_config()
+        self._update_config(setpoint=setpoint)
 
     def _on_set_imu_model(self, _client, data) -> None:
         model = data.get("imu_model")
         if model:
-            self.imu_model = str(model)
-            if not self.simulated:
-                self._bridge_notify("set_imu_model", self.imu_model)
-            self._send_config()
+            self._update_config(imu_model=str(model))
 
     def _on_set_axis_mode(self, _client, data) -> None:
         axis = data.get("axis_mode")
         if axis:
-            self.axis_mode = str(axis)
-            if not self.simulated:
-                self._bridge_notify("set_axis_mode", self.axis_mode)
-            self._bridge_notify("set_axis_sign", self.axis_sign)
-            self._send_config()
+            self._update_config(axis_mode=str(axis))
 
     def _on_set_axis_sign(self, _client, data) -> None:
         sign = data.get("axis_sign")
         if sign is None:
             return
         try:
-            self.axis_sign = -1 if int(sign) < 0 else 1
+            axis_sign = -1 if int(sign) < 0 else 1
         except (ValueError, TypeError):
-            self.axis_sign = 1
+            axis_sign = 1
         self._sim_angle = 12.0
         self._sim_rate = 0.0
         self._kick_wave_t = 0.0
         self._kick_wave_strength = 0.0
         self._kick_wave_sign = 1.0
-        if not self.simulated:
-            self._bridge_notify("set_axis_sign", self.axis_sign)
-        self._send_config()
+        self._update_config(axis_sign=axis_sign)
 
     def _on_set_motor_invert(self, _client, data) -> None:
         left = data.get("left")
         right = data.get("right")
+        motor_invert = dict(self.motor_invert)
         if left is not None:
             try:
-                self.motor_invert["left"] = -1 if int(left) < 0 else 1
+                motor_invert["left"] = -1 if int(left) < 0 else 1
             except (ValueError, TypeError):
-                self.motor_invert["left"] = 1
+                motor_invert["left"] = 1
         if right is not None:
             try:
-                self.motor_invert["right"] = -1 if int(right) < 0 else 1
+                motor_invert["right"] = -1 if int(right) < 0 else 1
             except (ValueError, TypeError):
-                self.motor_invert["right"] = 1
-        if not self.simulated:
-            self._bridge_notify("set_motor_invert", self.motor_invert["left"], self.motor_invert["right"])
-        self._send_config()
+                motor_invert["right"] = 1
+        self._update_config(motor_invert=motor_invert)
 
     def _on_set_encoder_invert(self, _client, data) -> None:
         left = data.get("left")
         right = data.get("right")
+        encoder_invert = dict(self.encoder_invert)
         if left is not None:
             try:
-                self.encoder_invert["left"] = -1 if int(left) < 0 else 1
+                encoder_invert["left"] = -1 if int(left) < 0 else 1
             except (ValueError, TypeError):
-                self.encoder_invert["left"] = 1
+                encoder_invert["left"] = 1
         if right is not None:
             try:
-                self.encoder_invert["right"] = -1 if int(right) < 0 else 1
+                encoder_invert["right"] = -1 if int(right) < 0 else 1
             except (ValueError, TypeError):
-                self.encoder_invert["right"] = 1
-        if not self.simulated:
-            self._bridge_notify("set_encoder_invert", self.encoder_invert["left"], self.encoder_invert["right"])
-        self._send_config()
+                encoder_invert["right"] = 1
+        self._update_config(encoder_invert=encoder_invert)
+
+    def _on_set_raw_imu(self, _client, data) -> None:
+        enabled = data.get("enabled")
+        if enabled is None:
+            return
+        self._update_config(raw_imu=enabled is True or str(enabled).lower() in ("1", "true", "yes", "on"))
+
+    def _fusion_settings(self, data, base: Dict[str, Any]) -> Dict[str, Any]:
+        """Validated fusion settings from ``data`` layered over ``base``."""
+        settings = dict(base)
+        name = data.get("filter")
+        if name in FILTERS:
+            settings["filter"] = name
+        for key, low, high in (("alpha", 0.0, 0.9999), ("q_angle", 1e-9, 10.0), ("q_bias", 1e-9, 10.0), ("r_measure", 1e-9, 100.0)):
+            value = data.get(key)
+            if value is None:
+                continue
+            try:
+                settings[key] = max(low, min(high, float(value)))
+            except (ValueError, TypeError):
+                pass
+        return settings
+
+    def _on_set_fusion(self, _client, data) -> None:
+        fusion = self._fusion_settings(data, self.fusion)
+        self._update_config(fusion=fusion)
+        if self._imu is not None:
+            self._imu.configure(fusion)
 
     def _on_motor_test(self, _client, data) -> None:
         if self.simulated:
@@ -340,17 +1116,117 @@ class BalancingRobot:
 
     def _on_set_mode(self, _client, data) -> None:
         mode = str(data.get("mode", "sim"))
-        self.simulated = (mode != "real")
-        self._bridge_notify("set_mode", "real" if not self.simulated else "sim")
-        if not self.simulated:
-            self._bridge_notify("set_pid", self.pid["p"], self.pid["i"], self.pid["d"])
-            self._bridge_notify("set_setpoint", self.setpoint)
-            self._bridge_notify("set_imu_model", self.imu_model)
-            self._bridge_notify("set_axis_mode", self.axis_mode)
-            self._bridge_notify("set_axis_sign", self.axis_sign)
-            self._bridge_notify("set_motor_invert", self.motor_invert["left"], self.motor_invert["right"])
-            self._bridge_notify("set_encoder_invert", self.encoder_invert["left"], self.encoder_invert["right"])
-        self._send_config()
+        was_simulated = self.simulated
+        simulated = (mode != "real")
+        # One message carries the mode plus every field the MCU has not acked,
+        # so entering real mode applies the whole config atomically.
+        self._update_config(force=was_simulated != simulated or not simulated, simulated=simulated)
+
+    def _on_set_wire_format(self, client, data) -> None:
+        self.set_wire_format(str(data.get("format", "json")), client)
+
+    def _handle_autotune(self, data) -> Dict[str, Any]:
+        action = str(data.get("action") or "status")
+        if action == "start":
+            try:
+                samples = int(data.get("samples") or 2000)
+                rounds = int(data.get("rounds") or 3)
+                duration_s = float(data.get("duration") or 15.0)
+            except (ValueError, TypeError):
+                return self._autotuner.status()
+            samples = max(50, min(20000, samples))
+            rounds = max(1, min(10, rounds))
+            duration_s = max(2.0, min(60.0, duration_s))
+            return self.autotune(samples=samples, rounds=rounds, duration_s=duration_s)
+        if action == "cancel":
+            return self.cancel_autotune()
+        if action == "apply":
+            return self.apply_autotune()
+        return self._autotuner.status()
+
+    def _on_autotune(self, client, data) -> None:
+        self._publish("autotune", self._handle_autotune(data or {}), client)
+
+    def _handle_recorder(self, data) -> Dict[str, Any]:
+        action = str(data.get("action") or "status")
+        if action == "start":
+            session = data.get("session")
+            return self.start_recording(str(session) if session else None)
+        if action == "stop":
+            return self.stop_recording()
+        return self.recording_status()
+
+    def _on_recorder(self, client, data) -> None:
+        self._publish("recorder", self._handle_recorder(data or {}), client)
+
+    def _handle_replay(self, data) -> Dict[str, Any]:
+        action = str(data.get("action") or "status")
+        try:
+            speed = float(data["speed"]) if data.get("speed") not in (None, "") else None
+            position = float(data["position"]) if data.get("position") not in (None, "") else None
+        except (ValueError, TypeError):
+            return self._replayer.status()
+        if speed is not None:
+            speed = max(0.1, min(100.0, speed))
+        if action == "start":
+            if not data.get("path"):
+                return dict(self._replayer.status(), error="path required")
+            loop = str(data.get("loop")).lower() in ("1", "true", "yes")
+            return self.start_replay(str(data["path"]), speed or 1.0, position or 0.0, loop)
+        if action == "stop":
+            return self.stop_replay()
+        if action == "pause":
+            return self.pause_replay()
+        if action == "resume":
+            return self.resume_replay()
+        if action == "seek" and position is not None:
+            return self.seek_replay(position)
+        if action == "speed" and speed is not None:
+            return self.set_replay_speed(speed)
+        if action == "list":
+            return {"sessions": self.list_recordings()}
+        return self._replayer.status()
+
+    def _on_replay(self, client, data) -> None:
+        self._publish("replay", self._handle_replay(data or {}), client)
+
+    def _on_latency_report(self, _client, data) -> None:
+        try:
+            seq = int(data.get("seq"))
+            render_ms = float(data.get("render_ms", 0.0))
+        except (ValueError, TypeError, AttributeError):
+            return
+        self._latency.browser_report(seq, render_ms)
+
+    def _on_replay_sample(self, row) -> None:
+        # row layout: recorder.RECORD
+        _kind, _flags, pwm, _seq, _ts, angle_deg, gyro_dps, accel_g, setpoint, enc_left, enc_right = row
+        ts = time.time()
+        self._replay_setpoint = setpoint
+        with self._seq_lock:
+            self._seq += 1
+            seq = self._seq
+            if self._history is not None:
+                self._history.append(seq, ts, angle_deg, gyro_dps, accel_g, pwm, enc_left, enc_right, setpoint)
+                self._history_ts = ts
+            hw = self._latest_hw
+            with self._hw_lock:
+                hw.seq = seq
+                hw.angle_deg = angle_deg
+                hw.gyro_dps = gyro_dps
+                hw.accel_g = accel_g
+                hw.pwm = pwm
+                hw.enc_left = enc_left
+                hw.enc_right = enc_right
+                hw.mode = "replay"
+                hw.received = time.monotonic()
+                hw.valid = True
+        self._hw_ready.set()
+
+    def _on_replay_config(self, row) -> None:
+        # Config rows carry p/i/d/setpoint in the angle/gyro/accel/setpoint columns.
+        self._replay_pid = {"p": row[5], "i": row[6], "d": row[7]}
+        self._replay_setpoint = row[8]
 
     def _on_kick(self, _client, data) -> None:
         try:
@@ -365,127 +1241,218 @@ class BalancingRobot:
                 self._kick_wave_sign = 1.0 if angle >= 0 else -1.0
                 self._kick_wave_strength = min(120.0, self._kick_wave_strength + strength)
                 self._kick_wave_t = 0.0
-            self._telemetry["angle_deg"] = self._sim_angle
-            self._telemetry["gyro_dps"] = self._sim_rate
-            if self._ui:
-                self._ui.send_message("telemetry", self._telemetry)
+            self._quality.mark_kick()
+            self._publish("telemetry", self._frames.snapshot())
         else:
             # Kick is simulation-only to avoid face-planting hardware.
             return
 
     def _run_loop(self) -> None:
+        scheduler = self._scheduler
+        scheduler.set_rate(self._loop_hz())
+        while not self._stop.is_set():
+            if self.simulated and not self._replayer.active:
+                dt = scheduler.wait(self._stop)
+            else:
+                # Tick as soon as a new sample lands; the deadline is the fallback
+                # for a quiet bridge and the sensor-provider path.
+                dt, _woken = scheduler.wait_event(self._hw_ready)
+            if self._stop.is_set():
+                break
+            if scheduler.hz != self._loop_hz():
+                scheduler.set_rate(self._loop_hz())
+            # Clamp the measured dt so a long stall cannot blow up the sim/PID.
+            started = time.perf_counter()
+            self._step(max(1e-4, min(dt, 5.0 * scheduler.period)))
+            self._metrics.observe_loop(time.perf_counter() - started)
+
+    def _loop_hz(self) -> int:
+        return max(1, min(MAX_LOOP_HZ, int(self.update_hz)))
+
+    def _step(self, dt: float, sim=None) -> None:
+        """One tick. ``sim`` is ``(config, live_step() results)`` for this robot
+        when ``RobotHost`` already advanced the simulator for many robots."""
         angle = self._sim_angle
         rate = self._sim_rate
-        accel = 0.0
-        enc_l = 0
-        enc_r = 0
-        pid_out = 0.0
+        accel = self._accel
+        enc_l = self._enc_l
+        enc_r = self._enc_r
+        pid_out = self._pid_out
+        have_hw = False
+        hw_seq = 0
+        received = 0.0
+        replaying = self._replayer.active and sim is None
+        simulate = sim is not None or (self.simulated and not replaying)
+        # One load: gains and setpoint always come from the same config version.
+        config = self._config if sim is None else sim[0]
 
-        while not self._stop.is_set():
-            dt = 1.0 / max(1, int(self.update_hz))
-            if self.simulated:
-                with self._hw_lock:
-                    if self._kick_wave_strength > 0.01:
-                        self._kick_wave_t += dt
-                        decay = math.exp(-1.4 * self._kick_wave_t)
-                        wobble = (
-                            self._kick_wave_sign
-                            * self._kick_wave_strength
-                            * decay
-                            * math.sin(self._kick_wave_t * 6.0 + 0.7)
-                        )
-                        rate += wobble
-                        if decay < 0.03:
-                            self._kick_wave_strength = 0.0
+        if simulate:
+            if sim is None:
+                if self._kick_wave_strength > 0.01:
+                    rate += self._kick_wobble(dt)
                 # Larger, slower oscillation with noise for visible UI motion.
-                rate += (-0.25 * angle - 0.03 * rate + random.uniform(-0.5, 0.5))
-                angle += rate * dt
-                accel = max(-2.0, min(2.0, angle / 10.0))
-                self._sim_angle = angle
-                self._sim_rate = rate
-            else:
-                # Prefer bridge telemetry if available.
-                with self._hw_lock:
-                    data = dict(self._latest_hw)
+                kp, ki, kd = config.gains
+                sim = (config,) + live_step(
+                    angle, rate, self._integral, self._last_error,
+                    kp, ki, kd, config.setpoint, self._noise.uniform(-0.5, 0.5), dt,
+                )
+            _, angle, rate, accel, self._integral, self._last_error, pid_out, enc_step = sim
+            # Simulated encoders proportional to output.
+            enc_l += enc_step
+            enc_r += enc_step
+        else:
+            # Prefer bridge telemetry, but only a sample this loop has not used yet.
+            hw = self._latest_hw
+            with self._hw_lock:
+                seen_hw = hw.valid
+                if seen_hw and hw.seq > self._hw_consumed:
+                    angle = hw.angle_deg
+                    rate = hw.gyro_dps
+                    accel = hw.accel_g
+                    enc_l = hw.enc_left
+                    enc_r = hw.enc_right
+                    pid_out = hw.pwm
+                    hw_seq = hw.seq
+                    received = hw.received
+                    have_hw = True
+            if have_hw:
+                self._hw_consumed = hw_seq
+                if not replaying:
+                    self._latency.observe("bridge_to_loop", (time.monotonic() - received) * 1000.0)
+            elif seen_hw:
+                self._metrics.stale_samples += 1
+
+            if have_hw:
+                pass  # Bridge sample already copied under the lock.
+            elif seen_hw and not self._sensor_provider:
+                # Timeout on a quiet bridge: the last sample was already emitted,
+                # so repeating it would double-count it in history and quality.
+                return
+            elif self._sensor_provider:
+                try:
+                    data = self._sensor_provider() or {}
+                except Exception:
+                    data = {}
 
-                if data:
+                try:
                     angle = float(data.get("angle_deg", angle))
+                except (ValueError, TypeError):
+                    pass
+                try:
                     rate = float(data.get("gyro_dps", rate))
+                except (ValueError, TypeError):
+                    pass
+                try:
                     accel = float(data.get("accel_g", accel))
-                    enc = data.get("encoders", {})
-                    if isinstance(enc, dict):
-                        enc_l = int(enc.get("left", enc_l))
-                        enc_r = int(enc.get("right", enc_r))
-                    pid_out = float(data.get("motor_pwm", {}).get("left", pid_out))
-                elif self._sensor_provider:
-                    try:
-                        data = self._sensor_provider() or {}
-                    except Exception:
-                        data = {}
+                except (ValueError, TypeError):
+                    pass
 
+                enc = data.get("encoders", {})
+                if isinstance(enc, dict):
+                    enc_l = int(enc.get("left", enc_l))
+                    enc_r = int(enc.get("right", enc_r))
+                else:
                     try:
-                        angle = float(data.get("angle_deg", angle))
-                    except (ValueError, TypeError):
-                        pass
-                    try:
-                        rate = float(data.get("gyro_dps", rate))
-                    except (ValueError, TypeError):
-                        pass
-                    try:
-                        accel = float(data.get("accel_g", accel))
-                    except (ValueError, TypeError):
+                        enc_l = int(data.get("enc_left", enc_l))
+                        enc_r = int(data.get("enc_right", enc_r))
+                    except (ValueError, TypeError, AttributeError):
                         pass
+            else:
+                rate *= 0.95
 
-                    enc = data.get("encoders", {})
-                    if isinstance(enc, dict):
-                        enc_l = int(enc.get("left", enc_l))
-                        enc_r = int(enc.get("right", enc_r))
-                    else:
-                        try:
-                            enc_l = int(data.get("enc_left", enc_l))
-                            enc_r = int(data.get("enc_right", enc_r))
-                        except (ValueError, TypeError, AttributeError):
-                            pass
-                else:
-                    rate *= 0.95
-
-            if self.simulated:
-                error = self.setpoint - angle
-                self._integral += error * dt
-                deriv = (error - self._last_error) / dt
-                self._last_error = error
-
-                pid_out = (
-                    self.pid["p"] * error
-                    + self.pid["i"] * self._integral
-                    + self.pid["d"] * deriv
-                )
-                pid_out = max(-255.0, min(255.0, pid_out))
+        self._emit(dt, config, angle, rate, accel, enc_l, enc_r, pid_out, have_hw, hw_seq, received, replaying)
 
-                # Simulated encoders proportional to output.
-                enc_l += int(pid_out * 0.12)
-                enc_r += int(pid_out * 0.12)
+    def _kick_wobble(self, dt: float) -> float:
+        """Advance the kick impulse by ``dt`` and return its rate contribution."""
+        with self._hw_lock:
+            if self._kick_wave_strength <= 0.01:
+                return 0.0
+            self._kick_wave_t += dt
+            decay = math.exp(-1.4 * self._kick_wave_t)
+            wobble = (
+                self._kick_wave_sign
+                * self._kick_wave_strength
+                * decay
+                * math.sin(self._kick_wave_t * 6.0 + 0.7)
+            )
+            if decay < 0.03:
+                self._kick_wave_strength = 0.0
+            return wobble
 
-            if self._motor_sink:
-                try:
-                    self._motor_sink(int(pid_out), int(pid_out))
-                except Exception:
-                    pass
+    def _emit(
+        self,
+        dt: float,
+        config: ConfigSnapshot,
+        angle: float,
+        rate: float,
+        accel: float,
+        enc_l: int,
+        enc_r: int,
+        pid_out: float,
+        have_hw: bool = False,
+        hw_seq: int = 0,
+        received: float = 0.0,
+        replaying: bool = False,
+    ) -> None:
+        """Second half of a tick: drive motors, publish the frame, record, store state."""
+        if abs(pid_out) >= 255.0:
+            self._metrics.pid_saturated_s += dt
+
+        if self._motor_sink and not replaying:
+            try:
+                self._motor_sink(int(pid_out), int(pid_out))
+            except Exception:
+                pass
+
+        pid = self._replay_pid if replaying else config.data["pid"]
+        setpoint = self._replay_setpoint if replaying else config.setpoint
+        pwm = int(pid_out)
+        ts = time.time()
+        if have_hw:
+            # Bridge samples were already numbered (and recorded) on arrival.
+            seq = hw_seq
+        else:
+            with self._seq_lock:
+                self._seq += 1
+                seq = self._seq
+                if not replaying:
+                    if self._history is not None:
+                        self._history.append(seq, ts, angle, rate, accel, pwm, enc_l, enc_r, setpoint)
+                        self._history_ts = ts
+                    self._recorder.record(
+                        seq, ts, angle, rate, accel, pwm, enc_l, enc_r, setpoint, not self.simulated
+                    )
+        frame = self._frames.begin()
+        frame.seq = seq
+        frame.ts = ts
+        frame.mono = time.monotonic()
+        frame.sample_age_ms = (frame.mono - received) * 1000.0 if have_hw and received else 0.0
+        frame.angle_deg = angle
+        frame.gyro_dps = rate
+        frame.accel_g = accel
+        frame.pwm_left = pwm
+        frame.pwm_right = pwm
+        frame.enc_left = enc_l
+        frame.enc_right = enc_r
+        frame.p = pid["p"]
+        frame.i = pid["i"]
+        frame.d = pid["d"]
+        frame.setpoint = setpoint
+        frame.control_hz = self._mcu_control_hz if have_hw and not replaying else 0
+        if replaying:
+            frame.mode = "replay"
+        else:
+            frame.mode = "sim" if self.simulated else "real"
+        frame.imu_model = self.imu_model
+        self._frames.publish()
+        if self._frame_waiters:
+            with self._frame_cond:
+                self._frame_cond.notify_all()
+        self._quality.update(dt, setpoint - angle, pid_out)
 
-            self._telemetry = {
-                "ts": time.time(),
-                "angle_deg": angle,
-                "gyro_dps": rate,
-                "accel_g": accel,
-                "pid": self.pid.copy(),
-                "setpoint": self.setpoint,
-                "motor_pwm": {"left": int(pid_out), "right": int(pid_out)},
-                "encoders": {"left": enc_l, "right": enc_r},
-                "mode": "real" if not self.simulated else "sim",
-                "imu_model": self.imu_model,
-            }
-
-            if self._ui:
-                self._ui.send_message("telemetry", self._telemetry)
-
-            time.sleep(dt)
+        self._sim_angle = angle
+        self._sim_rate = rate
+        self._accel = accel
+        self._enc_l = enc_l
+        self._enc_r = enc_r
+        self._pid_out = pid_out
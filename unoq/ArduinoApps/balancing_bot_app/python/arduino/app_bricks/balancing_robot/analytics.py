@@ -0,0 +1,176 @@
+"""Control-quality analytics updated incrementally from the control loop.
+
+Every tick costs a few float operations; nothing is buffered:
+
+- ``rms_error_deg`` / ``saturation``: exponentially weighted over
+  ``window_s`` (mean square of setpoint - angle, and the fraction of time the
+  PID output sits at the PWM limit);
+- ``dominant_hz`` / ``dominant_amp_deg``: strongest oscillation of the error,
+  from a bank of Goertzel filters on integer bins of a ``dft_size`` block.
+  The error is first averaged down to at most ``analysis_hz`` (bins reach
+  about 12 Hz), so at 200 Hz the filter bank runs on one tick in eight.
+  Integer bins have no response to a constant, so a steady offset does not
+  show up as a low frequency;
+- ``overshoot_deg`` / ``peak_deg`` / ``settling_s``: the last response to a
+  kick (``mark_kick()``) or to a disturbance larger than
+  ``disturbance_deg``. Overshoot is the largest excursion past the setpoint
+  opposite the initial displacement, as in ``sim.BatchSimulator``; the
+  response settles once the error stays inside ``settle_band`` for
+  ``settle_hold_s``.
+"""
+
+import math
+from typing import Any, Dict, Optional
+
+PWM_LIMIT = 255.0
+
+
+class ControlQuality:
+    def __init__(
+        self,
+        window_s: float = 5.0,
+        settle_band: float = 2.0,
+        settle_hold_s: float = 1.0,
+        disturbance_deg: float = 8.0,
+        max_response_s: float = 10.0,
+        dft_size: int = 64,
+        analysis_hz: float = 25.0,
+    ):
+        self.window_s = float(window_s)
+        self.settle_band = float(settle_band)
+        self.settle_hold_s = float(settle_hold_s)
+        self.disturbance_deg = float(disturbance_deg)
+        self.max_response_s = float(max_response_s)
+        self.dft_size = int(dft_size)
+        self._analysis_period = 1.0 / float(analysis_hz)
+        # Bins 1..N/2-1; the coefficients only depend on k/N, not on the rate.
+        bins = self.dft_size // 2 - 1
+        self._coeffs = [2.0 * math.cos(2.0 * math.pi * k / self.dft_size) for k in range(1, bins + 1)]
+        self.reset()
+
+    def reset(self) -> None:
+        self.samples = 0
+        self._t = 0.0
+        self._mean_sq = 0.0
+        self._saturated = 0.0
+
+        self._dec_sum = 0.0
+        self._dec_n = 0
+        self._dec_t = 0.0
+        self._s1 = [0.0] * len(self._coeffs)
+        self._s2 = [0.0] * len(self._coeffs)
+        self._block_n = 0
+        self._block_t = 0.0
+        self.dominant_hz = 0.0
+        self.dominant_amp = 0.0
+
+        self._active = False
+        self._start_t = 0.0
+        self._sign = 0.0
+        self._peak = 0.0
+        self._overshoot = 0.0
+        self._last_outside_t = 0.0
+        self._kick_pending = False
+        self.responses = 0
+        self.last_response: Optional[Dict[str, Any]] = None
+
+    def mark_kick(self) -> None:
+        """Start a response measurement on the next tick."""
+        self._kick_pending = True
+
+    def update(self, dt: float, error: float, pid_out: float) -> None:
+        """Fold one control tick into every metric."""
+        self.samples += 1
+        self._t += dt
+        a = dt / self.window_s if dt < self.window_s else 1.0
+        self._mean_sq += a * (error * error - self._mean_sq)
+        if pid_out >= PWM_LIMIT or pid_out <= -PWM_LIMIT:
+            self._saturated += a * (1.0 - self._saturated)
+        else:
+            self._saturated -= a * self._saturated
+
+        if self._active or self._kick_pending or abs(error) > self.disturbance_deg:
+            self._track_response(error)
+
+        self._dec_sum += error
+        self._dec_n += 1
+        self._dec_t += dt
+        if self._dec_t >= self._analysis_period:
+            self._goertzel(self._dec_sum / self._dec_n, self._dec_t)
+            self._dec_sum = 0.0
+            self._dec_n = 0
+            self._dec_t = 0.0
+
+    def _track_response(self, error: float) -> None:
+        if not self._active:
+            self._kick_pending = False
+            self._active = True
+            self._start_t = self._t
+            self._last_outside_t = self._t
+            self._sign = 0.0
+            self._peak = 0.0
+            self._overshoot = 0.0
+        if abs(error) > self.settle_band:
+            self._last_outside_t = self._t
+            if self._sign == 0.0:
+                # Displacement direction: angle - setpoint = -error.
+                self._sign = 1.0 if error < 0 else -1.0
+        if abs(error) > self._peak:
+            self._peak = abs(error)
+        if self._sign != 0.0 and error * self._sign > self._overshoot:
+            self._overshoot = error * self._sign
+        elapsed = self._t - self._start_t
+        settled = self._t - self._last_outside_t >= self.settle_hold_s
+        if settled or elapsed >= self.max_response_s:
+            self._active = False
+            self.responses += 1
+            self.last_response = {
+                "overshoot_deg": round(self._overshoot, 3),
+                "peak_deg": round(self._peak, 3),
+                "settling_s": round(self._last_outside_t - self._start_t, 3) if settled else None,
+                "settled": settled,
+                "ended_t": self._t,
+            }
+
+    def _goertzel(self, x: float, dt: float) -> None:
+        s1 = self._s1
+        self._s1 = [x + c * a - b for c, a, b in zip(self._coeffs, s1, self._s2)]
+        self._s2 = s1
+        self._block_n += 1
+        self._block_t += dt
+        if self._block_n < self.dft_size:
+            return
+        powers = [a * a + b * b - c * a * b for c, a, b in zip(self._coeffs, self._s1, self._s2)]
+        best = max(range(len(powers)), key=powers.__getitem__)
+        # Parabolic interpolation between neighbouring bins (on magnitudes).
+        offset = 0.0
+        if 0 < best < len(powers) - 1:
+            left, mid, right = (math.sqrt(max(0.0, p)) for p in powers[best - 1 : best + 2])
+            denom = left - 2.0 * mid + right
+            if denom < 0.0:
+                offset = 0.5 * (left - right) / denom
+        rate = self._block_n / self._block_t if self._block_t > 0 else 0.0
+        self.dominant_hz = (best + 1 + offset) * rate / self.dft_size
+        self.dominant_amp = 2.0 * math.sqrt(max(0.0, powers[best])) / self.dft_size
+        self._s1 = [0.0] * len(self._coeffs)
+        self._s2 = [0.0] * len(self._coeffs)
+        self._block_n = 0
+        self._block_t = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        response = self.last_response
+        return {
+            "samples": self.samples,
+            "window_s": self.window_s,
+            "rms_error_deg": round(math.sqrt(self._mean_sq), 3),
+            "saturation": round(self._saturated, 4),
+            "dominant_hz": round(self.dominant_hz, 3),
+            "dominant_amp_deg": round(self.dominant_amp, 3),
+            "in_response": self._active,
+            "responses": self.responses,
+            "overshoot_deg": response["overshoot_deg"] if response else None,
+            "peak_deg": response["peak_deg"] if response else None,
+            "settling_s": response["settling_s"] if response else None,
+            "settled": response["settled"] if response else None,
+            "response_age_s": round(self._t - response["ended_t"], 3) if response else None,
+        }
@@ -0,0 +1,182 @@
+"""Parallel PID auto-tuner built on the batch simulator."""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .sim import evaluate_gains, np
+
+DEFAULT_BOUNDS = {"p": (0.0, 100.0), "i": (0.0, 5.0), "d": (0.0, 20.0)}
+
+
+def score(metrics: Dict[str, Any]):
+    """Lower is better: tracking error plus penalties for overshoot, slow
+    settling, actuator saturation and falling over."""
+    return (
+        metrics["rms_error"]
+        + 0.2 * metrics["overshoot"]
+        + 0.5 * metrics["settling_time"]
+        + 20.0 * metrics["saturation"]
+        + 1000.0 * metrics["fallen"]
+    )
+
+
+# How often the search thread wakes up to check for cancellation.
+CANCEL_POLL_S = 0.2
+
+
+def _evaluate_chunk(gains, duration_s: float, seed: int, sim_kwargs: Dict[str, Any]):
+    """Pool worker; module-level so forkserver/spawn workers can import it."""
+    metrics = evaluate_gains(gains, duration_s=duration_s, seed=seed, **sim_kwargs)
+    return gains, score(metrics), metrics
+
+
+def _pool_context():
+    # Forking the brick process would copy its live threads (control loop,
+    # publisher, bridge) mid-state, so workers start clean. They re-import the
+    # app's main module, which must keep its startup under __main__ but extend
+    # app_bricks.__path__ at import time (see main.py).
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class AutoTuner:
+    """Search PID gains on a process pool without blocking the caller.
+
+    Each round evaluates ``samples`` gain sets split into chunks across the
+    pool. The first round samples uniformly inside ``bounds``; later rounds
+    resample around the best candidates with a shrinking spread. Progress is
+    reported through ``on_progress`` after every finished chunk; ``cancel()``
+    is checked between chunks and drops every chunk not yet started.
+    """
+
+    def __init__(self, on_progress: Optional[Callable[[Dict[str, Any]], None]] = None, workers: Optional[int] = None):
+        self._on_progress = on_progress
+        # Leave a core for the control loop and WebUI.
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self._thread: Optional[threading.Thread] = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._status: Dict[str, Any] = {"state": "idle", "progress": 0.0, "evaluated": 0, "best": None}
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            status = dict(self._status)
+            if status.get("best"):
+                status["best"] = dict(status["best"])
+        return status
+
+    def best(self) -> Optional[Dict[str, Any]]:
+        return self.status().get("best")
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def start(
+        self,
+        bounds: Optional[Dict[str, Tuple[float, float]]] = None,
+        samples: int = 2000,
+        rounds: int = 3,
+        duration_s: float = 15.0,
+        seed: int = 0,
+        **sim_kwargs: Any,
+    ) -> bool:
+        """Begin a search in the background. Returns False if one is running."""
+        if np is None:
+            self._update(state="error", error="autotune requires numpy")
+            return False
+        if self.running:
+            return False
+        self._cancel.clear()
+        self._update(state="running", progress=0.0, evaluated=0, best=None, error=None, started=time.time())
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(dict(bounds or DEFAULT_BOUNDS), int(samples), int(rounds), float(duration_s), int(seed), sim_kwargs),
+            daemon=True,
+        )
+        self._thread.start()
+        return True
+
+    def _update(self, **changes: Any) -> None:
+        with self._lock:
+            self._status.update(changes)
+            snapshot = dict(self._status)
+        if self._on_progress:
+            try:
+                self._on_progress(snapshot)
+            except Exception:
+                pass
+
+    def _run(self, bounds, samples, rounds, duration_s, seed, sim_kwargs) -> None:
+        rng = np.random.default_rng(seed)
+        lo = np.array([bounds["p"][0], bounds["i"][0], bounds["d"][0]], dtype=np.float64)
+        hi = np.array([bounds["p"][1], bounds["i"][1], bounds["d"][1]], dtype=np.float64)
+        chunk = max(50, samples // (self.workers * 2))
+        total = samples * rounds
+        evaluated = 0
+        best_score = np.inf
+        best = None
+        elite = None
+        spread = (hi - lo) / 4.0
+
+        pool = None
+        try:
+            pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=_pool_context())
+            for rnd in range(rounds):
+                if elite is None:
+                    gains = rng.uniform(lo, hi, (samples, 3))
+                else:
+                    centers = elite[rng.integers(0, len(elite), samples)]
+                    gains = np.clip(centers + rng.normal(0.0, 1.0, (samples, 3)) * spread, lo, hi)
+                    spread = spread / 2.0
+                # Every chunk sees the same disturbance sequence so scores compare.
+                pending = {
+                    pool.submit(_evaluate_chunk, gains[k:k + chunk], duration_s, seed, sim_kwargs)
+                    for k in range(0, samples, chunk)
+                }
+                round_gains = []
+                round_scores = []
+                while pending:
+                    if self._cancel.is_set():
+                        self._update(state="cancelled")
+                        return
+                    done, pending = wait(pending, timeout=CANCEL_POLL_S, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        g, s, metrics = fut.result()
+                        round_gains.append(g)
+                        round_scores.append(s)
+                        evaluated += len(g)
+                        idx = int(np.argmin(s))
+                        if s[idx] < best_score:
+                            best_score = float(s[idx])
+                            best = {
+                                "p": round(float(g[idx, 0]), 4),
+                                "i": round(float(g[idx, 1]), 4),
+                                "d": round(float(g[idx, 2]), 4),
+                                "score": round(best_score, 4),
+                                "rms_error": round(float(metrics["rms_error"][idx]), 4),
+                                "overshoot": round(float(metrics["overshoot"][idx]), 4),
+                                "settling_time": round(float(metrics["settling_time"][idx]), 4),
+                                "saturation": round(float(metrics["saturation"][idx]), 4),
+                            }
+                        self._update(progress=round(evaluated / total, 4), evaluated=evaluated, round=rnd + 1, best=best)
+                all_gains = np.concatenate(round_gains)
+                all_scores = np.concatenate(round_scores)
+                keep = max(5, samples // 20)
+                elite = all_gains[np.argsort(all_scores)[:keep]]
+        except Exception as exc:
+            self._update(state="error", error=str(exc))
+            return
+        finally:
+            if pool is not None:
+                # Queued chunks are dropped; a cancelled search does not wait
+                # for the chunks already running.
+                pool.shutdown(wait=not self._cancel.is_set(), cancel_futures=True)
+        self._update(state="done", progress=1.0, finished=time.time())
@@ -0,0 +1,170 @@
+"""Non-blocking outbound command queue for Router Bridge notifications."""
+
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .scheduler import _percentile
+
+# (method, params, enqueued, attempts, build, on_fail)
+_Entry = Tuple[str, tuple, float, int, Optional[Callable], Optional[Callable]]
+
+
+class BridgeCommandQueue:
+    """Bounded queue of bridge notifications drained by a worker thread.
+
+    ``submit()`` never blocks: WebUI/HTTP handlers enqueue and return. Commands
+    with the same key coalesce, so only the latest ``set_pid`` (for example)
+    is sent. The worker checks bridge readiness, sends, and retries failures
+    with exponential backoff up to ``max_attempts``, then gives up and calls
+    the command's ``on_fail`` (if any). When the queue is full the oldest
+    pending command is dropped, also calling its ``on_fail``.
+
+    A ``build`` callable may be submitted instead of fixed params; it is
+    called on the worker right before each send attempt and returns
+    ``(method, params)`` or None when there is nothing left to send.
+    """
+
+    def __init__(
+        self,
+        notify: Callable[..., None],
+        ready: Callable[[], bool],
+        maxsize: int = 64,
+        retry_base_s: float = 0.05,
+        retry_max_s: float = 2.0,
+        max_attempts: int = 8,
+    ):
+        self._notify = notify
+        self._ready = ready
+        self.maxsize = max(1, int(maxsize))
+        self.retry_base_s = retry_base_s
+        self.retry_max_s = retry_max_s
+        self.max_attempts = max(1, int(max_attempts))
+
+        self._pending: "OrderedDict[Any, _Entry]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._unique = itertools.count()
+
+        self._latency = [0.0] * 256
+        self._latency_idx = 0
+        self._latency_n = 0
+        self.submitted = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.failed = 0
+        self.retries = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+
+    def submit(
+        self,
+        method: str,
+        *params: Any,
+        coalesce: bool = True,
+        build: Optional[Callable[[], Optional[Tuple[str, tuple]]]] = None,
+        on_fail: Optional[Callable[[], None]] = None,
+    ) -> bool:
+        """Queue ``method(*params)``; returns False if an older entry was dropped."""
+        key = method if coalesce else (method, next(self._unique))
+        evicted = None
+        with self._cond:
+            self.submitted += 1
+            if key in self._pending:
+                # Keep the original enqueue time so latency covers the wait.
+                _m, _p, enqueued, _attempts, _b, _f = self._pending.pop(key)
+                self.coalesced += 1
+            else:
+                enqueued = time.monotonic()
+                if len(self._pending) >= self.maxsize:
+                    _k, evicted = self._pending.popitem(last=False)
+                    self.dropped += 1
+            self._pending[key] = (method, params, enqueued, 0, build, on_fail)
+            self._cond.notify()
+        if evicted is not None:
+            _give_up(evicted[5])
+        return evicted is None
+
+    def _run(self) -> None:
+        backoff = 0.0
+        while not self._stop.is_set():
+            with self._cond:
+                while not self._pending and not self._stop.is_set():
+                    self._cond.wait()
+                if self._stop.is_set():
+                    return
+                key, (method, params, enqueued, attempts, build, on_fail) = self._pending.popitem(last=False)
+
+            try:
+                if not self._ready():
+                    raise ConnectionError("bridge not ready")
+                if build is not None:
+                    message = build()
+                    if message is None:
+                        continue
+                    method, params = message
+                self._notify(method, *params)
+            except Exception:
+                attempts += 1
+                if attempts >= self.max_attempts:
+                    self.failed += 1
+                    _give_up(on_fail)
+                    continue
+                self.retries += 1
+                with self._cond:
+                    # A newer submit for the same key supersedes this retry.
+                    if key not in self._pending:
+                        self._pending[key] = (method, params, enqueued, attempts, build, on_fail)
+                        self._pending.move_to_end(key, last=False)
+                backoff = min(self.retry_max_s, max(self.retry_base_s, backoff * 2.0))
+                self._stop.wait(backoff)
+                continue
+
+            backoff = 0.0
+            self.sent += 1
+            i = self._latency_idx
+            self._latency[i] = time.monotonic() - enqueued
+            self._latency_idx = (i + 1) % len(self._latency)
+            self._latency_n = min(self._latency_n + 1, len(self._latency))
+
+    def stats(self) -> Dict[str, Any]:
+        latency = sorted(self._latency[:self._latency_n])
+        return {
+            "depth": len(self._pending),
+            "submitted": self.submitted,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "retries": self.retries,
+            "latency_p50_ms": round(_percentile(latency, 0.50) * 1000.0, 3),
+            "latency_max_ms": round((latency[-1] if latency else 0.0) * 1000.0, 3),
+        }
+
+
+def _give_up(on_fail: Optional[Callable[[], None]]) -> None:
+    if on_fail is None:
+        return
+    try:
+        on_fail()
+    except Exception:
+        pass
@@ -0,0 +1,151 @@
+"""Versioned brick configuration: cached snapshots and the MCU ``apply_config`` message."""
+
+import json
+import random
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    from fastapi.responses import Response
+except ImportError:  # fastapi ships with the WebUI brick; plain dict otherwise.
+    Response = None
+
+# Wire keys in apply order: the IMU model must be set before the mode switch
+# (entering real mode re-initialises the IMU).
+FIELDS = ("p", "i", "d", "hz", "th", "sp", "imu", "axis", "sign", "mi", "ei", "raw", "mode")
+# Versions start at a per-process random base below this (the sketch parses
+# them as a signed long), so a restarted brick never reuses a version an
+# MCU that kept running already applied.
+VERSION_BASE_MAX = 1 << 30
+
+
+def _format(value: Any) -> str:
+    if isinstance(value, tuple):
+        return ",".join(_format(v) for v in value)
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+class FrozenDict(dict):
+    """A ``dict`` that rejects mutation, so JSON/socket.io encoders still accept it."""
+
+    def _readonly(self, *_args, **_kwargs):
+        raise TypeError("config snapshots are read-only; use the brick setters")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _readonly
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return FrozenDict((k, _freeze(v)) for k, v in value.items())
+    return value
+
+
+class ConfigSnapshot:
+    """Immutable view of the brick config at one ``version``.
+
+    Built once per change by the single writer; readers share the object,
+    its serialized ``json`` bytes and ``crc`` instead of rebuilding them, and
+    the control loop reads ``gains``/``setpoint`` with one attribute load.
+    """
+
+    __slots__ = ("version", "data", "json", "crc", "gains", "setpoint")
+
+    def __init__(self, version: int, data: Dict[str, Any]):
+        frozen = _freeze(data)
+        blob = json.dumps(frozen, separators=(",", ":")).encode("utf-8")
+        pid = frozen.get("pid", {})
+        for name, value in (
+            ("version", int(version)),
+            ("data", frozen),
+            ("json", blob),
+            ("crc", zlib.crc32(blob)),
+            ("gains", (float(pid.get("p", 0.0)), float(pid.get("i", 0.0)), float(pid.get("d", 0.0)))),
+            ("setpoint", float(frozen.get("setpoint", 0.0))),
+        ):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("ConfigSnapshot is immutable")
+
+    def response(self):
+        """Serve the cached JSON bytes from ``ui.expose_api`` (dict without fastapi)."""
+        if Response is None:
+            return self.data
+        return Response(self.json, media_type="application/json")
+
+
+class BridgeConfig:
+    """Tracks the configuration the MCU should have and what it has confirmed.
+
+    Every ``update()`` that changes something bumps ``version`` and stamps the
+    changed fields with it. The sketch echoes the last version it applied
+    (``ack``); ``message()`` then only carries fields newer than that, so
+    retries are idempotent. Acks only move forward within this instance's
+    versions (``base`` + n): a late, older ack is ignored, and anything
+    outside them (0 after an MCU reset, or a version from an earlier brick
+    run) resets ``acked`` to 0 so everything is resent.
+    """
+
+    def __init__(self, resend_after_s: float = 0.5, base: Optional[int] = None):
+        self.resend_after_s = resend_after_s
+        self.base = random.randrange(1, VERSION_BASE_MAX) if base is None else int(base)
+        self.version = self.base
+        self.acked = 0
+        self._values: Dict[str, Any] = {}
+        self._changed_at: Dict[str, int] = {}
+        self._sent_at = 0.0
+        self._lock = threading.Lock()
+
+    def update(self, **fields: Any) -> bool:
+        with self._lock:
+            changed = [k for k, v in fields.items() if self._values.get(k) != v]
+            if not changed:
+                return False
+            self.version += 1
+            for key in changed:
+                self._values[key] = fields[key]
+                self._changed_at[key] = self.version
+            return True
+
+    def ack(self, version: int) -> None:
+        version = int(version)
+        with self._lock:
+            if self.base < version <= self.version:
+                self.acked = max(self.acked, version)
+            else:
+                self.acked = 0
+
+    def send_failed(self) -> None:
+        """An ``apply_config`` was given up on: resend on the next stale ack."""
+        self._sent_at = 0.0
+
+    @property
+    def in_sync(self) -> bool:
+        return self.acked == self.version
+
+    def needs_resend(self, now: Optional[float] = None) -> bool:
+        """True when the MCU reports a stale version and no send is in flight."""
+        now = time.monotonic() if now is None else now
+        return not self.in_sync and now - self._sent_at >= self.resend_after_s
+
+    def message(self) -> Optional[Tuple[str, Tuple[Any, ...]]]:
+        """Build ``("apply_config", (version, "k=v;..."))`` for unacknowledged fields."""
+        with self._lock:
+            acked = self.acked
+            parts = [
+                f"{key}={_format(self._values[key])}"
+                for key in FIELDS
+                if key in self._values and self._changed_at.get(key, 0) > acked
+            ]
+            version = self.version
+        if not parts:
+            return None
+        self._sent_at = time.monotonic()
+        return "apply_config", (version, ";".join(parts))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"version": self.version, "acked": self.acked, "in_sync": self.in_sync}
@@ -0,0 +1,520 @@
+"""Python stand-in for ``sketch.ino`` behind a Router Bridge-shaped object.
+
+``EmulatedBridge`` has the ``provide``/``notify``/``call`` surface the brick
+uses, so ``BalancingRobot.attach_bridge(EmulatedBridge())`` exercises the
+real-mode path (bridge readiness, the command queue, ``apply_config`` acks,
+batch ingestion, raw IMU) on any Linux box:
+
+- every method the sketch provides (``apply_config``, ``set_pid``,
+  ``set_control_rate``, ``set_telemetry_rate``, ``set_raw_imu``,
+  ``set_mode``, ``motor_test``, ``get_status``, ...) is implemented with the
+  sketch's clamps and its ``get_status`` string;
+- an MCU thread replays ``loop()``: the PID runs every control period (with
+  PID_v1's per-sample gain scaling), telemetry is sampled every telemetry
+  period and flushed as v3 ``record_telemetry_batch`` after 8 samples or
+  50 ms, or pushed one ``record_telemetry`` call per sample with
+  ``protocol="single"``. Raw IMU batches are sent when enabled in real mode;
+- in ``"sim"`` mode the angle is the sketch's placeholder sine. In
+  ``"real"`` mode a virtual MPU on the plant of ``sim.BatchSimulator``
+  (rescaled to the control period) feeds the sketch's 0.98/0.02 filter, and
+  the PID output acts on it;
+- every message in either direction goes through a link thread with
+  ``latency_s`` + uniform ``jitter_s`` delay and is lost with probability
+  ``drop_rate``. A dropped ``call`` raises ``TimeoutError``.
+
+``max_telemetry_hz`` (the sketch's 500 by default) can be raised for load
+tests beyond what the hardware sends.
+"""
+
+import heapq
+import itertools
+import math
+import random
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .protocol import encode_imu_raw_batch, encode_telemetry_batch
+
+CONTROL_HZ_MIN = 50
+CONTROL_HZ_MAX = 500
+TELEMETRY_HZ_MIN = 10
+TELEMETRY_HZ_MAX = 500
+TELEMETRY_BATCH_SIZE = 8
+IMU_RAW_BATCH_MAX = 16
+FLUSH_S = 0.05
+PWM_LIMIT = 255.0
+ACCEL_LSB_PER_G = 16384.0
+GYRO_LSB_PER_DPS = 131.0
+# The BatchSimulator plant is written per 20 ms tick.
+PLANT_DT = 0.02
+PROTOCOLS = ("batch", "single")
+
+
+def _period(hz, lo: float, hi: float) -> float:
+    """``periodForHz`` from the sketch, in seconds."""
+    try:
+        hz = int(hz)
+    except (ValueError, TypeError):
+        hz = int(lo)
+    return 1.0 / max(lo, min(hi, hz))
+
+
+class EmulatedBridge:
+    """Emulates the sketch on the far side of a lossy, delayed link."""
+
+    def __init__(
+        self,
+        protocol: str = "batch",
+        control_hz: int = 200,
+        telemetry_hz: int = 200,
+        latency_s: float = 0.0,
+        jitter_s: float = 0.0,
+        drop_rate: float = 0.0,
+        imu_present: bool = True,
+        control_gain: float = 0.05,
+        noise: float = 0.5,
+        max_telemetry_hz: int = TELEMETRY_HZ_MAX,
+        seed: Optional[int] = None,
+    ):
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"unknown protocol: {protocol}")
+        self.protocol = protocol
+        self.latency_s = max(0.0, float(latency_s))
+        self.jitter_s = max(0.0, float(jitter_s))
+        self.drop_rate = max(0.0, min(1.0, float(drop_rate)))
+        self.imu_present = bool(imu_present)
+        self.control_gain = float(control_gain)
+        self.noise = float(noise)
+        self.max_telemetry_hz = max(TELEMETRY_HZ_MIN, int(max_telemetry_hz))
+        self._rng = random.Random(seed)
+
+        self._provided: Dict[str, Callable] = {}
+        self._methods: Dict[str, Callable] = {
+            "apply_config": self.apply_config,
+            "set_pid": self.set_pid,
+            "set_control_rate": self.set_control_rate,
+            "set_telemetry_rate": self.set_telemetry_rate,
+            "set_raw_imu": self.set_raw_imu,
+            "set_setpoint": self.set_setpoint,
+            "set_mode": self.set_mode,
+            "set_imu_model": self.set_imu_model,
+            "set_axis_mode": self.set_axis_mode,
+            "set_axis_sign": self.set_axis_sign,
+            "set_motor_invert": self.set_motor_invert,
+            "set_encoder_invert": self.set_encoder_invert,
+            "motor_test": self.motor_test,
+            "stop_motor_test": self.stop_motor_test,
+            "kick": self.kick,
+            "get_status": self.get_status,
+        }
+        # Serializes MCU state between the control thread and inbound commands.
+        self._lock = threading.Lock()
+        self._link: List[Tuple[float, int, str, Callable, tuple]] = []
+        self._link_cond = threading.Condition()
+        self._order = itertools.count()
+        self._stop = threading.Event()
+        self._mcu_thread: Optional[threading.Thread] = None
+        self._link_thread: Optional[threading.Thread] = None
+        self._boot = time.monotonic()
+
+        self.sent: Counter = Counter()
+        self.received: Counter = Counter()
+        self.dropped: Counter = Counter()
+        self.unknown: Counter = Counter()
+        self.errors = 0
+
+        # Sketch state.
+        self.kp, self.ki, self.kd = 12.0, 0.0, 0.4
+        self.control_period = _period(control_hz, CONTROL_HZ_MIN, CONTROL_HZ_MAX)
+        self.telemetry_period = _period(telemetry_hz, TELEMETRY_HZ_MIN, self.max_telemetry_hz)
+        self.setpoint = 0.0
+        self.simulated = True
+        self.imu_ready = False
+        self.imu_model = "mpu6050"
+        self.axis_mode = "pitch"
+        self.axis_sign = 1
+        self.motor_invert = (1, 1)
+        self.encoder_invert = (1, 1)
+        self.raw_imu = False
+        self.config_version = 0
+        self._motor_test = (0, 0)
+        self._motor_test_until = 0.0
+
+        self._input = 0.0
+        self._output = 0.0
+        self._iterm = 0.0
+        self._last_input = 0.0
+        self._phase = 0.0
+        self._gyro = 0.0
+        self._accel_g = 0.0
+        self._estimate = 0.0
+        self._last_imu_us: Optional[int] = None
+        self._angle = 8.0
+        self._rate = 0.0
+        self._enc = [0.0, 0.0]
+
+        self._batch: List[tuple] = []
+        self._batch_flushed = 0.0
+        self._raw: List[tuple] = []
+        self._raw_flushed = 0.0
+        self._control_ticks = 0
+        self._control_window = 0.0
+        self._control_window_max = 0.0
+        self.control_hz = 0
+        self.control_max_us = 0
+
+    # --- Router Bridge surface used by the brick ---
+
+    def provide(self, name: str, fn: Callable) -> None:
+        self._provided[name] = fn
+
+    def notify(self, method: str, *params: Any) -> None:
+        """Deliver ``method(*params)`` to the emulated sketch after the link delay."""
+        self.sent[method] += 1
+        fn = self._methods.get(method)
+        if fn is None:
+            self.unknown[method] += 1
+            return
+        self._transmit(method, fn, params)
+
+    def call(self, method: str, *params: Any, timeout: float = 1.0) -> Any:
+        """Round trip to the sketch; raises ``TimeoutError`` when the link drops it."""
+        self.sent[method] += 1
+        fn = self._methods.get(method)
+        if fn is None:
+            raise RuntimeError(f"method {method} not provided")
+        delay = self._delay() + self._delay()
+        if self._lost():
+            self.dropped[method] += 1
+            time.sleep(max(0.0, float(timeout)))
+            raise TimeoutError(f"{method} timed out")
+        time.sleep(min(delay, max(0.0, float(timeout))))
+        self.received[method] += 1
+        return fn(*params)
+
+    # --- Lifecycle ---
+
+    @property
+    def running(self) -> bool:
+        return self._mcu_thread is not None and self._mcu_thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._mcu_thread = threading.Thread(target=self._run_mcu, daemon=True)
+        self._link_thread = threading.Thread(target=self._run_link, daemon=True)
+        self._link_thread.start()
+        self._mcu_thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._link_cond:
+            self._link_cond.notify_all()
+        for thread in (self._mcu_thread, self._link_thread):
+            if thread:
+                thread.join(timeout=2.0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "protocol": self.protocol,
+            "control_hz": self.control_hz,
+            "control_max_us": self.control_max_us,
+            "telemetry_hz": round(1.0 / self.telemetry_period, 1),
+            "config_version": self.config_version,
+            "status": self.get_status(),
+            "sent": dict(self.sent),
+            "received": dict(self.received),
+            "dropped": dict(self.dropped),
+            "unknown": dict(self.unknown),
+            "errors": self.errors,
+            "in_flight": len(self._link),
+        }
+
+    # --- Sketch methods (Bridge.provide in setup()) ---
+
+    def set_pid(self, p, i, d) -> None:
+        with self._lock:
+            self.kp, self.ki, self.kd = float(p), float(i), float(d)
+
+    def set_control_rate(self, hz) -> None:
+        with self._lock:
+            self.control_period = _period(hz, CONTROL_HZ_MIN, CONTROL_HZ_MAX)
+
+    def set_telemetry_rate(self, hz) -> None:
+        with self._lock:
+            self.telemetry_period = _period(hz, TELEMETRY_HZ_MIN, self.max_telemetry_hz)
+
+    def set_raw_imu(self, enabled) -> None:
+        with self._lock:
+            self.raw_imu = int(enabled) != 0
+            if not self.raw_imu:
+                self._raw = []
+
+    def set_setpoint(self, sp) -> None:
+        with self._lock:
+            self.setpoint = float(sp)
+
+    def set_mode(self, mode) -> None:
+        with self._lock:
+            self.simulated = str(mode) != "real" or not self.imu_present
+            self.imu_ready = not self.simulated
+
+    def set_imu_model(self, model) -> None:
+        with self._lock:
+            self.imu_model = str(model)[:7]
+
+    def set_axis_mode(self, mode) -> None:
+        with self._lock:
+            self.axis_mode = "roll" if str(mode) == "roll" else "pitch"
+
+    def set_axis_sign(self, sign) -> None:
+        with self._lock:
+            self.axis_sign = -1 if int(sign) < 0 else 1
+
+    def set_motor_invert(self, left, right) -> None:
+        with self._lock:
+            self.motor_invert = (-1 if int(left) < 0 else 1, -1 if int(right) < 0 else 1)
+
+    def set_encoder_invert(self, left, right) -> None:
+        with self._lock:
+            self.encoder_invert = (-1 if int(left) < 0 else 1, -1 if int(right) < 0 else 1)
+
+    def motor_test(self, left_pwm, right_pwm, duration_ms) -> None:
+        with self._lock:
+            self._motor_test = (int(left_pwm), int(right_pwm))
+            self._motor_test_until = time.monotonic() + int(duration_ms) / 1000.0
+
+    def stop_motor_test(self) -> None:
+        with self._lock:
+            self._motor_test = (0, 0)
+            self._motor_test_until = 0.0
+
+    def kick(self, angle) -> None:
+        with self._lock:
+            if self.simulated:
+                self._input = float(angle)
+
+    def apply_config(self, version, fields) -> None:
+        """Apply the ``k=v;...`` fields present, then record ``version``."""
+        for part in str(fields).split(";"):
+            key, sep, value = part.partition("=")
+            if not sep:
+                continue
+            try:
+                if key in ("p", "i", "d"):
+                    with self._lock:
+                        setattr(self, "k" + key, float(value))
+                elif key == "hz":
+                    self.set_control_rate(value)
+                elif key == "th":
+                    self.set_telemetry_rate(value)
+                elif key == "sp":
+                    self.set_setpoint(value)
+                elif key == "imu":
+                    self.set_imu_model(value)
+                elif key == "axis":
+                    self.set_axis_mode(value)
+                elif key == "sign":
+                    self.set_axis_sign(value)
+                elif key in ("mi", "ei"):
+                    left, _, right = value.partition(",")
+                    setter = self.set_motor_invert if key == "mi" else self.set_encoder_invert
+                    setter(left, right or left)
+                elif key == "raw":
+                    self.set_raw_imu(value)
+                elif key == "mode":
+                    self.set_mode(value)
+            except (ValueError, TypeError):
+                # String::toInt()/toDouble() would read 0; ignoring is close enough.
+                continue
+        with self._lock:
+            self.config_version = int(version) & 0xFFFFFFFF
+
+    def get_status(self) -> str:
+        mode = "sim" if self.simulated else "real"
+        ready = "ready" if self.imu_ready else "noimu"
+        return f"ok:{mode}:{ready}:{self.imu_model}:{self.axis_mode}:{self.axis_sign}:v{self.config_version}"
+
+    # --- Link ---
+
+    def _delay(self) -> float:
+        return self.latency_s + (self._rng.uniform(0.0, self.jitter_s) if self.jitter_s else 0.0)
+
+    def _lost(self) -> bool:
+        return self.drop_rate > 0.0 and self._rng.random() < self.drop_rate
+
+    def _transmit(self, method: str, fn: Callable, params: tuple) -> None:
+        if self._lost():
+            self.dropped[method] += 1
+            return
+        due = time.monotonic() + self._delay()
+        with self._link_cond:
+            heapq.heappush(self._link, (due, next(self._order), method, fn, params))
+            self._link_cond.notify()
+
+    def _push(self, method: str, *params: Any) -> None:
+        """Send a sketch notification to the brick callback ``method``."""
+        self.sent[method] += 1
+        fn = self._provided.get(method)
+        if fn is None:
+            self.unknown[method] += 1
+            return
+        self._transmit(method, fn, params)
+
+    def _run_link(self) -> None:
+        while not self._stop.is_set():
+            with self._link_cond:
+                while not self._stop.is_set():
+                    if self._link:
+                        wait = self._link[0][0] - time.monotonic()
+                        if wait <= 0:
+                            break
+                    else:
+                        wait = None
+                    self._link_cond.wait(wait)
+                if self._stop.is_set():
+                    return
+                _due, _order, method, fn, params = heapq.heappop(self._link)
+            try:
+                fn(*params)
+                self.received[method] += 1
+            except Exception:
+                self.errors += 1
+
+    # --- MCU loop() ---
+
+    def _micros(self, now: float) -> int:
+        return int((now - self._boot) * 1e6) & 0xFFFFFFFF
+
+    def _run_mcu(self) -> None:
+        now = time.monotonic()
+        next_control = now
+        next_telemetry = now
+        self._batch_flushed = self._raw_flushed = self._control_window = now
+        while not self._stop.is_set():
+            now = time.monotonic()
+            with self._lock:
+                if now >= next_control:
+                    # Advance by whole periods; resync half a period late, like the sketch.
+                    if now - next_control >= self.control_period / 2:
+                        next_control = now
+                    next_control += self.control_period
+                    self._control_step(now)
+                if now >= next_telemetry:
+                    next_telemetry = now + self.telemetry_period
+                    self._queue_telemetry(now)
+                if self._batch and now - self._batch_flushed >= FLUSH_S:
+                    self._flush_telemetry(now)
+                if self._raw and now - self._raw_flushed >= FLUSH_S:
+                    self._flush_raw(now)
+                wake = min(next_control, next_telemetry)
+            self._stop.wait(max(0.0, wake - time.monotonic()))
+
+    def _control_step(self, now: float) -> None:
+        started = time.perf_counter()
+        dt = self.control_period
+        if self.simulated:
+            self._phase += 0.03
+            self._input = 10.0 * math.sin(self._phase)
+            self._gyro = 0.0
+            self._accel_g = 0.0
+        else:
+            self._step_plant(dt)
+            self._read_imu(now)
+
+        # PID_v1 Compute() with the sketch's gains folded into the period.
+        error = self.setpoint - self._input
+        self._iterm = max(-PWM_LIMIT, min(PWM_LIMIT, self._iterm + self.ki * dt * error))
+        d_input = self._input - self._last_input
+        out = self.kp * error + self._iterm - self.kd / dt * d_input
+        self._output = max(-PWM_LIMIT, min(PWM_LIMIT, out))
+        self._last_input = self._input
+
+        if self._motor_test_until:
+            if now > self._motor_test_until:
+                self._motor_test = (0, 0)
+                self._motor_test_until = 0.0
+                left = right = self._output
+            else:
+                left, right = self._motor_test
+        else:
+            left = right = self._output
+        # Encoders count roughly with PWM; invert flags apply as on the MCU.
+        self._enc[0] += left * self.motor_invert[0] * dt * 4.0
+        self._enc[1] += right * self.motor_invert[1] * dt * 4.0
+
+        took = time.perf_counter() - started
+        self._control_window_max = max(self._control_window_max, took)
+        self._control_ticks += 1
+        window = now - self._control_window
+        if window >= 1.0:
+            self.control_hz = int(round(self._control_ticks / window))
+            self.control_max_us = min(0xFFFF, int(self._control_window_max * 1e6))
+            self._control_ticks = 0
+            self._control_window_max = 0.0
+            self._control_window = now
+
+    def _step_plant(self, dt: float) -> None:
+        scale = dt / PLANT_DT
+        noise = self._rng.uniform(-self.noise, self.noise)
+        self._rate += scale * (-0.25 * self._angle - 0.03 * self._rate + noise + self.control_gain * self._output)
+        self._angle += self._rate * dt
+        if abs(self._angle) > 90.0:
+            # Fallen over: lie on the floor rather than spin.
+            self._angle = math.copysign(90.0, self._angle)
+            self._rate = 0.0
+
+    def _read_imu(self, now: float) -> None:
+        """Virtual MPU registers for the plant, through ``readImuFiltered``."""
+        rad = math.radians(self._angle)
+        along = int(max(-32768, min(32767, math.sin(rad) * ACCEL_LSB_PER_G)))
+        az = int(max(-32768, min(32767, math.cos(rad) * ACCEL_LSB_PER_G)))
+        rate = int(max(-32768, min(32767, self._rate * GYRO_LSB_PER_DPS)))
+        if self.axis_mode == "roll":
+            ax, ay, gx, gy = along, 0, 0, rate
+        else:
+            ax, ay, gx, gy = 0, along, rate, 0
+        accel_angle = math.degrees(math.atan2(along, az))
+        gyro = rate / GYRO_LSB_PER_DPS
+        stamp = self._micros(now)
+        dt = 0.0 if self._last_imu_us is None else ((stamp - self._last_imu_us) & 0xFFFFFFFF) / 1e6
+        self._last_imu_us = stamp
+        self._estimate = 0.98 * (self._estimate + gyro * dt) + 0.02 * accel_angle
+        self._input = self._estimate * self.axis_sign
+        self._gyro = gyro * self.axis_sign
+        self._accel_g = math.sqrt(ax * ax + ay * ay + az * az) / ACCEL_LSB_PER_G
+        if self.raw_imu:
+            self._raw.append((stamp, ax, ay, az, 0, gx, gy, 0, self._input))
+            if len(self._raw) >= IMU_RAW_BATCH_MAX:
+                self._flush_raw(now)
+
+    def _queue_telemetry(self, now: float) -> None:
+        enc_l = int(self._enc[0]) * self.encoder_invert[0]
+        enc_r = int(self._enc[1]) * self.encoder_invert[1]
+        pwm = int(self._output)
+        if self.protocol == "single":
+            mode = "sim" if self.simulated else "real"
+            self._push("record_telemetry", self._input, self._gyro, self._accel_g, pwm, enc_l, enc_r, mode, self.imu_model)
+            return
+        millis = int((now - self._boot) * 1000.0) & 0xFFFFFFFF
+        self._batch.append((millis, self._input, self._gyro, self._accel_g, pwm, enc_l, enc_r))
+        if len(self._batch) >= TELEMETRY_BATCH_SIZE:
+            self._flush_telemetry(now)
+
+    def _flush_telemetry(self, now: float) -> None:
+        payload = encode_telemetry_batch(
+            self._batch, 0, self.config_version, self.control_hz, self.control_max_us
+        )
+        self._batch = []
+        self._batch_flushed = now
+        self._push("record_telemetry_batch", payload)
+
+    def _flush_raw(self, now: float) -> None:
+        payload = encode_imu_raw_batch(self._raw)
+        self._raw = []
+        self._raw_flushed = now
+        self._push("record_imu_raw_batch", payload)
@@ -0,0 +1,17 @@
+import time
+from arduino.app_utils import App
+from arduino.app_bricks.web_ui import WebUI
+from arduino.app_bricks.balancing_robot import BalancingRobot, RobotHost
+
+ui = WebUI(port=7000)
+
+# One scheduler thread for the whole class: bot0 ... bot23.
+host = RobotHost(update_hz=50, publish_hz=10)
+for k in range(24):
+    host.add(f"bot{k}", BalancingRobot(imu_model="mpu6050", simulated=True, history_seconds=60))
+host.attach_webui(ui)
+host.start()
+
+# Per-robot endpoints: /bot0/status, /bot0/set_pid, ... ; aggregate: /host_stats
+ui.start()
+App.run(user_loop=lambda: time.sleep(1))
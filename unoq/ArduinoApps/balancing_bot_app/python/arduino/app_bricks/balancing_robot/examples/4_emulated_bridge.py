@@ -0,0 +1,23 @@
+import time
+from arduino.app_utils import App
+from arduino.app_bricks.web_ui import WebUI
+from arduino.app_bricks.balancing_robot import BalancingRobot
+from arduino.app_bricks.balancing_robot.emulator import EmulatedBridge
+
+ui = WebUI(port=7000)
+
+# A stand-in for sketch.ino: 500 Hz telemetry over a link with 5 +- 5 ms delay and 1% loss.
+mcu = EmulatedBridge(control_hz=500, telemetry_hz=500, latency_s=0.005, jitter_s=0.005, drop_rate=0.01)
+mcu.start()
+
+bot = BalancingRobot(imu_model="mpu6050", simulated=False, update_hz=200)
+bot.attach_webui(ui)
+bot.attach_bridge(mcu)
+bot.start()
+bot.http_set_mode("real")
+
+# Emulator counters next to the brick's own /metrics.
+ui.expose_api("GET", "/emulator", lambda: mcu.stats())
+
+ui.start()
+App.run(user_loop=lambda: time.sleep(1))
@@ -0,0 +1,116 @@
+"""Chunked telemetry export (``/export``) for analysis notebooks.
+
+Rows come from the in-memory ``TelemetryHistory`` or from a recorded session
+(``replay.SegmentSource``/``CsvSource``) ``rows`` at a time, and each chunk is
+encoded and handed to the HTTP response before the next one is read, so
+memory stays at one chunk however long the export is:
+
+- ``csv``: a header row (``seq,ts`` + the selected fields) followed by one
+  line per sample. The column names match what ``CsvSource`` replays;
+- ``npz``: a zip of ``block_00000.npy``, ``block_00001.npy``, ... each a
+  structured array with ``seq``, ``ts`` and the selected fields. Load it
+  with ``np.concatenate([z[k] for k in sorted(z.files)])``.
+
+With fastapi the chunks are wrapped in a ``StreamingResponse``; Starlette
+iterates a plain generator in its worker thread pool, so the export never
+runs on the control or publisher threads. History reads take no lock.
+"""
+
+import io
+import zipfile
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .history import HISTORY_FIELDS, np
+
+try:
+    from fastapi.responses import StreamingResponse
+except ImportError:  # fastapi ships with the WebUI brick; plain bytes otherwise.
+    StreamingResponse = None
+
+FORMATS = ("csv", "npz")
+CHUNK_ROWS = 4096
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "npz": "application/zip"}
+# pwm and encoder counts are integers in every source.
+_INT_FIELDS = ("pwm", "enc_left", "enc_right")
+
+
+def export_fields(fields: Optional[Iterable[str]]) -> List[str]:
+    """Requested fields in ``HISTORY_FIELDS`` order (all of them when none match)."""
+    wanted = set(fields or ())
+    return [name for name in HISTORY_FIELDS if name in wanted] or list(HISTORY_FIELDS)
+
+
+def history_blocks(history, start, end, names: Sequence[str], rows: int = CHUNK_ROWS):
+    """``(seq, ts, columns)`` chunks from a ``TelemetryHistory``."""
+    for seq, ts, data in history.blocks(start, end, rows, names):
+        if seq.size:
+            yield seq, ts, list(data)
+
+
+def source_blocks(source, start, end, names: Sequence[str], rows: int = CHUNK_ROWS):
+    """``(seq, ts, columns)`` chunks from a replay source; closes it when done."""
+    try:
+        for records in source.blocks(start, end, rows):
+            yield records["seq"], records["ts"], [records[name] for name in names]
+    finally:
+        source.close()
+
+
+def csv_chunks(blocks, names: Sequence[str]) -> Iterator[bytes]:
+    line = ",".join(["%d", "%.6f"] + ["%d" if name in _INT_FIELDS else "%.6g" for name in names]) + "\n"
+    yield (",".join(["seq", "ts", *names]) + "\n").encode()
+    for seq, ts, columns in blocks:
+        # One %-format over the whole chunk is several times faster than savetxt.
+        values = np.column_stack([seq, ts, *columns]).ravel().tolist()
+        yield ((line * len(seq)) % tuple(values)).encode()
+
+
+class _Chunks:
+    """Write-only sink that hands out what was written since the last take."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def npz_chunks(blocks, names: Sequence[str]) -> Iterator[bytes]:
+    dtype = np.dtype(
+        [("seq", "<i8"), ("ts", "<f8")] + [(name, "<i4" if name in _INT_FIELDS else "<f4") for name in names]
+    )
+    sink = _Chunks()
+    # No tell()/seek() on the sink: zipfile streams with data descriptors.
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED) as archive:
+        for k, (seq, ts, columns) in enumerate(blocks):
+            block = np.empty(seq.shape[0], dtype=dtype)
+            block["seq"] = seq
+            block["ts"] = ts
+            for name, column in zip(names, columns):
+                block[name] = column
+            buf = io.BytesIO()
+            np.lib.format.write_array(buf, block, allow_pickle=False)
+            archive.writestr(f"block_{k:05d}.npy", buf.getvalue())
+            yield sink.take()
+    yield sink.take()
+
+
+def encode(blocks, names: Sequence[str], fmt: str) -> Iterator[bytes]:
+    return npz_chunks(blocks, names) if fmt == "npz" else csv_chunks(blocks, names)
+
+
+def response(chunks: Iterator[bytes], fmt: str, filename: str):
+    """Wrap export chunks for ``ui.expose_api`` (joined bytes without fastapi)."""
+    if StreamingResponse is None:
+        return b"".join(chunks)
+    headers: Dict[str, Any] = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    return StreamingResponse(chunks, media_type=MEDIA_TYPES[fmt], headers=headers)
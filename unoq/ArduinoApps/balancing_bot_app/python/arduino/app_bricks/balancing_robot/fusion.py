@@ -0,0 +1,276 @@
+"""Python-side IMU fusion for raw MPU-6050/9250 samples.
+
+In raw mode (``set_raw_imu``) the sketch also sends every IMU read it makes
+in the control step as ``record_imu_raw_batch``: the 14 register bytes, a
+``micros()`` timestamp and the angle its own 0.98/0.02 complementary filter
+produced (layout in ``protocol.py``). ``ImuFusion`` turns each batch into
+accelerometer angle and gyro rate with NumPy, runs the selected filter over
+it and keeps raw, MCU-fused and brick-fused columns side by side in a ring,
+so estimators can be compared on live data without reflashing.
+
+- ``complementary``: ``angle = alpha * (angle + gyro * dt) + (1 - alpha) * accel``.
+  This is a first-order linear recursion, so a batch is evaluated in closed
+  form with ``cumsum`` instead of a Python loop;
+- ``kalman``: the usual two-state (angle, gyro bias) filter. Its covariance
+  update is inherently sequential, so only the sensor conversion is
+  vectorized and the 2x2 update runs over plain floats.
+"""
+
+import math
+import threading
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; raw IMU fusion needs it.
+    np = None
+
+# Default MPU full-scale ranges (+-2 g, +-250 dps), as used by the sketch.
+ACCEL_LSB_PER_G = 16384.0
+GYRO_LSB_PER_DPS = 131.0
+
+FILTERS = ("complementary", "kalman")
+DEFAULT_FUSION = {
+    "filter": "complementary",
+    "alpha": 0.98,
+    "q_angle": 0.001,
+    "q_bias": 0.003,
+    "r_measure": 0.03,
+}
+
+RAW_FIELDS = ("ax", "ay", "az", "gx", "gy", "gz")
+IMU_FIELDS = RAW_FIELDS + ("accel_angle", "gyro_dps", "mcu_angle", "fused_angle")
+
+
+def imu_axes(samples, axis_mode: str = "pitch", axis_sign: int = 1):
+    """Accelerometer angle (deg) and gyro rate (dps) of the balance axis.
+
+    Mirrors ``readImuFiltered`` in the sketch: pitch uses accel Y/Z and gyro
+    X, roll uses accel X/Z and gyro Y. The sign is applied to both inputs,
+    which for these linear filters equals signing the output.
+    """
+    az = samples["az"].astype(np.float64)
+    if axis_mode == "roll":
+        accel = np.degrees(np.arctan2(samples["ax"].astype(np.float64), az))
+        gyro = samples["gy"] / GYRO_LSB_PER_DPS
+    else:
+        accel = np.degrees(np.arctan2(samples["ay"].astype(np.float64), az))
+        gyro = samples["gx"] / GYRO_LSB_PER_DPS
+    if axis_sign < 0:
+        accel = -accel
+        gyro = -gyro
+    return accel, gyro
+
+
+class ComplementaryFilter:
+    def __init__(self, alpha: float = 0.98):
+        self.alpha = max(0.0, min(0.9999, float(alpha)))
+        self.angle: Optional[float] = None
+
+    def reset(self) -> None:
+        self.angle = None
+
+    def run(self, dt, gyro, accel):
+        """Filter one batch; returns the angle after every sample."""
+        n = int(accel.shape[0])
+        if n == 0:
+            return np.empty(0)
+        a = self.alpha
+        if a <= 0.0:
+            self.angle = float(accel[-1])
+            return accel.astype(np.float64)
+        prev = float(accel[0]) if self.angle is None else self.angle
+        # x_k = a * x_(k-1) + u_k  =>  x_k = a^k * (x_0 + sum_j u_j / a^j).
+        # Chunks keep a^-k far from overflow for small alpha.
+        u = a * gyro * dt + (1.0 - a) * accel
+        out = np.empty(n)
+        chunk = max(1, min(n, int(100.0 / -math.log10(a))))
+        for start in range(0, n, chunk):
+            seg = u[start : start + chunk]
+            powers = a ** np.arange(1, seg.shape[0] + 1)
+            out[start : start + seg.shape[0]] = powers * (prev + np.cumsum(seg / powers))
+            prev = float(out[start + seg.shape[0] - 1])
+        self.angle = prev
+        return out
+
+
+class KalmanFilter:
+    def __init__(self, q_angle: float = 0.001, q_bias: float = 0.003, r_measure: float = 0.03):
+        self.q_angle = max(1e-9, float(q_angle))
+        self.q_bias = max(1e-9, float(q_bias))
+        self.r_measure = max(1e-9, float(r_measure))
+        self.reset()
+
+    def reset(self) -> None:
+        self.angle: Optional[float] = None
+        self.bias = 0.0
+        self._p = [0.0, 0.0, 0.0, 0.0]
+
+    def run(self, dt, gyro, accel):
+        n = int(accel.shape[0])
+        if n == 0:
+            return np.empty(0)
+        if self.angle is None:
+            self.angle = float(accel[0])
+        angle, bias = self.angle, self.bias
+        p00, p01, p10, p11 = self._p
+        q_angle, q_bias, r = self.q_angle, self.q_bias, self.r_measure
+        out = [0.0] * n
+        for k, (h, rate, measured) in enumerate(zip(dt.tolist(), gyro.tolist(), accel.tolist())):
+            angle += h * (rate - bias)
+            p00 += h * (h * p11 - p01 - p10 + q_angle)
+            p01 -= h * p11
+            p10 -= h * p11
+            p11 += q_bias * h
+            s = p00 + r
+            k0, k1 = p00 / s, p10 / s
+            y = measured - angle
+            angle += k0 * y
+            bias += k1 * y
+            p00, p01, p10, p11 = p00 - k0 * p00, p01 - k0 * p01, p10 - k1 * p00, p11 - k1 * p01
+            out[k] = angle
+        self.angle, self.bias = angle, bias
+        self._p = [p00, p01, p10, p11]
+        return np.asarray(out)
+
+
+def make_filter(settings: Dict[str, Any]):
+    if settings.get("filter") == "kalman":
+        return KalmanFilter(settings.get("q_angle", 0.001), settings.get("q_bias", 0.003), settings.get("r_measure", 0.03))
+    return ComplementaryFilter(settings.get("alpha", 0.98))
+
+
+def sample_dt(mcu_us, last_us: Optional[int] = None):
+    """Seconds between consecutive ``micros()`` stamps (u32 wrap-safe)."""
+    stamps = mcu_us.astype(np.int64)
+    prev = np.empty_like(stamps)
+    prev[1:] = stamps[:-1]
+    prev[0] = stamps[0] if last_us is None else last_us
+    return ((stamps - prev) & 0xFFFFFFFF) / 1e6
+
+
+class ImuFusion:
+    """Fuses raw IMU batches and keeps the last ``capacity`` samples.
+
+    One writer (the bridge callback) calls ``ingest``; readers query from
+    other threads without locking, like ``TelemetryHistory``.
+    """
+
+    def __init__(self, capacity: int, settings: Optional[Dict[str, Any]] = None):
+        if np is None:
+            raise RuntimeError("ImuFusion requires numpy")
+        self.capacity = max(16, int(capacity))
+        self.fields = IMU_FIELDS
+        self._index = {name: i for i, name in enumerate(self.fields)}
+        self._us = np.zeros(self.capacity, dtype=np.int64)
+        self._ts = np.zeros(self.capacity, dtype=np.float64)
+        self._data = np.zeros((len(self.fields), self.capacity), dtype=np.float32)
+        self._head = 0
+        self._count = 0
+        self._last_us: Optional[int] = None
+        self._lock = threading.Lock()
+        self.settings = dict(DEFAULT_FUSION)
+        self._filter = make_filter(self.settings)
+        self.configure(settings or {})
+
+        self.samples = 0
+        self.batches = 0
+        self.rate_hz = 0.0
+        # Exponentially weighted mean square of (fused - MCU angle).
+        self._diff_sq = 0.0
+
+    def configure(self, settings: Dict[str, Any]) -> None:
+        """Apply new filter settings; the new filter starts from the next batch."""
+        merged = dict(self.settings)
+        merged.update({k: v for k, v in settings.items() if k in DEFAULT_FUSION})
+        if merged == self.settings:
+            return
+        with self._lock:
+            self.settings = merged
+            self._filter = make_filter(merged)
+
+    def ingest(self, samples, ts, axis_mode: str = "pitch", axis_sign: int = 1):
+        """Fuse one decoded batch; ``ts`` are wall-clock times per sample."""
+        n = int(samples.shape[0])
+        if n == 0:
+            return None
+        accel, gyro = imu_axes(samples, axis_mode, axis_sign)
+        dt = sample_dt(samples["mcu_us"], self._last_us)
+        with self._lock:
+            fused = self._filter.run(dt, gyro, accel)
+        self._last_us = int(samples["mcu_us"][-1])
+
+        columns = np.empty((len(self.fields), n), dtype=np.float32)
+        for i, name in enumerate(RAW_FIELDS):
+            columns[i] = samples[name]
+        columns[6] = accel
+        columns[7] = gyro
+        columns[8] = samples["mcu_angle"]
+        columns[9] = fused
+        if n > self.capacity:
+            ts, columns, stamps = ts[-self.capacity :], columns[:, -self.capacity :], samples["mcu_us"][-self.capacity :]
+        else:
+            stamps = samples["mcu_us"]
+        m = int(columns.shape[1])
+        idx = (self._head + np.arange(m)) % self.capacity
+        self._us[idx] = stamps
+        self._ts[idx] = ts
+        self._data[:, idx] = columns
+        self._head = int((self._head + m) % self.capacity)
+        self._count += m
+
+        self.samples += n
+        self.batches += 1
+        span = float(dt.sum())
+        if span > 0:
+            rate = n / span
+            self.rate_hz = rate if not self.rate_hz else self.rate_hz + 0.2 * (rate - self.rate_hz)
+        diff = fused - columns[8]
+        self._diff_sq += 0.2 * (float(np.mean(diff * diff)) - self._diff_sq)
+        return float(fused[-1])
+
+    def _columns(self, fields: Optional[Iterable[str]]) -> Sequence[str]:
+        if not fields:
+            return self.fields
+        return [f for f in fields if f in self._index]
+
+    def tail(self, points: int = 500, fields: Optional[Iterable[str]] = None, evaluate: Optional[Dict[str, Any]] = None):
+        """The newest ``points`` samples, oldest first.
+
+        With ``evaluate`` (filter settings), the window is also re-fused with
+        those settings from scratch and returned as ``candidate_angle``.
+        """
+        names = self._columns(fields)
+        n = min(self._count, self.capacity, max(1, int(points)))
+        idx = (self._head - n + np.arange(n)) % self.capacity
+        result: Dict[str, Any] = {
+            "count": n,
+            "ts": self._ts[idx].tolist(),
+            "mcu_us": self._us[idx].tolist(),
+            "settings": dict(self.settings),
+        }
+        data = self._data[:, idx]
+        for name in names:
+            result[name] = data[self._index[name]].tolist()
+        if evaluate is not None and n:
+            settings = dict(self.settings)
+            settings.update({k: v for k, v in evaluate.items() if k in DEFAULT_FUSION})
+            dt = sample_dt(self._us[idx])
+            accel = data[self._index["accel_angle"]].astype(np.float64)
+            gyro = data[self._index["gyro_dps"]].astype(np.float64)
+            result["candidate"] = settings
+            result["candidate_angle"] = make_filter(settings).run(dt, gyro, accel).tolist()
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        latest = (self._head - 1) % self.capacity
+        have = self._count > 0
+        return {
+            "samples": self.samples,
+            "batches": self.batches,
+            "rate_hz": round(self.rate_hz, 1),
+            "settings": dict(self.settings),
+            "mcu_angle": round(float(self._data[8, latest]), 3) if have else None,
+            "fused_angle": round(float(self._data[9, latest]), 3) if have else None,
+            "rms_vs_mcu_deg": round(math.sqrt(self._diff_sq), 4),
+        }
@@ -0,0 +1,220 @@
+"""Fixed-memory columnar telemetry history backed by NumPy."""
+
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; history is disabled without it.
+    np = None
+
+
+HISTORY_FIELDS = (
+    "angle_deg",
+    "gyro_dps",
+    "accel_g",
+    "pwm",
+    "enc_left",
+    "enc_right",
+    "setpoint",
+)
+
+
+class TelemetryHistory:
+    """Ring buffer of telemetry samples stored column-wise.
+
+    One writer appends (``append``/``extend``); readers query from other
+    threads without locking. Each row carries the sample ``seq`` and wall
+    clock ``ts`` plus one float32 value per entry in ``HISTORY_FIELDS``.
+    """
+
+    def __init__(self, capacity: int):
+        if np is None:
+            raise RuntimeError("TelemetryHistory requires numpy")
+        self.capacity = max(16, int(capacity))
+        self.fields = HISTORY_FIELDS
+        self._index = {name: i for i, name in enumerate(self.fields)}
+        self._seq = np.zeros(self.capacity, dtype=np.int64)
+        self._ts = np.zeros(self.capacity, dtype=np.float64)
+        self._data = np.zeros((len(self.fields), self.capacity), dtype=np.float32)
+        self._head = 0
+        self._count = 0
+        self.last_seq = 0
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    def append(
+        self,
+        seq: int,
+        ts: float,
+        angle_deg: float,
+        gyro_dps: float,
+        accel_g: float,
+        pwm: float,
+        enc_left: float,
+        enc_right: float,
+        setpoint: float,
+    ) -> None:
+        i = self._head
+        data = self._data
+        self._seq[i] = seq
+        self._ts[i] = ts
+        data[0, i] = angle_deg
+        data[1, i] = gyro_dps
+        data[2, i] = accel_g
+        data[3, i] = pwm
+        data[4, i] = enc_left
+        data[5, i] = enc_right
+        data[6, i] = setpoint
+        self._head = (i + 1) % self.capacity
+        self._count += 1
+        self.last_seq = seq
+
+    def extend(self, seq, ts, columns) -> None:
+        """Bulk-append rows; ``columns`` is shaped (len(HISTORY_FIELDS), n)."""
+        seq = np.asarray(seq, dtype=np.int64)
+        n = int(seq.shape[0])
+        if n == 0:
+            return
+        ts = np.asarray(ts, dtype=np.float64)
+        columns = np.asarray(columns, dtype=np.float32)
+        if n > self.capacity:
+            seq, ts, columns = seq[-self.capacity:], ts[-self.capacity:], columns[:, -self.capacity:]
+            n = self.capacity
+        idx = (self._head + np.arange(n)) % self.capacity
+        self._seq[idx] = seq
+        self._ts[idx] = ts
+        self._data[:, idx] = columns
+        self._head = int((self._head + n) % self.capacity)
+        self._count += n
+        self.last_seq = int(seq[-1])
+
+    def _ordered(self):
+        """Return (seq, ts, data) copies of the valid rows, oldest first."""
+        head = self._head
+        n = min(self._count, self.capacity)
+        if n < self.capacity:
+            idx = slice(head - n, head)
+            return self._seq[idx].copy(), self._ts[idx].copy(), self._data[:, idx].copy()
+        order = np.r_[head:self.capacity, 0:head]
+        return self._seq[order], self._ts[order], self._data[:, order]
+
+    def since(self, seq: int, limit: int = 1000, fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Return up to ``limit`` most recent raw rows with a seq newer than ``seq``."""
+        names = self._columns(fields)
+        n = min(self._count, self.capacity, max(0, self.last_seq - int(seq)), max(1, int(limit)))
+        head = self._head
+        idx = (head - n + np.arange(n)) % self.capacity
+        rows_seq = self._seq[idx]
+        keep = rows_seq > seq
+        rows_seq = rows_seq[keep]
+        idx = idx[keep]
+        result: Dict[str, Any] = {"seq": rows_seq.tolist(), "ts": self._ts[idx].tolist()}
+        for name in names:
+            result[name] = self._data[self._index[name], idx].tolist()
+        return result
+
+    def blocks(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        rows: int = 4096,
+        fields: Optional[Iterable[str]] = None,
+    ):
+        """Yield ``(seq, ts, data)`` chunks of at most ``rows`` raw rows in [start, end].
+
+        Only the row positions are fixed up front; each chunk is copied when
+        it is requested, and rows the writer recycled since then are dropped.
+        ``data`` has one row per requested field.
+        """
+        names = self._columns(fields)
+        columns = [self._index[name] for name in names]
+        n = min(self._count, self.capacity)
+        idx = (self._head - n + np.arange(n)) % self.capacity
+        seq = self._seq[idx]
+        ts = self._ts[idx]
+        keep = np.ones(n, dtype=bool)
+        if start is not None:
+            keep &= ts >= start
+        if end is not None:
+            keep &= ts <= end
+        idx = idx[keep]
+        seq = seq[keep]
+        rows = max(1, int(rows))
+        for k in range(0, int(idx.size), rows):
+            part = idx[k : k + rows]
+            ts_part = self._ts[part]
+            data = self._data[columns][:, part]
+            valid = self._seq[part] == seq[k : k + rows]
+            if not valid.all():
+                ts_part, data = ts_part[valid], data[:, valid]
+            yield seq[k : k + rows][valid], ts_part, data
+
+    def _columns(self, fields: Optional[Iterable[str]]) -> Sequence[str]:
+        if not fields:
+            return self.fields
+        return [f for f in fields if f in self._index]
+
+    def query(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        max_points: int = 500,
+        fields: Optional[Iterable[str]] = None,
+    ) -> Dict[str, Any]:
+        """Return samples in [start, end] reduced to at most ``max_points`` buckets.
+
+        Each bucket reports the min and max of every requested field, so peaks
+        survive downsampling. When the range already fits, min == max.
+        """
+        names = self._columns(fields)
+        seq, ts, data = self._ordered()
+        if ts.size:
+            # Drop rows the writer recycled while we were copying.
+            keep = ts <= ts[-1]
+            if not keep.all():
+                seq, ts, data = seq[keep], ts[keep], data[:, keep]
+            if ts.size > 1 and (np.diff(ts) < 0).any():
+                # Bridge batches can overlap slightly in time; bucketing needs order.
+                order = np.argsort(ts, kind="stable")
+                seq, ts, data = seq[order], ts[order], data[:, order]
+        lo = 0 if start is None else int(np.searchsorted(ts, start, side="left"))
+        hi = ts.size if end is None else int(np.searchsorted(ts, end, side="right"))
+        ts = ts[lo:hi]
+        data = data[:, lo:hi]
+        max_points = max(1, int(max_points))
+
+        result: Dict[str, Any] = {
+            "start": float(ts[0]) if ts.size else start,
+            "end": float(ts[-1]) if ts.size else end,
+            "count": int(ts.size),
+            "seq": self.last_seq,
+            "bucket_s": 0.0,
+            "ts": [],
+            "fields": {},
+        }
+        if ts.size == 0:
+            for name in names:
+                result["fields"][name] = {"min": [], "max": []}
+            return result
+
+        if ts.size <= max_points:
+            result["ts"] = ts.tolist()
+            for name in names:
+                values = data[self._index[name]].tolist()
+                result["fields"][name] = {"min": values, "max": values}
+            return result
+
+        span = float(ts[-1] - ts[0])
+        bucket_s = span / max_points if span > 0 else 1.0
+        buckets = np.minimum(((ts - ts[0]) / bucket_s).astype(np.int64), max_points - 1)
+        starts = np.flatnonzero(np.diff(buckets, prepend=-1))
+        result["bucket_s"] = bucket_s
+        result["ts"] = ts[starts].tolist()
+        for name in names:
+            column = data[self._index[name]]
+            result["fields"][name] = {
+                "min": np.minimum.reduceat(column, starts).tolist(),
+                "max": np.maximum.reduceat(column, starts).tolist(),
+            }
+        return result
@@ -0,0 +1,241 @@
+"""Run many balancing robots from one scheduler thread."""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; without it every robot steps on its own.
+    np = None
+
+from .metrics import LoopMetrics
+from .scheduler import DeadlineScheduler
+from .sim import live_step
+
+# Per-robot HTTP endpoints, exposed as /<name><path>.
+ROUTES = (
+    ("/status", "http_status"),
+    ("/config", "http_config"),
+    ("/history", "http_history"),
+    ("/export", "http_export"),
+    ("/metrics", "http_metrics"),
+    ("/quality", "http_quality"),
+    ("/set_pid", "http_set_pid"),
+    ("/set_pid_hz", "http_set_pid_hz"),
+    ("/set_telemetry_hz", "http_set_telemetry_hz"),
+    ("/set_setpoint", "http_set_setpoint"),
+    ("/set_imu_model", "http_set_imu_model"),
+    ("/set_axis_mode", "http_set_axis_mode"),
+    ("/set_axis_sign", "http_set_axis_sign"),
+    ("/set_motor_invert", "http_set_motor_invert"),
+    ("/set_encoder_invert", "http_set_encoder_invert"),
+    ("/set_raw_imu", "http_set_raw_imu"),
+    ("/set_fusion", "http_set_fusion"),
+    ("/imu_raw", "http_imu_raw"),
+    ("/set_mode", "http_set_mode"),
+    ("/kick", "http_kick"),
+    ("/record_start", "http_record_start"),
+    ("/record_stop", "http_record_stop"),
+    ("/record_status", "http_record_status"),
+)
+
+# Below this many simulated robots the NumPy gather/scatter costs more than it
+# saves (per-robot frame/history writes dominate either way).
+VECTOR_MIN = 32
+
+
+class RobotHost:
+    """Owns many ``BalancingRobot`` instances and ticks them from one thread.
+
+    Hosted robots are never ``start()``ed themselves. The host steps all of
+    them on a shared ``DeadlineScheduler`` tick, and a second thread pushes
+    their telemetry at ``publish_hz``, so N robots cost two threads instead
+    of 2N. Simulated robots are advanced together with NumPy through the
+    same ``sim.live_step`` as ``BalancingRobot._step``; real or replaying
+    robots use their own ``_step``. With ``seed`` each robot's simulator
+    noise is reseeded from it and the robot name when added. Each robot's WebUI messages are prefixed ``<name>/`` and its
+    endpoints are exposed under ``/<name>/...``.
+    """
+
+    def __init__(
+        self,
+        update_hz: float = 50.0,
+        schedule_policy: str = "skip",
+        publish_hz: float = 10.0,
+        vectorize: bool = True,
+        seed: Optional[int] = None,
+    ):
+        self._robots: Dict[str, Any] = {}
+        # Copy-on-write list read by the loop threads without locking.
+        self._order: List[Tuple[str, Any]] = []
+        self._lock = threading.Lock()
+        self._scheduler = DeadlineScheduler(update_hz, policy=schedule_policy)
+        self._publish_scheduler = DeadlineScheduler(max(1.0, min(120.0, float(publish_hz))))
+        self.vectorize = bool(vectorize) and np is not None
+        self._seed = seed
+        self._metrics = LoopMetrics()
+        self._ui = None
+        self._thread: Optional[threading.Thread] = None
+        self._publish_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        self.vector_steps = 0
+        self.scalar_steps = 0
+
+    @property
+    def update_hz(self) -> float:
+        return self._scheduler.hz
+
+    def names(self) -> List[str]:
+        return [name for name, _robot in self._order]
+
+    def get(self, name: str):
+        return self._robots[name]
+
+    def add(self, name: str, robot):
+        """Host ``robot`` as ``name`` (used as message and endpoint prefix)."""
+        if not name or "/" in name:
+            raise ValueError(f"invalid robot name: {name!r}")
+        with self._lock:
+            if name in self._robots:
+                raise ValueError(f"robot already hosted: {name}")
+            self._robots[name] = robot
+            self._order = list(self._robots.items())
+        if self._seed is not None:
+            robot._noise.seed(f"{self._seed}/{name}")
+        if self._ui is not None:
+            self._attach(name, robot)
+        if self.running:
+            robot._stop.clear()
+        return robot
+
+    def remove(self, name: str):
+        """Stop stepping ``name`` and return it (its WebUI handlers stay registered)."""
+        with self._lock:
+            robot = self._robots.pop(name)
+            self._order = list(self._robots.items())
+        return robot
+
+    def attach_webui(self, ui) -> None:
+        self._ui = ui
+        ui.expose_api("GET", "/host_stats", self.stats)
+        for name, robot in self._order:
+            self._attach(name, robot)
+
+    def _attach(self, name: str, robot) -> None:
+        robot.attach_webui(self._ui, prefix=f"{name}/")
+        for path, method in ROUTES:
+            self._ui.expose_api("GET", f"/{name}{path}", getattr(robot, method))
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        for _name, robot in self._order:
+            robot._stop.clear()
+        self._scheduler.reset()
+        self._publish_scheduler.reset()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._publish_thread = threading.Thread(target=self._run_publisher, daemon=True)
+        self._thread.start()
+        self._publish_thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        for thread in (self._thread, self._publish_thread):
+            if thread:
+                thread.join(timeout=2.0)
+        for _name, robot in self._order:
+            robot.stop()
+
+    def _run(self) -> None:
+        scheduler = self._scheduler
+        while not self._stop.is_set():
+            dt = scheduler.wait(self._stop)
+            if self._stop.is_set():
+                break
+            started = time.perf_counter()
+            self.step(max(1e-4, min(dt, 5.0 * scheduler.period)))
+            self._metrics.observe_loop(time.perf_counter() - started)
+
+    def _run_publisher(self) -> None:
+        while not self._stop.is_set():
+            self._publish_scheduler.wait(self._stop)
+            if self._stop.is_set():
+                break
+            for _name, robot in self._order:
+                robot._publisher.publish_once()
+
+    def step(self, dt: float) -> None:
+        """Advance every hosted robot by ``dt`` seconds."""
+        group = []
+        for _name, robot in self._order:
+            if self.vectorize and robot.simulated and not robot._replayer.active:
+                group.append(robot)
+                continue
+            started = time.perf_counter()
+            robot._step(dt)
+            robot._metrics.observe_loop(time.perf_counter() - started)
+            self.scalar_steps += 1
+        if not group:
+            return
+        if len(group) < VECTOR_MIN:
+            for robot in group:
+                started = time.perf_counter()
+                robot._step(dt)
+                robot._metrics.observe_loop(time.perf_counter() - started)
+            self.scalar_steps += len(group)
+            return
+        started = time.perf_counter()
+        self._step_simulated(group, dt)
+        share = (time.perf_counter() - started) / len(group)
+        for robot in group:
+            robot._metrics.observe_loop(share)
+        self.vector_steps += len(group)
+
+    def _step_simulated(self, group, dt: float) -> None:
+        """``sim.live_step`` for K robots at once; each robot's ``_step`` takes its row."""
+        configs = [robot._config for robot in group]
+        angle = np.array([robot._sim_angle for robot in group], dtype=np.float64)
+        rate = np.array([robot._sim_rate for robot in group], dtype=np.float64)
+        integral = np.array([robot._integral for robot in group], dtype=np.float64)
+        last_error = np.array([robot._last_error for robot in group], dtype=np.float64)
+        gains = np.array([config.gains for config in configs], dtype=np.float64)
+        setpoint = np.array([config.setpoint for config in configs], dtype=np.float64)
+        # Kicks are rare and stateful; advance them per robot. Noise comes from
+        # each robot's own generator so a robot sees the same sequence hosted
+        # vectorized, hosted scalar or running on its own.
+        rate += [robot._kick_wobble(dt) if robot._kick_wave_strength > 0.01 else 0.0 for robot in group]
+        noise = np.array([robot._noise.uniform(-0.5, 0.5) for robot in group], dtype=np.float64)
+
+        rows = live_step(
+            angle, rate, integral, last_error, gains[:, 0], gains[:, 1], gains[:, 2], setpoint, noise, dt
+        )
+        for idx, row in enumerate(zip(configs, *(column.tolist() for column in rows))):
+            group[idx]._step(dt, sim=row)
+
+    def stats(self) -> Dict[str, Any]:
+        """Aggregate timing for the shared tick plus per-mode robot counts."""
+        robots = self._order
+        modes: Dict[str, int] = {}
+        for _name, robot in robots:
+            mode = "replay" if robot._replayer.active else ("sim" if robot.simulated else "real")
+            modes[mode] = modes.get(mode, 0) + 1
+        m = self._metrics
+        step_ms = m.loop_sum / m.loop_count * 1000.0 if m.loop_count else 0.0
+        return {
+            "robots": len(robots),
+            "modes": modes,
+            "vectorize": self.vectorize,
+            "timing": self._scheduler.stats(),
+            "step_ms_mean": round(step_ms, 4),
+            "per_robot_us": round(step_ms * 1000.0 / len(robots), 3) if robots else 0.0,
+            "vector_steps": self.vector_steps,
+            "scalar_steps": self.scalar_steps,
+            "publish_hz": round(self._publish_scheduler.hz, 3),
+        }
@@ -0,0 +1,158 @@
+"""Per-stage latency tracing from the MCU to the browser.
+
+Stages (milliseconds):
+
+- ``batch_wait``: oldest sample's wait on the MCU until its batch was sent;
+- ``mcu_to_bridge``: MCU emit to ``record_telemetry_batch``, relative to the
+  fastest transfer seen (the clocks are not synchronised, so the offset
+  between ``millis()`` and the host clock is estimated as a windowed minimum
+  and only the excess over it is measurable);
+- ``bridge_to_loop``: bridge receive to the control loop consuming the sample;
+- ``loop_to_publish``: loop frame to the WebUI send;
+- ``publish_to_browser``: one-way estimate from the browser's echo,
+  ``(round trip - render) / 2``;
+- ``browser_render``: browser receive to the next animation frame.
+"""
+
+import math
+import threading
+import time
+from typing import Any, Dict, List
+
+STAGES = (
+    "batch_wait",
+    "mcu_to_bridge",
+    "bridge_to_loop",
+    "loop_to_publish",
+    "publish_to_browser",
+    "browser_render",
+)
+
+
+class LogHistogram:
+    """Streaming histogram with logarithmic buckets and fixed memory."""
+
+    def __init__(self, min_ms: float = 0.01, max_ms: float = 100000.0, per_decade: int = 20):
+        self.min_ms = min_ms
+        self.per_decade = per_decade
+        self._log_min = math.log10(min_ms)
+        self.size = int(math.ceil((math.log10(max_ms) - self._log_min) * per_decade)) + 1
+        self.counts = [0] * self.size
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms: float) -> None:
+        if ms <= self.min_ms:
+            idx = 0
+        else:
+            idx = min(self.size - 1, int((math.log10(ms) - self._log_min) * self.per_decade))
+        self.counts[idx] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, q: float) -> float:
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for idx, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank and c:
+                # Geometric middle of the bucket.
+                return min(self.max, 10.0 ** (self._log_min + (idx + 0.5) / self.per_decade))
+        return self.max
+
+    def reset(self) -> None:
+        for k in range(self.size):
+            self.counts[k] = 0
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.50), 3),
+            "p90_ms": round(self.percentile(0.90), 3),
+            "p99_ms": round(self.percentile(0.99), 3),
+            "max_ms": round(self.max, 3),
+        }
+
+
+class LatencyTracer:
+    """Collects stage latencies into one ``LogHistogram`` per stage.
+
+    Stages are written from several threads (bridge callbacks, the control
+    loop, the publisher and WebUI handlers), so every update and ``stats()``
+    hold one short lock; a histogram add is a handful of list writes.
+    """
+
+    def __init__(self, offset_window_s: float = 30.0, pending: int = 256):
+        self.histograms = {stage: LogHistogram() for stage in STAGES}
+        self.offset_window_s = offset_window_s
+        self._offset_cur = math.inf
+        self._offset_prev = math.inf
+        self._offset_rotated = time.monotonic()
+        # seq -> monotonic send time, in a small ring for browser echoes.
+        self._sent_seq: List[int] = [0] * pending
+        self._sent_at: List[float] = [0.0] * pending
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, ms: float) -> None:
+        with self._lock:
+            self._observe(stage, ms)
+
+    def _observe(self, stage: str, ms: float) -> None:
+        if ms >= 0.0:
+            self.histograms[stage].add(ms)
+
+    def mcu_batch(self, first_mcu_ms: int, last_mcu_ms: int, received: float) -> None:
+        """Record a bridge batch received at monotonic time ``received``."""
+        offset = received * 1000.0 - last_mcu_ms
+        with self._lock:
+            self._observe("batch_wait", float((last_mcu_ms - first_mcu_ms) & 0xFFFFFFFF))
+            if received - self._offset_rotated >= self.offset_window_s:
+                # Two overlapping windows let the estimate follow clock drift.
+                self._offset_prev, self._offset_cur = self._offset_cur, math.inf
+                self._offset_rotated = received
+            if offset < self._offset_cur:
+                self._offset_cur = offset
+            self._observe("mcu_to_bridge", offset - min(self._offset_cur, self._offset_prev))
+
+    def sent(self, seq: int, frame_mono: float) -> None:
+        now = time.monotonic()
+        i = seq % len(self._sent_seq)
+        with self._lock:
+            if frame_mono:
+                self._observe("loop_to_publish", (now - frame_mono) * 1000.0)
+            self._sent_seq[i] = seq
+            self._sent_at[i] = now
+
+    def browser_report(self, seq: int, render_ms: float) -> None:
+        now = time.monotonic()
+        i = seq % len(self._sent_seq)
+        with self._lock:
+            if self._sent_seq[i] != seq:
+                return
+            rtt = (now - self._sent_at[i]) * 1000.0
+            render_ms = max(0.0, min(render_ms, rtt))
+            self._observe("browser_render", render_ms)
+            self._observe("publish_to_browser", (rtt - render_ms) / 2.0)
+
+    def reset(self) -> None:
+        with self._lock:
+            for hist in self.histograms.values():
+                hist.reset()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {stage: self.histograms[stage].stats() for stage in STAGES}
+        return {
+            "stages": stages,
+            "total_p50_ms": round(sum(s["p50_ms"] for s in stages.values()), 3),
+            "total_p99_ms": round(sum(s["p99_ms"] for s in stages.values()), 3),
+        }
@@ -0,0 +1,153 @@
+"""Hot-path counters and Prometheus text exposition for the brick."""
+
+import bisect
+from typing import Any, Dict, List, Sequence, Tuple
+
+try:
+    from fastapi.responses import PlainTextResponse
+except ImportError:  # fastapi ships with the WebUI brick; plain str otherwise.
+    PlainTextResponse = None
+
+PREFIX = "balancing_robot"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds (seconds) of the loop step-time histogram.
+LOOP_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+
+class LoopMetrics:
+    """Counters updated by a single writer without locking.
+
+    Every field is preallocated; updates are plain attribute/list-slot
+    stores, so the loop pays no allocation or lock per tick. Readers may see
+    a tick-old value, which is fine for scraping. ``webui_sent`` and
+    ``webui_dropped`` are the exception to the single writer: every thread
+    that sends (publisher, WebUI handlers, autotune and replay progress)
+    bumps them with an unlocked ``+=``, so concurrent sends can lose an
+    increment and the totals are approximate.
+    """
+
+    __slots__ = (
+        "loop_buckets",
+        "loop_counts",
+        "loop_sum",
+        "loop_count",
+        "pid_saturated_s",
+        "ingest_samples",
+        "ingest_batches",
+        "stale_samples",
+        "duplicate_samples",
+        "imu_raw_samples",
+        "webui_sent",
+        "webui_dropped",
+    )
+
+    def __init__(self, buckets: Sequence[float] = LOOP_BUCKETS):
+        self.loop_buckets = tuple(buckets)
+        self.loop_counts = [0] * (len(self.loop_buckets) + 1)
+        self.loop_sum = 0.0
+        self.loop_count = 0
+        self.pid_saturated_s = 0.0
+        self.ingest_samples = 0
+        self.ingest_batches = 0
+        self.stale_samples = 0
+        self.duplicate_samples = 0
+        self.imu_raw_samples = 0
+        self.webui_sent = 0
+        self.webui_dropped = 0
+
+    def observe_loop(self, seconds: float) -> None:
+        self.loop_counts[bisect.bisect_left(self.loop_buckets, seconds)] += 1
+        self.loop_sum += seconds
+        self.loop_count += 1
+
+
+class _Writer:
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def metric(self, name: str, kind: str, help_text: str, samples: List[Tuple[str, Any]]) -> None:
+        full = f"{PREFIX}_{name}"
+        self.lines.append(f"# HELP {full} {help_text}")
+        self.lines.append(f"# TYPE {full} {kind}")
+        for suffix, value in samples:
+            self.lines.append(f"{full}{suffix} {_number(value)}")
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def _number(value: Any) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    return f"{float(value):.9g}"
+
+
+def render(metrics: LoopMetrics, timing: Dict[str, Any], bridge: Dict[str, Any], publisher: Dict[str, Any], mode: str, mcu: Dict[str, Any], quality: Dict[str, Any]) -> str:
+    """Format counters plus component stats in Prometheus text format 0.0.4."""
+    w = _Writer()
+    w.metric("loop_ticks_total", "counter", "Control loop ticks.", [("", timing.get("ticks", 0))])
+    w.metric("loop_overruns_total", "counter", "Ticks that started after their deadline.", [("", timing.get("overruns", 0))])
+    w.metric("loop_skipped_total", "counter", "Ticks dropped by the skip policy.", [("", timing.get("skipped", 0))])
+    w.metric("loop_event_wakes_total", "counter", "Real-mode ticks started by a new bridge sample.", [("", timing.get("wakes", 0))])
+    w.metric("loop_event_timeouts_total", "counter", "Real-mode ticks started by the fallback deadline.", [("", timing.get("timeouts", 0))])
+    w.metric("loop_target_hz", "gauge", "Configured loop rate.", [("", timing.get("target_hz", 0.0))])
+    w.metric("loop_achieved_hz", "gauge", "Measured loop rate.", [("", timing.get("achieved_hz", 0.0))])
+    w.metric(
+        "loop_jitter_seconds",
+        "gauge",
+        "Tick start jitter over the recent window.",
+        [
+            ('{quantile="0.5"}', timing.get("jitter_p50_ms", 0.0) / 1000.0),
+            ('{quantile="0.99"}', timing.get("jitter_p99_ms", 0.0) / 1000.0),
+        ],
+    )
+    buckets = []
+    cumulative = 0
+    for bound, count in zip(metrics.loop_buckets, metrics.loop_counts):
+        cumulative += count
+        buckets.append((f'_bucket{{le="{bound}"}}', cumulative))
+    buckets.append(('_bucket{le="+Inf"}', metrics.loop_count))
+    buckets.append(("_sum", metrics.loop_sum))
+    buckets.append(("_count", metrics.loop_count))
+    w.metric("loop_step_seconds", "histogram", "Time spent in one control step.", buckets)
+    w.metric("pid_saturated_seconds_total", "counter", "Loop time with the PID output at the PWM limit.", [("", metrics.pid_saturated_s)])
+    w.metric("ingest_samples_total", "counter", "MCU telemetry samples received over the bridge.", [("", metrics.ingest_samples)])
+    w.metric("ingest_batches_total", "counter", "Bridge calls carrying MCU telemetry.", [("", metrics.ingest_batches)])
+    w.metric("stale_samples_total", "counter", "Real-mode ticks that found no new bridge sample.", [("", metrics.stale_samples)])
+    w.metric("duplicate_samples_total", "counter", "Bridge samples dropped as repeats of an earlier batch.", [("", metrics.duplicate_samples)])
+    w.metric("imu_raw_samples_total", "counter", "Raw IMU samples received in raw mode.", [("", metrics.imu_raw_samples)])
+    w.metric("bridge_notify_total", "counter", "Bridge notifications sent.", [("", bridge.get("sent", 0))])
+    w.metric("bridge_notify_failed_total", "counter", "Bridge notifications abandoned after retries.", [("", bridge.get("failed", 0))])
+    w.metric("bridge_notify_retries_total", "counter", "Bridge notification retries.", [("", bridge.get("retries", 0))])
+    w.metric("bridge_notify_dropped_total", "counter", "Bridge notifications dropped from a full queue.", [("", bridge.get("dropped", 0))])
+    w.metric("bridge_queue_depth", "gauge", "Pending bridge notifications.", [("", bridge.get("depth", 0))])
+    w.metric(
+        "bridge_notify_latency_seconds",
+        "gauge",
+        "Queue-to-send latency of recent bridge notifications.",
+        [
+            ('{quantile="0.5"}', bridge.get("latency_p50_ms", 0.0) / 1000.0),
+            ('{quantile="1"}', bridge.get("latency_max_ms", 0.0) / 1000.0),
+        ],
+    )
+    w.metric("mcu_control_hz", "gauge", "PID rate achieved on the MCU (last reported one-second window).", [("", mcu.get("control_hz", 0))])
+    w.metric("mcu_control_step_max_seconds", "gauge", "Longest MCU control step in that window.", [("", mcu.get("control_max_us", 0) / 1e6)])
+    w.metric("control_rms_error_degrees", "gauge", "Rolling RMS of setpoint minus angle.", [("", quality.get("rms_error_deg", 0.0))])
+    w.metric("control_saturation_ratio", "gauge", "Rolling fraction of time at the PWM limit.", [("", quality.get("saturation", 0.0))])
+    w.metric("control_oscillation_hz", "gauge", "Dominant oscillation frequency of the error.", [("", quality.get("dominant_hz", 0.0))])
+    w.metric("control_oscillation_amplitude_degrees", "gauge", "Amplitude of that oscillation.", [("", quality.get("dominant_amp_deg", 0.0))])
+    w.metric("webui_messages_sent_total", "counter", "WebUI messages sent.", [("", metrics.webui_sent)])
+    w.metric("webui_messages_dropped_total", "counter", "WebUI messages that failed to send.", [("", metrics.webui_dropped)])
+    w.metric("webui_telemetry_coalesced_total", "counter", "Frames replaced before the publisher sent them.", [("", publisher.get("coalesced", 0))])
+    w.metric("real_mode", "gauge", "1 when driving hardware, 0 in simulation.", [("", mode == "real")])
+    return w.text()
+
+
+def response(text: str):
+    """Wrap exposition text for ``ui.expose_api`` (plain str without fastapi)."""
+    if PlainTextResponse is None:
+        return text
+    return PlainTextResponse(text, media_type=CONTENT_TYPE)
@@ -0,0 +1,214 @@
+"""Binary payloads exchanged with ``sketch.ino`` over the Router Bridge.
+
+``record_telemetry_batch`` carries one MsgPack ``bin`` argument laid out as
+(little-endian, matching the packed structs in the sketch)::
+
+    header   <BBHIHH    version, flags, sample count, config version,
+                        control Hz, control max us
+    samples  count x <Ifffhii
+             mcu_ms, angle_deg, gyro_dps, accel_g, pwm, enc_left, enc_right
+
+The config version is the last ``apply_config`` version the sketch applied.
+Control Hz is the PID rate the sketch achieved over its last one-second
+window and control max us the longest control step in that window.
+Version 1 (``<BBH``) and 2 (``<BBHI``) headers are still accepted.
+``mcu_ms`` is the sketch's ``millis()``, a u32 that wraps every ~49.7 days;
+compare stamps with ``mcu_ms_diff``/``mcu_ms_age``, never directly.
+
+``record_imu_raw_batch`` (raw IMU mode, see ``fusion.py``) is laid out as::
+
+    header   <BBH       version, flags, sample count
+    samples  count x <I14sf
+             mcu_us, MPU registers 0x3B-0x48 as read (big-endian
+             accel X/Y/Z, temperature, gyro X/Y/Z), MCU fused angle_deg
+"""
+
+import struct
+from typing import List, NamedTuple, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; struct decoding is the fallback.
+    np = None
+
+TELEMETRY_BATCH_VERSION = 3
+BATCH_HEADER = struct.Struct("<BBHIHH")
+BATCH_HEADER_V2 = struct.Struct("<BBHI")
+BATCH_HEADER_V1 = struct.Struct("<BBH")
+TELEMETRY_SAMPLE = struct.Struct("<Ifffhii")
+IMU_RAW_BATCH_VERSION = 1
+IMU_RAW_HEADER = struct.Struct("<BBH")
+IMU_RAW_SAMPLE = struct.Struct("<I7hf")
+IMU_RAW_SAMPLE_BE = struct.Struct(">7h")
+MCU_MS_MASK = 0xFFFFFFFF
+# A batch ending at most this far behind the newest one ingested repeats it;
+# anything further back is the MCU restarting millis() after a reset.
+RETRANSMIT_WINDOW_MS = 5000
+
+if np is not None:
+    TELEMETRY_SAMPLE_DTYPE = np.dtype(
+        [
+            ("mcu_ms", "<u4"),
+            ("angle_deg", "<f4"),
+            ("gyro_dps", "<f4"),
+            ("accel_g", "<f4"),
+            ("pwm", "<i2"),
+            ("enc_left", "<i4"),
+            ("enc_right", "<i4"),
+        ]
+    )
+    IMU_RAW_SAMPLE_DTYPE = np.dtype(
+        [
+            ("mcu_us", "<u4"),
+            ("ax", ">i2"),
+            ("ay", ">i2"),
+            ("az", ">i2"),
+            ("temp", ">i2"),
+            ("gx", ">i2"),
+            ("gy", ">i2"),
+            ("gz", ">i2"),
+            ("mcu_angle", "<f4"),
+        ]
+    )
+else:
+    TELEMETRY_SAMPLE_DTYPE = None
+    IMU_RAW_SAMPLE_DTYPE = None
+
+
+class BatchHeader(NamedTuple):
+    version: int
+    flags: int
+    count: int
+    config_version: Optional[int]
+    control_hz: Optional[int]
+    control_max_us: Optional[int]
+
+
+def _as_bytes(payload) -> bytes:
+    if isinstance(payload, (bytes, bytearray, memoryview)):
+        return bytes(payload)
+    # Some bridge builds hand bin payloads over as a list of ints.
+    return bytes(bytearray(payload))
+
+
+def parse_batch_header(payload) -> Tuple[bytes, int, BatchHeader]:
+    """Return (raw bytes, sample offset, header).
+
+    Count is clamped to the payload; fields a header version lacks are None.
+    """
+    raw = _as_bytes(payload)
+    if len(raw) < BATCH_HEADER_V1.size:
+        raise ValueError("telemetry batch too short")
+    version = raw[0]
+    config_version = control_hz = control_max_us = None
+    if version == 1:
+        _version, flags, count = BATCH_HEADER_V1.unpack_from(raw, 0)
+        offset = BATCH_HEADER_V1.size
+    elif version == 2:
+        if len(raw) < BATCH_HEADER_V2.size:
+            raise ValueError("telemetry batch too short")
+        _version, flags, count, config_version = BATCH_HEADER_V2.unpack_from(raw, 0)
+        offset = BATCH_HEADER_V2.size
+    elif version == TELEMETRY_BATCH_VERSION:
+        if len(raw) < BATCH_HEADER.size:
+            raise ValueError("telemetry batch too short")
+        _version, flags, count, config_version, control_hz, control_max_us = BATCH_HEADER.unpack_from(raw, 0)
+        offset = BATCH_HEADER.size
+    else:
+        raise ValueError(f"unsupported telemetry batch version {version}")
+    available = (len(raw) - offset) // TELEMETRY_SAMPLE.size
+    header = BatchHeader(version, flags, min(count, available), config_version, control_hz, control_max_us)
+    return raw, offset, header
+
+
+def decode_telemetry_batch(payload):
+    """Decode a batch into (samples, ``BatchHeader``).
+
+    Samples are a NumPy structured array (or a list of tuples without numpy).
+    """
+    raw, offset, header = parse_batch_header(payload)
+    count = header.count
+    if np is not None:
+        return np.frombuffer(raw, dtype=TELEMETRY_SAMPLE_DTYPE, count=count, offset=offset), header
+    end = offset + count * TELEMETRY_SAMPLE.size
+    return list(TELEMETRY_SAMPLE.iter_unpack(raw[offset:end])), header
+
+
+def encode_telemetry_batch(
+    samples: List[Tuple],
+    flags: int = 0,
+    config_version: int = 0,
+    control_hz: int = 0,
+    control_max_us: int = 0,
+) -> bytes:
+    """Pack (mcu_ms, angle, gyro, accel, pwm, enc_left, enc_right) tuples."""
+    parts = [
+        BATCH_HEADER.pack(
+            TELEMETRY_BATCH_VERSION,
+            flags,
+            len(samples),
+            int(config_version) & 0xFFFFFFFF,
+            max(0, min(0xFFFF, int(control_hz))),
+            max(0, min(0xFFFF, int(control_max_us))),
+        )
+    ]
+    for s in samples:
+        parts.append(TELEMETRY_SAMPLE.pack(int(s[0]) & 0xFFFFFFFF, s[1], s[2], s[3], int(s[4]), int(s[5]), int(s[6])))
+    return b"".join(parts)
+
+
+def mcu_ms_diff(newer: int, older: int) -> int:
+    """Wrap-aware ``newer - older`` for ``millis()`` stamps, in [-2**31, 2**31)."""
+    diff = (int(newer) - int(older)) & MCU_MS_MASK
+    return diff - (MCU_MS_MASK + 1) if diff > MCU_MS_MASK >> 1 else diff
+
+
+def mcu_ms_age(last_ms: int, mcu_ms):
+    """Milliseconds from each of a batch's ``mcu_ms`` stamps (array) to ``last_ms``."""
+    return (int(last_ms) - mcu_ms.astype(np.int64)) & MCU_MS_MASK
+
+
+def is_retransmit(last_ms: int, newest_ms: Optional[int]) -> bool:
+    """True if a batch ending at ``last_ms`` repeats one already ingested.
+
+    ``newest_ms`` is the last stamp of the newest batch ingested so far.
+    """
+    if newest_ms is None:
+        return False
+    return -RETRANSMIT_WINDOW_MS < mcu_ms_diff(last_ms, newest_ms) <= 0
+
+
+def decode_imu_raw_batch(payload):
+    """Decode a raw IMU batch into (samples, flags).
+
+    Samples are a NumPy structured array (``IMU_RAW_SAMPLE_DTYPE``) or, without
+    numpy, a list of (mcu_us, ax, ay, az, temp, gx, gy, gz, mcu_angle) tuples.
+    """
+    raw = _as_bytes(payload)
+    if len(raw) < IMU_RAW_HEADER.size:
+        raise ValueError("imu batch too short")
+    version, flags, count = IMU_RAW_HEADER.unpack_from(raw, 0)
+    if version != IMU_RAW_BATCH_VERSION:
+        raise ValueError(f"unsupported imu batch version {version}")
+    offset = IMU_RAW_HEADER.size
+    count = min(count, (len(raw) - offset) // IMU_RAW_SAMPLE.size)
+    if np is not None:
+        return np.frombuffer(raw, dtype=IMU_RAW_SAMPLE_DTYPE, count=count, offset=offset), flags
+    samples = []
+    for k in range(count):
+        base = offset + k * IMU_RAW_SAMPLE.size
+        mcu_us = struct.unpack_from("<I", raw, base)[0]
+        registers = IMU_RAW_SAMPLE_BE.unpack_from(raw, base + 4)
+        mcu_angle = struct.unpack_from("<f", raw, base + 18)[0]
+        samples.append((mcu_us,) + registers + (mcu_angle,))
+    return samples, flags
+
+
+def encode_imu_raw_batch(samples: List[Tuple], flags: int = 0) -> bytes:
+    """Pack (mcu_us, ax, ay, az, temp, gx, gy, gz, mcu_angle) tuples."""
+    parts = [IMU_RAW_HEADER.pack(IMU_RAW_BATCH_VERSION, flags, len(samples))]
+    for s in samples:
+        parts.append(struct.pack("<I", int(s[0]) & 0xFFFFFFFF))
+        parts.append(IMU_RAW_SAMPLE_BE.pack(*(int(v) for v in s[1:8])))
+        parts.append(struct.pack("<f", s[8]))
+    return b"".join(parts)
@@ -0,0 +1,194 @@
+"""WebUI telemetry publisher decoupled from the control loop."""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Set
+
+from .scheduler import DeadlineScheduler
+from .telemetry import TelemetryBuffer
+from .wire import WireEncoder, row_from_frame, rows_from_history, static_fields
+
+BATCH_FIELDS = ("angle_deg", "gyro_dps", "pwm")
+# Control-quality summaries change slowly; push them at most this often.
+QUALITY_PERIOD_S = 1.0
+
+
+class TelemetryPublisher:
+    """Push the newest telemetry frame to clients at a fixed display rate.
+
+    The control loop never talks to the WebUI: it only publishes into the
+    shared ``TelemetryBuffer``. This thread samples the latest frame at
+    ``rate_hz`` and sends it, so frames produced in between are coalesced
+    and a slow socket only delays this thread. With ``batch`` enabled the
+    coalesced samples are also sent as a compact ``telemetry_batch`` message
+    taken from the history ring. Clients that opt into the binary wire format
+    get a ``telemetry_bin`` packet (see ``wire.py``) per push instead, sent to
+    their own room and carrying all samples since the previous push. While
+    any client is binary, JSON ``telemetry``/``telemetry_batch`` go room by
+    room to the connected clients that are not (``add_client``/``drop_client``
+    track them); otherwise JSON is broadcast. With ``wire_format="binary"``
+    every client gets binary packets and no JSON. A ``quality`` callable, if
+    given, is sent as a ``quality`` message at most once per
+    ``QUALITY_PERIOD_S``.
+    """
+
+    WIRE_FORMATS = ("json", "binary")
+
+    def __init__(
+        self,
+        frames: TelemetryBuffer,
+        send: Callable[..., None],
+        rate_hz: float = 30.0,
+        history=None,
+        batch: bool = False,
+        wire_format: str = "json",
+        tracer=None,
+        quality: Optional[Callable[[], Dict[str, Any]]] = None,
+    ):
+        self._frames = frames
+        self._send = send
+        self._history = history
+        self._tracer = tracer
+        self._quality = quality
+        self._quality_sent = 0.0
+        self.batch = batch
+        self.wire_format = wire_format if wire_format in self.WIRE_FORMATS else "json"
+        self._encoder = WireEncoder()
+        # Connected clients (socket.io rooms) and those that asked for binary
+        # telemetry. Both copy-on-write.
+        self._clients: Set[Any] = set()
+        self._binary_clients: Set[Any] = set()
+        self._scheduler = DeadlineScheduler(max(1.0, float(rate_hz)))
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._last_seq = 0
+
+        self.sent = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.errors = 0
+
+    @property
+    def rate_hz(self) -> float:
+        return self._scheduler.hz
+
+    def set_rate(self, rate_hz: float, batch: Optional[bool] = None) -> None:
+        self._scheduler.set_rate(max(1.0, min(120.0, float(rate_hz))))
+        if batch is not None:
+            self.batch = bool(batch)
+
+    def set_wire_format(self, wire_format: str, client: Any = None) -> None:
+        """Set the format for one ``client``, or the default for all of them."""
+        if wire_format not in self.WIRE_FORMATS:
+            return
+        if client is None:
+            self.wire_format = wire_format
+        elif wire_format == "binary":
+            self._binary_clients = self._binary_clients | {client}
+        else:
+            self._binary_clients = self._binary_clients - {client}
+        # New subscribers need the static fields right away.
+        self._encoder.force_static()
+
+    def add_client(self, client: Any) -> None:
+        self._clients = self._clients | {client}
+
+    def drop_client(self, client: Any) -> None:
+        self._clients = self._clients - {client}
+        self._binary_clients = self._binary_clients - {client}
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._scheduler.reset()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._scheduler.wait(self._stop)
+            if self._stop.is_set():
+                break
+            self.publish_once()
+
+    def publish_once(self) -> bool:
+        """Send the latest frame if it is newer than the last one sent."""
+        frame = self._frames.latest()
+        if frame.seq == self._last_seq:
+            return False
+        frame_seq, frame_mono = frame.seq, frame.mono
+        data = self._frames.snapshot()
+        seq = data.get("seq", 0)
+        if seq != frame_seq:
+            frame_mono = 0.0
+        last_seq = self._last_seq
+        self._last_seq = seq
+        skipped = seq - last_seq - 1 if last_seq else 0
+        if skipped > 0:
+            self.coalesced += skipped
+        # Copy-on-write set: handlers swap it, this thread only reads it.
+        binary_clients = self._binary_clients
+        try:
+            if self.wire_format == "binary" or binary_clients:
+                rows = []
+                if last_seq and self._history is not None:
+                    rows = rows_from_history(self._history.since(last_seq))
+                if not rows:
+                    rows = [row_from_frame(data)]
+                packet = self._encoder.encode(rows, static_fields(data))
+                if self.wire_format == "binary":
+                    self._send("telemetry_bin", packet)
+                    self.sent += 1
+                    if self._tracer:
+                        self._tracer.sent(seq, frame_mono)
+                    self._send_quality()
+                    return True
+                for client in binary_clients:
+                    self._send("telemetry_bin", packet, client)
+            # None broadcasts; with binary clients JSON goes only to the rest.
+            json_clients = (self._clients - binary_clients) if binary_clients else None
+            if self.batch and skipped > 0 and self._history is not None:
+                self._send_json("telemetry_batch", self._history.since(last_seq, fields=BATCH_FIELDS), json_clients)
+                self.batches += 1
+            self._send_json("telemetry", data, json_clients)
+            self.sent += 1
+            if self._tracer:
+                self._tracer.sent(seq, frame_mono)
+            self._send_quality()
+        except Exception:
+            self.errors += 1
+        return True
+
+    def _send_json(self, message: str, data: Any, clients) -> None:
+        if clients is None:
+            self._send(message, data)
+            return
+        for client in clients:
+            self._send(message, data, client)
+
+    def _send_quality(self) -> None:
+        if self._quality is None:
+            return
+        now = time.monotonic()
+        if now - self._quality_sent >= QUALITY_PERIOD_S:
+            self._quality_sent = now
+            self._send("quality", self._quality())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate_hz": round(self._scheduler.hz, 3),
+            "batch": self.batch,
+            "wire_format": self.wire_format,
+            "binary_clients": len(self._binary_clients),
+            "wire_bytes": self._encoder.bytes_sent,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "batches": self.batches,
+            "errors": self.errors,
+        }
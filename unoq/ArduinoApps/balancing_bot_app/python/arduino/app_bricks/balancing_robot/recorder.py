@@ -0,0 +1,394 @@
+"""Append-only session recorder backed by memory-mapped segment files.
+
+Each segment is a fixed-size file that starts with a ``SEGMENT_HEADER`` and
+holds fixed-width ``RECORD`` rows (little-endian)::
+
+    header  <8sHHIdI    magic, version, record size, record count,
+                        created (unix s), segment index   (padded to 32 bytes)
+    record  <BBhIdffffii
+            kind, flags, pwm, seq, ts, angle_deg, gyro_dps, accel_g,
+            setpoint, enc_left, enc_right                 (40 bytes)
+
+``kind`` is ``KIND_TELEMETRY`` or ``KIND_CONFIG``; flags bit 0 is set for
+real (hardware) mode. Config records reuse the telemetry columns: seq is the
+config version, angle/gyro/accel/setpoint hold p/i/d/setpoint, pwm holds the
+axis sign, enc_left holds ``CONFIG_*`` bits and enc_right the loop rate.
+The record count in the header is updated after every write batch; since the
+pages are shared with the kernel, a crash of the app keeps everything written.
+"""
+
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; batches are packed row by row.
+    np = None
+
+SEGMENT_MAGIC = b"BTREC\x00\x00\x00"
+SEGMENT_VERSION = 1
+SEGMENT_SUFFIX = ".btr"
+SEGMENT_HEADER = struct.Struct("<8sHHIdI")
+SEGMENT_HEADER_SIZE = 32
+RECORD = struct.Struct("<BBhIdffffii")
+
+KIND_TELEMETRY = 0
+KIND_CONFIG = 1
+FLAG_REAL = 0x01
+
+CONFIG_MOTOR_LEFT_INVERTED = 0x01
+CONFIG_MOTOR_RIGHT_INVERTED = 0x02
+CONFIG_ENCODER_LEFT_INVERTED = 0x04
+CONFIG_ENCODER_RIGHT_INVERTED = 0x08
+CONFIG_AXIS_ROLL = 0x10
+CONFIG_IMU_MPU9250 = 0x20
+
+if np is not None:
+    RECORD_DTYPE = np.dtype(
+        [
+            ("kind", "u1"),
+            ("flags", "u1"),
+            ("pwm", "<i2"),
+            ("seq", "<u4"),
+            ("ts", "<f8"),
+            ("angle_deg", "<f4"),
+            ("gyro_dps", "<f4"),
+            ("accel_g", "<f4"),
+            ("setpoint", "<f4"),
+            ("enc_left", "<i4"),
+            ("enc_right", "<i4"),
+        ]
+    )
+else:
+    RECORD_DTYPE = None
+
+
+def config_record(config: Dict[str, Any], version: int, ts: float) -> tuple:
+    """Pack a ``get_state()["config"]`` dict into a KIND_CONFIG record tuple."""
+    bits = 0
+    if config.get("motor_invert", {}).get("left", 1) < 0:
+        bits |= CONFIG_MOTOR_LEFT_INVERTED
+    if config.get("motor_invert", {}).get("right", 1) < 0:
+        bits |= CONFIG_MOTOR_RIGHT_INVERTED
+    if config.get("encoder_invert", {}).get("left", 1) < 0:
+        bits |= CONFIG_ENCODER_LEFT_INVERTED
+    if config.get("encoder_invert", {}).get("right", 1) < 0:
+        bits |= CONFIG_ENCODER_RIGHT_INVERTED
+    if config.get("axis_mode") == "roll":
+        bits |= CONFIG_AXIS_ROLL
+    if config.get("imu_model") == "mpu9250":
+        bits |= CONFIG_IMU_MPU9250
+    pid = config.get("pid", {})
+    return (
+        KIND_CONFIG,
+        FLAG_REAL if config.get("mode") == "real" else 0,
+        -1 if config.get("axis_sign", 1) < 0 else 1,
+        int(version) & 0xFFFFFFFF,
+        ts,
+        pid.get("p", 0.0),
+        pid.get("i", 0.0),
+        pid.get("d", 0.0),
+        config.get("setpoint", 0.0),
+        bits,
+        int(config.get("pid_hz", 0)),
+    )
+
+
+def list_segments(directory) -> List[Path]:
+    """Segment files in ``directory``, oldest first."""
+    path = Path(directory)
+    if not path.is_dir():
+        return []
+    return sorted(path.glob("*" + SEGMENT_SUFFIX))
+
+
+class TelemetryRecorder:
+    """Writes telemetry and config events to rotating mmap segments.
+
+    Producers (the control loop and bridge callbacks) only append tuples to
+    a bounded deque; a writer thread packs them into the mapped segment. When
+    a segment fills up it is trimmed, a new one is opened, and the oldest
+    files in ``directory`` are deleted until the total fits ``budget_bytes``.
+    The writer keeps the on-disk segment list and byte total itself, so
+    ``status()`` never globs or stats the directory.
+    If the writer falls behind, the oldest queued items are dropped and
+    counted rather than blocking the producer.
+    """
+
+    def __init__(
+        self,
+        directory,
+        segment_bytes: int = 4 * 1024 * 1024,
+        budget_bytes: int = 256 * 1024 * 1024,
+        max_queue: int = 8192,
+        flush_interval_s: float = 0.05,
+    ):
+        self.directory = Path(directory)
+        records = max(16, (int(segment_bytes) - SEGMENT_HEADER_SIZE) // RECORD.size)
+        self.segment_bytes = SEGMENT_HEADER_SIZE + records * RECORD.size
+        self.budget_bytes = max(self.segment_bytes * 2, int(budget_bytes))
+        self.flush_interval_s = flush_interval_s
+        self._queue: deque = deque(maxlen=max(64, int(max_queue)))
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._running = False
+        self._session = ""
+        self._index = 0
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._path: Optional[Path] = None
+        self._count = 0
+        self._last_config: Optional[tuple] = None
+        # [path, size] of every segment on disk, oldest first; writer-owned.
+        self._disk: deque = deque()
+        self.disk_bytes = 0
+        self._scan_disk()
+
+        self.records = 0
+        self.dropped = 0
+        self.evicted = 0
+        self.segments = 0
+        self.error: Optional[str] = None
+        self.started = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self, session: Optional[str] = None) -> bool:
+        """Begin a new session; returns False if one is already running."""
+        if self._running:
+            return False
+        if session and (Path(session).name != session or session.startswith(".")):
+            raise ValueError(f"invalid session name {session!r}")
+        self._session = session or time.strftime("%Y%m%d-%H%M%S")
+        self._index = 0
+        self._queue.clear()
+        self.records = 0
+        self.dropped = 0
+        self.segments = 0
+        self.error = None
+        self.started = time.time()
+        self._stop.clear()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        if not self._running:
+            return
+        self._running = False
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+
+    # Producer side: never blocks, never touches the file.
+    def _push(self, item) -> None:
+        queue = self._queue
+        if len(queue) == queue.maxlen:
+            self.dropped += 1
+        queue.append(item)
+
+    def record(
+        self,
+        seq: int,
+        ts: float,
+        angle_deg: float,
+        gyro_dps: float,
+        accel_g: float,
+        pwm: int,
+        enc_left: int,
+        enc_right: int,
+        setpoint: float,
+        real: bool,
+    ) -> None:
+        if self._running:
+            self._push(
+                (KIND_TELEMETRY, FLAG_REAL if real else 0, pwm, seq, ts, angle_deg, gyro_dps, accel_g, setpoint, enc_left, enc_right)
+            )
+
+    def record_batch(self, first_seq: int, ts, samples, setpoint: float, real: bool) -> None:
+        """Queue a decoded bridge batch (see protocol.py) as a single item."""
+        if self._running:
+            self._push(("batch", first_seq, ts, samples, setpoint, FLAG_REAL if real else 0))
+
+    def record_config(self, config: Dict[str, Any], version: int = 0) -> None:
+        record = config_record(config, version, time.time())
+        self._last_config = record
+        if self._running:
+            self._push(record)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self._running,
+            "session": self._session,
+            "path": str(self._path) if self._path else None,
+            "records": self.records,
+            "dropped": self.dropped,
+            "queued": len(self._queue),
+            "segments": self.segments,
+            "evicted": self.evicted,
+            "disk_bytes": self.disk_bytes,
+            "disk_segments": len(self._disk),
+            "budget_bytes": self.budget_bytes,
+            "started": self.started,
+            "error": self.error,
+        }
+
+    # Writer side
+    def _run(self) -> None:
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Pick up files added or removed while no session was running.
+            self._scan_disk()
+            self._open_segment()
+            while not self._stop.wait(self.flush_interval_s):
+                self._drain()
+            self._drain()
+        except Exception as exc:  # disk full, permissions, ...
+            self.error = str(exc)
+            self._running = False
+        finally:
+            self._close_segment()
+
+    def _scan_disk(self) -> None:
+        disk: deque = deque()
+        for path in list_segments(self.directory):
+            try:
+                disk.append([path, path.stat().st_size])
+            except OSError:
+                continue
+        self._disk = disk
+        self.disk_bytes = sum(size for _path, size in disk)
+
+    def _open_segment(self) -> None:
+        self._index += 1
+        self._path = self.directory / f"{self._session}-{self._index:05d}{SEGMENT_SUFFIX}"
+        # A reused session name overwrites its old segment of the same index.
+        for entry in self._disk:
+            if entry[0] == self._path:
+                self._disk.remove(entry)
+                self.disk_bytes -= entry[1]
+                break
+        self._file = open(self._path, "w+b")
+        self._file.truncate(self.segment_bytes)
+        self._disk.append([self._path, self.segment_bytes])
+        self.disk_bytes += self.segment_bytes
+        self._map = mmap.mmap(self._file.fileno(), self.segment_bytes)
+        self._count = 0
+        self._write_header()
+        self.segments += 1
+        self._evict()
+        # Every segment is self-describing: start it with the current config.
+        if self._last_config is not None:
+            self._write_rows([self._last_config])
+
+    def _write_header(self) -> None:
+        SEGMENT_HEADER.pack_into(
+            self._map, 0, SEGMENT_MAGIC, SEGMENT_VERSION, RECORD.size, self._count, time.time(), self._index
+        )
+
+    def _close_segment(self) -> None:
+        if self._map is None:
+            return
+        self._write_header()
+        self._map.flush()
+        self._map.close()
+        self._map = None
+        # Trim the unused tail so the disk budget counts real data.
+        size = SEGMENT_HEADER_SIZE + self._count * RECORD.size
+        self._file.truncate(size)
+        if self._disk and self._disk[-1][0] == self._path:
+            self.disk_bytes += size - self._disk[-1][1]
+            self._disk[-1][1] = size
+        self._file.close()
+        self._file = None
+
+    def _evict(self) -> None:
+        disk = self._disk
+        kept = []
+        while self.disk_bytes > self.budget_bytes and disk and disk[0][0] != self._path:
+            entry = disk.popleft()
+            try:
+                entry[0].unlink()
+                self.evicted += 1
+            except FileNotFoundError:
+                pass
+            except OSError:
+                kept.append(entry)
+                continue
+            self.disk_bytes -= entry[1]
+        # Files that could not be deleted still count against the budget.
+        disk.extendleft(reversed(kept))
+
+    def _capacity(self) -> int:
+        return (self.segment_bytes - SEGMENT_HEADER_SIZE) // RECORD.size
+
+    def _drain(self) -> None:
+        queue = self._queue
+        rows = []
+        while queue:
+            item = queue.popleft()
+            if item[0] == "batch":
+                if rows:
+                    self._write_rows(rows)
+                    rows = []
+                self._write_batch(*item[1:])
+            else:
+                rows.append(item)
+        if rows:
+            self._write_rows(rows)
+        if self._map is not None:
+            self._write_header()
+
+    def _write_rows(self, rows) -> None:
+        for row in rows:
+            if self._count >= self._capacity():
+                self._rotate()
+            RECORD.pack_into(self._map, SEGMENT_HEADER_SIZE + self._count * RECORD.size, *row)
+            self._count += 1
+            self.records += 1
+
+    def _write_batch(self, first_seq, ts, samples, setpoint, flags) -> None:
+        n = len(samples)
+        if np is None or not hasattr(samples, "dtype"):
+            self._write_rows(
+                (KIND_TELEMETRY, flags, int(s[4]), first_seq + k, ts[k], s[1], s[2], s[3], setpoint, int(s[5]), int(s[6]))
+                for k, s in enumerate(samples)
+            )
+            return
+        block = np.zeros(n, dtype=RECORD_DTYPE)
+        block["kind"] = KIND_TELEMETRY
+        block["flags"] = flags
+        block["pwm"] = samples["pwm"]
+        block["seq"] = np.arange(first_seq, first_seq + n)
+        block["ts"] = ts
+        block["angle_deg"] = samples["angle_deg"]
+        block["gyro_dps"] = samples["gyro_dps"]
+        block["accel_g"] = samples["accel_g"]
+        block["setpoint"] = setpoint
+        block["enc_left"] = samples["enc_left"]
+        block["enc_right"] = samples["enc_right"]
+        raw = block.tobytes()
+        done = 0
+        while done < n:
+            if self._count >= self._capacity():
+                self._rotate()
+            take = min(n - done, self._capacity() - self._count)
+            offset = SEGMENT_HEADER_SIZE + self._count * RECORD.size
+            self._map[offset:offset + take * RECORD.size] = raw[done * RECORD.size:(done + take) * RECORD.size]
+            self._count += take
+            self.records += take
+            done += take
+
+    def _rotate(self) -> None:
+        self._close_segment()
+        self._open_segment()
@@ -0,0 +1,486 @@
+"""Stream recorded sessions back into the brick at real-time or N x speed.
+
+Two on-disk layouts are supported, both read lazily:
+
+- recorder segments (``recorder.py``): every segment of a session is
+  memory-mapped read-only and records are unpacked one at a time, so only
+  the pages being replayed are resident;
+- CSV with a header row containing at least ``ts`` and ``angle_deg``, plus
+  any of ``gyro_dps, accel_g, pwm, enc_left, enc_right, setpoint`` (the
+  ``record_telemetry`` fields). Lines are read one by one; a sparse offset
+  index built while reading makes repeated seeks cheap.
+
+Sources yield rows shaped like ``recorder.RECORD`` tuples.
+"""
+
+import bisect
+import mmap
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .recorder import (
+    KIND_CONFIG,
+    KIND_TELEMETRY,
+    RECORD,
+    SEGMENT_HEADER,
+    SEGMENT_HEADER_SIZE,
+    SEGMENT_MAGIC,
+    SEGMENT_SUFFIX,
+    RECORD_DTYPE,
+    list_segments,
+    np,
+)
+
+CSV_FIELDS = ("angle_deg", "gyro_dps", "accel_g", "pwm", "enc_left", "enc_right", "setpoint")
+
+
+class SegmentSource:
+    """Sequential reader over the segments of one recorder session."""
+
+    def __init__(self, paths: List[Path]):
+        if not paths:
+            raise ValueError("no segments to replay")
+        self.paths = list(paths)
+        self._files = []
+        self._maps: List[mmap.mmap] = []
+        self._counts: List[int] = []
+        try:
+            for path in self.paths:
+                self._open(path)
+        except BaseException:
+            self.close()
+            raise
+        if not self._maps:
+            raise ValueError("no segments to replay")
+        self._seg = 0
+        self._pos = 0
+        # First telemetry timestamp per segment, used to pick a segment on seek.
+        self._first_ts = [self._ts_at(k, 0) for k in range(len(self._maps))]
+        self.first_ts = next((t for t in self._first_ts if t is not None), 0.0)
+        self.last_ts = self._last_ts()
+
+    def _open(self, path: Path) -> None:
+        f = open(path, "rb")
+        try:
+            if path.stat().st_size < SEGMENT_HEADER_SIZE:
+                # A writer that crashed before its header landed; nothing to read.
+                f.close()
+                return
+            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            f.close()
+            raise
+        self._files.append(f)
+        self._maps.append(m)
+        magic, _version, size, count, _created, _index = SEGMENT_HEADER.unpack_from(m, 0)
+        if magic != SEGMENT_MAGIC or size != RECORD.size:
+            raise ValueError(f"{path.name} is not a recorder segment")
+        # A crashed writer leaves a stale count; trust the file size too.
+        self._counts.append(min(count, (len(m) - SEGMENT_HEADER_SIZE) // RECORD.size))
+
+    def _row(self, seg: int, pos: int) -> Tuple:
+        return RECORD.unpack_from(self._maps[seg], SEGMENT_HEADER_SIZE + pos * RECORD.size)
+
+    def _ts_at(self, seg: int, pos: int) -> Optional[float]:
+        for k in range(pos, self._counts[seg]):
+            row = self._row(seg, k)
+            if row[0] == KIND_TELEMETRY:
+                return row[4]
+        return None
+
+    def _last_ts(self) -> float:
+        for seg in range(len(self._maps) - 1, -1, -1):
+            for k in range(self._counts[seg] - 1, -1, -1):
+                row = self._row(seg, k)
+                if row[0] == KIND_TELEMETRY:
+                    return row[4]
+        return self.first_ts
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> Tuple:
+        while self._seg < len(self._maps):
+            if self._pos < self._counts[self._seg]:
+                row = self._row(self._seg, self._pos)
+                self._pos += 1
+                return row
+            self._seg += 1
+            self._pos = 0
+        raise StopIteration
+
+    def seek(self, ts: float) -> Optional[Tuple]:
+        """Position before the first sample at or after ``ts``.
+
+        Returns the config record in effect at that point (or None).
+        """
+        starts = [t if t is not None else float("inf") for t in self._first_ts]
+        seg = max(0, bisect.bisect_right(starts, ts) - 1)
+        lo, hi = 0, self._counts[seg]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._row(seg, mid)[4] < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        self._seg, self._pos = seg, lo
+        for k in range(min(lo, self._counts[seg]) - 1, -1, -1):
+            row = self._row(seg, k)
+            if row[0] == KIND_CONFIG:
+                return row
+        return None
+
+    def blocks(self, start: Optional[float] = None, end: Optional[float] = None, rows: int = 4096):
+        """Yield telemetry records in [start, end] as ``RECORD_DTYPE`` arrays.
+
+        Each chunk is copied out of the map ``rows`` records at a time, so
+        no view keeps a segment's pages pinned. Needs numpy.
+        """
+        if start is not None:
+            self.seek(start)
+        rows = max(1, int(rows))
+        while self._seg < len(self._maps):
+            seg = self._seg
+            if self._pos >= self._counts[seg]:
+                self._seg += 1
+                self._pos = 0
+                continue
+            n = min(rows, self._counts[seg] - self._pos)
+            offset = SEGMENT_HEADER_SIZE + self._pos * RECORD.size
+            records = np.frombuffer(self._maps[seg][offset : offset + n * RECORD.size], dtype=RECORD_DTYPE)
+            self._pos += n
+            keep = records["kind"] == KIND_TELEMETRY
+            if end is not None:
+                if records["ts"][keep].min(initial=end) > end:
+                    return
+                keep &= records["ts"] <= end
+            if start is not None:
+                keep &= records["ts"] >= start
+            if keep.any():
+                yield records[keep]
+
+    def close(self) -> None:
+        for m in self._maps:
+            m.close()
+        for f in self._files:
+            f.close()
+        self._maps = []
+        self._files = []
+
+
+class CsvSource:
+    """Line-by-line CSV reader with a sparse seek index."""
+
+    INDEX_EVERY = 1024
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._f = open(path, "rb")
+        header = self._f.readline().decode("utf-8").strip().split(",")
+        self._cols = {name.strip(): k for k, name in enumerate(header)}
+        if "ts" not in self._cols or "angle_deg" not in self._cols:
+            self._f.close()
+            raise ValueError("CSV needs at least ts and angle_deg columns")
+        self._data_start = self._f.tell()
+        self._line = 0
+        self._index: List[Tuple[float, int, int]] = []
+        row = self._read()
+        self.first_ts = row[4] if row else 0.0
+        self.last_ts = self._read_last_ts()
+        self._f.seek(self._data_start)
+        self._line = 0
+
+    def _parse(self, line: bytes) -> Optional[Tuple]:
+        parts = line.decode("utf-8").strip().split(",")
+        if len(parts) < len(self._cols):
+            return None
+        cols = self._cols
+        values = []
+        for name in CSV_FIELDS:
+            k = cols.get(name)
+            try:
+                values.append(float(parts[k]) if k is not None else 0.0)
+            except ValueError:
+                values.append(0.0)
+        try:
+            ts = float(parts[cols["ts"]])
+        except ValueError:
+            return None
+        angle, gyro, accel, pwm, enc_l, enc_r, setpoint = values
+        return (KIND_TELEMETRY, 0, int(pwm), self._line, ts, angle, gyro, accel, setpoint, int(enc_l), int(enc_r))
+
+    def _read(self) -> Optional[Tuple]:
+        while True:
+            offset = self._f.tell()
+            line = self._f.readline()
+            if not line:
+                return None
+            row = self._parse(line)
+            if row is None:
+                continue
+            if self._line % self.INDEX_EVERY == 0 and (not self._index or self._index[-1][1] < self._line):
+                self._index.append((row[4], self._line, offset))
+            self._line += 1
+            return row
+
+    def _read_last_ts(self) -> float:
+        self._f.seek(0, 2)
+        size = self._f.tell()
+        self._f.seek(max(self._data_start, size - 4096))
+        for line in reversed(self._f.read().splitlines()):
+            row = self._parse(line)
+            if row is not None:
+                return row[4]
+        return self.first_ts
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> Tuple:
+        row = self._read()
+        if row is None:
+            raise StopIteration
+        return row
+
+    def seek(self, ts: float) -> Optional[Tuple]:
+        k = bisect.bisect_left([entry[0] for entry in self._index], ts) - 1
+        if k >= 0:
+            _ts, self._line, offset = self._index[k]
+            self._f.seek(offset)
+        else:
+            self._f.seek(self._data_start)
+            self._line = 0
+        while True:
+            offset, line_no = self._f.tell(), self._line
+            row = self._read()
+            if row is None or row[4] >= ts:
+                self._f.seek(offset)
+                self._line = line_no
+                return None
+
+    def blocks(self, start: Optional[float] = None, end: Optional[float] = None, rows: int = 4096):
+        """Yield rows in [start, end] as ``RECORD_DTYPE`` arrays of up to ``rows``."""
+        if start is not None:
+            self.seek(start)
+        rows = max(1, int(rows))
+        chunk = []
+        for row in self:
+            if end is not None and row[4] > end:
+                break
+            chunk.append(row)
+            if len(chunk) >= rows:
+                yield np.array(chunk, dtype=RECORD_DTYPE)
+                chunk = []
+        if chunk:
+            yield np.array(chunk, dtype=RECORD_DTYPE)
+
+    def close(self) -> None:
+        self._f.close()
+
+
+def open_source(name, record_dir):
+    """Open a session name, or a CSV/segment file name, inside ``record_dir``.
+
+    Only bare names are accepted: anything that resolves outside
+    ``record_dir`` (absolute paths, ``..``, symlinks) raises ValueError.
+    """
+    record_dir = Path(record_dir).resolve()
+    name = str(name)
+    path = (record_dir / name).resolve()
+    if not name or Path(name).name != name or not path.is_relative_to(record_dir):
+        raise ValueError(f"cannot replay {name}: not a recording name")
+    if path.suffix.lower() == ".csv":
+        return CsvSource(path)
+    session = path.name.rsplit("-", 1)[0] if path.suffix == SEGMENT_SUFFIX else name
+    segments = [p for p in list_segments(record_dir) if p.name.rsplit("-", 1)[0] == session]
+    if not segments:
+        raise ValueError(f"cannot replay {name}")
+    return SegmentSource(segments)
+
+
+def list_sessions(record_dir) -> List[Dict[str, Any]]:
+    """Summarize the sessions available in ``record_dir``."""
+    sessions: Dict[str, Dict[str, Any]] = {}
+    for p in list_segments(record_dir):
+        name = p.name.rsplit("-", 1)[0]
+        entry = sessions.setdefault(name, {"session": name, "segments": 0, "bytes": 0})
+        entry["segments"] += 1
+        entry["bytes"] += p.stat().st_size
+    return list(sessions.values())
+
+
+class TelemetryReplayer:
+    """Feeds recorded rows to ``feed`` paced by their timestamps.
+
+    Rows due at the current (scaled) time are delivered together, so high
+    speeds do not turn into one sleep per sample. Config rows go to
+    ``on_config``. ``pause``, ``resume``, ``seek`` and ``set_speed`` are safe
+    to call from any thread.
+    """
+
+    def __init__(
+        self,
+        feed: Callable[[Tuple], None],
+        on_config: Optional[Callable[[Tuple], None]] = None,
+        on_state: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
+        self._feed = feed
+        self._on_config = on_config
+        self._on_state = on_state
+        self._source = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self.path = ""
+        self.state = "idle"
+        self.speed = 1.0
+        self.loop = False
+        self.samples = 0
+        self.error: Optional[str] = None
+        self._position_ts = 0.0
+        self._seek_to: Optional[float] = None
+        self._paused = False
+
+    @property
+    def active(self) -> bool:
+        return self.state in ("playing", "paused")
+
+    def start(self, source, path: str = "", speed: float = 1.0, start_s: float = 0.0, loop: bool = False) -> None:
+        self.stop()
+        self._source = source
+        self.path = path
+        self.speed = max(0.01, float(speed))
+        self.loop = bool(loop)
+        self.samples = 0
+        self.error = None
+        self._paused = False
+        self._position_ts = source.first_ts
+        self._seek_to = source.first_ts + max(0.0, float(start_s))
+        self._stop.clear()
+        self.state = "playing"
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._notify()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+        if self._source is not None:
+            self._source.close()
+            self._source = None
+        if self.state != "idle":
+            self.state = "idle"
+            self._notify()
+
+    def pause(self) -> None:
+        if self.state == "playing":
+            self._paused = True
+            self.state = "paused"
+            self._wake.set()
+            self._notify()
+
+    def resume(self) -> None:
+        if self.state == "paused":
+            self._paused = False
+            self.state = "playing"
+            self._wake.set()
+            self._notify()
+
+    def seek(self, offset_s: float) -> None:
+        """Jump to ``offset_s`` seconds from the start of the session."""
+        if self._source is None:
+            return
+        with self._lock:
+            self._seek_to = self._source.first_ts + max(0.0, float(offset_s))
+        self._wake.set()
+
+    def set_speed(self, speed: float) -> None:
+        with self._lock:
+            self.speed = max(0.01, float(speed))
+            # Re-anchor so the new speed applies from the current position.
+            self._seek_to = self._position_ts
+        self._wake.set()
+        self._notify()
+
+    def status(self) -> Dict[str, Any]:
+        source = self._source
+        first = source.first_ts if source else 0.0
+        last = source.last_ts if source else 0.0
+        return {
+            "state": self.state,
+            "path": self.path,
+            "speed": self.speed,
+            "loop": self.loop,
+            "position_s": round(max(0.0, self._position_ts - first), 3),
+            "duration_s": round(max(0.0, last - first), 3),
+            "samples": self.samples,
+            "error": self.error,
+        }
+
+    def _notify(self) -> None:
+        if self._on_state:
+            try:
+                self._on_state(self.status())
+            except Exception:
+                pass
+
+    def _run(self) -> None:
+        source = self._source
+        base_wall = base_ts = 0.0
+        pending = None
+        try:
+            while not self._stop.is_set():
+                with self._lock:
+                    seek_to, self._seek_to = self._seek_to, None
+                    speed = self.speed
+                if seek_to is not None:
+                    config = source.seek(seek_to)
+                    if config is not None and self._on_config:
+                        self._on_config(config)
+                    pending = None
+                    self._position_ts = seek_to
+                    base_wall, base_ts = time.monotonic(), seek_to
+                if self._paused:
+                    self._wake.wait(0.2)
+                    self._wake.clear()
+                    if not self._paused:
+                        with self._lock:
+                            if self._seek_to is None:
+                                self._seek_to = self._position_ts
+                    continue
+
+                if pending is None:
+                    pending = next(source, None)
+                    if pending is None:
+                        if self.loop:
+                            with self._lock:
+                                self._seek_to = source.first_ts
+                            continue
+                        break
+                row = pending
+                if row[0] == KIND_CONFIG:
+                    pending = None
+                    if self._on_config:
+                        self._on_config(row)
+                    continue
+                delay = (row[4] - base_ts) / speed - (time.monotonic() - base_wall)
+                if delay > 0.0:
+                    # Seek/pause/speed changes set _wake to interrupt the wait.
+                    if self._wake.wait(min(delay, 0.25)):
+                        self._wake.clear()
+                    continue
+                pending = None
+                self._position_ts = row[4]
+                self.samples += 1
+                self._feed(row)
+        except Exception as exc:
+            self.error = str(exc)
+        if not self._stop.is_set():
+            self.state = "finished" if self.error is None else "error"
+            self._notify()
@@ -0,0 +1,161 @@
+"""Fixed-rate deadline scheduler for the balancing loop."""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class DeadlineScheduler:
+    """Tick scheduler driven by absolute deadlines on the monotonic clock.
+
+    Deadlines advance by exactly one period per tick, so the time spent doing
+    work inside a tick does not accumulate as drift. When a tick finishes past
+    its deadline the ``policy`` decides what happens next:
+
+    - ``"skip"``: drop the missed ticks and realign to the next future deadline.
+    - ``"catch_up"``: run the missed ticks back-to-back until on schedule again
+      (bounded by ``max_catch_up`` periods, after which it realigns). Every
+      tick that consumes a deadline reports ``dt`` of exactly one period, so
+      the ticks run back-to-back still advance the simulation by the time
+      that was missed; stats keep the measured dt.
+
+    ``wait_event()`` is the event-driven variant: the tick starts as soon as
+    a producer sets the event, and the deadline only serves as a fallback.
+    """
+
+    POLICIES = ("skip", "catch_up")
+
+    def __init__(
+        self,
+        hz: float,
+        policy: str = "skip",
+        window: int = 512,
+        max_catch_up: int = 10,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if policy not in self.POLICIES:
+            raise ValueError(f"unknown schedule policy: {policy}")
+        self.policy = policy
+        self.max_catch_up = max(1, int(max_catch_up))
+        self._clock = clock
+        self.hz = 0.0
+        self.period = 0.0
+        self._next = 0.0
+        self._last = 0.0
+
+        self._window = max(8, int(window))
+        self._dts = [0.0] * self._window
+        self._jitter = [0.0] * self._window
+        self._idx = 0
+        self._filled = 0
+
+        self.ticks = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.wakes = 0
+        self.timeouts = 0
+        self.set_rate(hz)
+
+    def set_rate(self, hz: float) -> None:
+        self.hz = float(max(1e-3, hz))
+        self.period = 1.0 / self.hz
+        self._idx = 0
+        self._filled = 0
+        self.reset()
+
+    def reset(self) -> None:
+        now = self._clock()
+        self._last = now
+        self._next = now + self.period
+
+    def wait(self, stop: Optional[threading.Event] = None) -> float:
+        """Block until the next deadline and return the tick dt.
+
+        That is the measured dt, except under ``catch_up`` where a tick that
+        stays on (or catches up with) the deadline grid returns ``period``.
+        """
+        delay = self._next - self._clock()
+        if delay > 0:
+            if stop is not None:
+                stop.wait(delay)
+            else:
+                time.sleep(delay)
+        else:
+            self.overruns += 1
+
+        now = self._clock()
+        lateness = now - self._next
+        measured = now - self._last
+        dt = measured
+        catch_up = self.policy == "catch_up"
+        if lateness < self.period or (catch_up and lateness < self.max_catch_up * self.period):
+            self._next += self.period
+            if catch_up:
+                dt = self.period
+        else:
+            missed = int(lateness / self.period)
+            self.skipped += missed
+            self._next += (missed + 1) * self.period
+
+        self._last = now
+        self._record(measured, max(0.0, lateness))
+        return dt
+
+    def wait_event(self, event: threading.Event) -> Tuple[float, bool]:
+        """Block until ``event`` is set or one period has passed without it.
+
+        Returns ``(dt, woken)``. The event is cleared before returning, so
+        data published after that point wakes the next tick. The fallback
+        deadline restarts one period after every tick.
+        """
+        deadline = self._next
+        woken = event.is_set()
+        if not woken:
+            delay = deadline - self._clock()
+            woken = delay > 0 and event.wait(delay)
+        event.clear()
+
+        now = self._clock()
+        if woken:
+            self.wakes += 1
+        else:
+            self.timeouts += 1
+        self._next = now + self.period
+        dt = now - self._last
+        self._last = now
+        self._record(dt, 0.0 if woken else max(0.0, now - deadline))
+        return dt, woken
+
+    def _record(self, dt: float, jitter: float) -> None:
+        i = self._idx
+        self._dts[i] = dt
+        self._jitter[i] = jitter
+        self._idx = (i + 1) % self._window
+        if self._filled < self._window:
+            self._filled += 1
+        self.ticks += 1
+
+    def stats(self) -> Dict[str, Any]:
+        n = self._filled
+        dts = self._dts[:n]
+        jitter = sorted(self._jitter[:n])
+        total = sum(dts)
+        return {
+            "policy": self.policy,
+            "target_hz": round(self.hz, 3),
+            "achieved_hz": round(n / total, 3) if total > 0 else 0.0,
+            "jitter_p50_ms": round(_percentile(jitter, 0.50) * 1000.0, 3),
+            "jitter_p99_ms": round(_percentile(jitter, 0.99) * 1000.0, 3),
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+            "ticks": self.ticks,
+            "wakes": self.wakes,
+            "timeouts": self.timeouts,
+        }
+
+
+def _percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(q * (len(sorted_values) - 1) + 0.5))
+    return sorted_values[idx]
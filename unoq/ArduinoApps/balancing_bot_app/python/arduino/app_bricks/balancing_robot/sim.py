@@ -0,0 +1,190 @@
+"""Vectorized balancing-robot simulator for batch PID evaluation.
+
+``BatchSimulator`` steps K independent robots, each with its own PID gains,
+using the same per-tick dynamics as the ``simulated=True`` branch of
+``BalancingRobot._step`` (restoring term, damping, uniform noise, decaying
+kick wobble). It runs as fast as NumPy allows rather than in real time.
+
+The live simulator computes a PID output but never feeds it back into the
+plant. For gain evaluation the output has to matter, so the engine adds an
+actuator term ``control_gain * pid_out`` to the rate update. With
+``control_gain=0`` the plant matches the live simulator exactly.
+
+``live_step`` is the live simulator tick itself, shared by the scalar path
+(``BalancingRobot._step``) and the vectorized one (``RobotHost``).
+"""
+
+from typing import Any, Dict, Optional
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; the batch simulator needs it.
+    np = None
+
+PWM_LIMIT = 255.0
+# Simulated encoder counts per tick per unit of PWM.
+ENC_PER_PWM = 0.12
+
+
+def _clip(x, limit: float):
+    if np is not None and isinstance(x, np.ndarray):
+        return np.clip(x, -limit, limit)
+    return max(-limit, min(limit, x))
+
+
+def _trunc(x):
+    # Toward zero, like int().
+    if np is not None and isinstance(x, np.ndarray):
+        return x.astype(np.int64)
+    return int(x)
+
+
+def live_step(angle, rate, integral, last_error, kp, ki, kd, setpoint, noise, dt: float):
+    """One tick of the live simulator for floats (one robot) or arrays (K robots).
+
+    Restoring term, damping and ``noise`` move the plant; the PID output is
+    computed but, as on the dashboard, not fed back. The kick wobble is
+    stateful per robot and must already be added to ``rate``. Returns
+    ``(angle, rate, accel, integral, error, pid_out, enc_step)``.
+    """
+    rate = rate + (-0.25 * angle - 0.03 * rate + noise)
+    angle = angle + rate * dt
+    accel = _clip(angle / 10.0, 2.0)
+
+    error = setpoint - angle
+    integral = integral + error * dt
+    deriv = (error - last_error) / dt
+    pid_out = _clip(kp * error + ki * integral + kd * deriv, PWM_LIMIT)
+    return angle, rate, accel, integral, error, pid_out, _trunc(pid_out * ENC_PER_PWM)
+
+
+class BatchSimulator:
+    def __init__(
+        self,
+        p,
+        i,
+        d,
+        dt: float = 0.02,
+        setpoint: float = 0.0,
+        initial_angle: float = 12.0,
+        control_gain: float = 0.05,
+        noise: float = 0.5,
+        settle_band: float = 2.0,
+        seed: Optional[int] = None,
+    ):
+        if np is None:
+            raise RuntimeError("BatchSimulator requires numpy")
+        self.p = np.atleast_1d(np.asarray(p, dtype=np.float64))
+        self.k = self.p.shape[0]
+        self.i = np.broadcast_to(np.asarray(i, dtype=np.float64), (self.k,)).copy()
+        self.d = np.broadcast_to(np.asarray(d, dtype=np.float64), (self.k,)).copy()
+        self.dt = float(dt)
+        self.setpoint = float(setpoint)
+        self.control_gain = float(control_gain)
+        self.noise = float(noise)
+        self.settle_band = float(settle_band)
+        self.rng = np.random.default_rng(seed)
+
+        k = self.k
+        self.angle = np.full(k, float(initial_angle))
+        self.rate = np.zeros(k)
+        self.pid_out = np.zeros(k)
+        self._integral = np.zeros(k)
+        self._last_error = np.zeros(k)
+        self._kick_t = np.zeros(k)
+        self._kick_strength = np.zeros(k)
+        self._kick_sign = np.ones(k)
+
+        self.steps = 0
+        self._sum_sq = np.zeros(k)
+        self._saturated = np.zeros(k, dtype=np.int64)
+        self._last_outside = np.full(k, -1, dtype=np.int64)
+        self._overshoot = np.zeros(k)
+        self._fallen = np.zeros(k, dtype=bool)
+        offset = float(initial_angle) - self.setpoint
+        self._initial_sign = 1.0 if offset >= 0 else -1.0
+
+    def kick(self, angle: float = 30.0) -> None:
+        """Apply the dashboard kick impulse to every robot."""
+        strength = max(10.0, min(80.0, abs(angle)))
+        self._kick_sign[:] = 1.0 if angle >= 0 else -1.0
+        self._kick_strength = np.minimum(120.0, self._kick_strength + strength)
+        self._kick_t[:] = 0.0
+
+    def step(self) -> None:
+        dt = self.dt
+        rate = self.rate
+
+        active = self._kick_strength > 0.01
+        if active.any():
+            self._kick_t = np.where(active, self._kick_t + dt, self._kick_t)
+            decay = np.exp(-1.4 * self._kick_t)
+            wobble = self._kick_sign * self._kick_strength * decay * np.sin(self._kick_t * 6.0 + 0.7)
+            rate += np.where(active, wobble, 0.0)
+            self._kick_strength = np.where(active & (decay < 0.03), 0.0, self._kick_strength)
+
+        noise = self.rng.uniform(-self.noise, self.noise, self.k)
+        rate += -0.25 * self.angle - 0.03 * rate + noise + self.control_gain * self.pid_out
+        self.angle += rate * dt
+
+        error = self.setpoint - self.angle
+        self._integral += error * dt
+        deriv = (error - self._last_error) / dt
+        self._last_error = error
+        out = self.p * error + self.i * self._integral + self.d * deriv
+        np.clip(out, -PWM_LIMIT, PWM_LIMIT, out=self.pid_out)
+
+        # Running metrics, O(K) per step.
+        self._sum_sq += error * error
+        self._saturated += np.abs(self.pid_out) >= PWM_LIMIT
+        self._last_outside = np.where(np.abs(error) > self.settle_band, self.steps, self._last_outside)
+        np.maximum(self._overshoot, error * self._initial_sign, out=self._overshoot)
+        fell = np.abs(self.angle) > 90.0
+        if fell.any():
+            self._fallen |= fell
+            np.clip(self.angle, -90.0, 90.0, out=self.angle)
+            rate[fell] = 0.0
+        self.steps += 1
+
+    def run(self, duration_s: float, kick_at: Optional[float] = None, kick_angle: float = 30.0) -> Dict[str, Any]:
+        """Simulate ``duration_s`` seconds and return ``metrics()``."""
+        n = max(1, int(round(duration_s / self.dt)))
+        kick_step = int(round(kick_at / self.dt)) if kick_at is not None else -1
+        for s in range(n):
+            if s == kick_step:
+                self.kick(kick_angle)
+            self.step()
+        return self.metrics()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Per-robot metrics as arrays of length K.
+
+        - ``rms_error``: RMS of setpoint - angle in degrees
+        - ``overshoot``: largest excursion past the setpoint, opposite the
+          initial offset, in degrees
+        - ``settling_time``: time after which |error| stays inside
+          ``settle_band`` (equal to the run time if it never settles)
+        - ``saturation``: fraction of steps with the output at the PWM limit
+        - ``fallen``: the robot passed 90 degrees at some point
+        """
+        steps = max(1, self.steps)
+        settled = self._last_outside < self.steps - 1
+        return {
+            "rms_error": np.sqrt(self._sum_sq / steps),
+            "overshoot": self._overshoot.copy(),
+            "settling_time": np.where(settled, (self._last_outside + 1) * self.dt, steps * self.dt),
+            "settled": settled,
+            "saturation": self._saturated / steps,
+            "fallen": self._fallen.copy(),
+        }
+
+
+def evaluate_gains(gains, duration_s: float = 10.0, seed: Optional[int] = 0, **kwargs) -> Dict[str, Any]:
+    """Evaluate an array of (p, i, d) rows and return per-row metrics."""
+    if np is None:
+        raise RuntimeError("evaluate_gains requires numpy")
+    gains = np.asarray(gains, dtype=np.float64).reshape(-1, 3)
+    kick_at = kwargs.pop("kick_at", None)
+    kick_angle = kwargs.pop("kick_angle", 30.0)
+    sim = BatchSimulator(gains[:, 0], gains[:, 1], gains[:, 2], seed=seed, **kwargs)
+    return sim.run(duration_s, kick_at=kick_at, kick_angle=kick_angle)
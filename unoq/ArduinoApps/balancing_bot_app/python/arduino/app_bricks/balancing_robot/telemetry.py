@@ -0,0 +1,141 @@
+"""Preallocated telemetry frames shared between the loop and its readers."""
+
+from typing import Any, Dict
+
+
+class TelemetryFrame:
+    """One control-loop sample, stored in fixed slots instead of a dict."""
+
+    __slots__ = (
+        "gen",
+        "seq",
+        "ts",
+        "mono",
+        "sample_age_ms",
+        "angle_deg",
+        "gyro_dps",
+        "accel_g",
+        "pwm_left",
+        "pwm_right",
+        "enc_left",
+        "enc_right",
+        "p",
+        "i",
+        "d",
+        "setpoint",
+        "control_hz",
+        "mode",
+        "imu_model",
+    )
+
+    def __init__(self, mode: str = "sim", imu_model: str = "mpu6050"):
+        self.gen = 0
+        self.seq = 0
+        self.ts = 0.0
+        self.mono = 0.0
+        self.sample_age_ms = 0.0
+        self.angle_deg = 0.0
+        self.gyro_dps = 0.0
+        self.accel_g = 0.0
+        self.pwm_left = 0
+        self.pwm_right = 0
+        self.enc_left = 0
+        self.enc_right = 0
+        self.p = 0.0
+        self.i = 0.0
+        self.d = 0.0
+        self.setpoint = 0.0
+        self.control_hz = 0
+        self.mode = mode
+        self.imu_model = imu_model
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Build the JSON-ready telemetry dict (serialization boundary only)."""
+        return {
+            "seq": self.seq,
+            "ts": self.ts,
+            "sample_age_ms": self.sample_age_ms,
+            "angle_deg": self.angle_deg,
+            "gyro_dps": self.gyro_dps,
+            "accel_g": self.accel_g,
+            "pid": {"p": self.p, "i": self.i, "d": self.d},
+            "setpoint": self.setpoint,
+            "control_hz": self.control_hz,
+            "motor_pwm": {"left": self.pwm_left, "right": self.pwm_right},
+            "encoders": {"left": self.enc_left, "right": self.enc_right},
+            "mode": self.mode,
+            "imu_model": self.imu_model,
+        }
+
+
+class TelemetryBuffer:
+    """Double-buffered frames with a single writer and lock-free readers.
+
+    The writer fills ``begin()``'s frame and calls ``publish()``, which swaps
+    the front/back references (a single attribute store under the GIL).
+    Readers use ``snapshot()``, which retries if the frame it copied was
+    recycled by the writer mid-read (``gen`` acts as a seqlock).
+    """
+
+    def __init__(self, mode: str = "sim", imu_model: str = "mpu6050"):
+        self.front = TelemetryFrame(mode, imu_model)
+        self.back = TelemetryFrame(mode, imu_model)
+        self._gen = 1
+        self.front.gen = self._gen
+
+    def begin(self) -> TelemetryFrame:
+        back = self.back
+        back.gen = 0
+        return back
+
+    def publish(self) -> None:
+        back = self.back
+        self._gen += 1
+        back.gen = self._gen
+        self.back = self.front
+        self.front = back
+
+    def latest(self) -> TelemetryFrame:
+        """Return the current front frame (valid until the next two publishes)."""
+        return self.front
+
+    def snapshot(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {}
+        for _ in range(8):
+            frame = self.front
+            gen = frame.gen
+            data = frame.to_dict()
+            if gen and frame.gen == gen:
+                break
+        return data
+
+
+class HardwareSample:
+    """Latest sample received from the MCU, overwritten in place."""
+
+    __slots__ = (
+        "valid",
+        "seq",
+        "received",
+        "angle_deg",
+        "gyro_dps",
+        "accel_g",
+        "pwm",
+        "enc_left",
+        "enc_right",
+        "mode",
+        "imu_model",
+    )
+
+    def __init__(self):
+        self.valid = False
+        self.seq = 0
+        self.received = 0.0
+        self.angle_deg = 0.0
+        self.gyro_dps = 0.0
+        self.accel_g = 0.0
+        self.pwm = 0
+        self.enc_left = 0
+        self.enc_right = 0
+        self.mode = ""
+        self.imu_model = ""
@@ -0,0 +1,157 @@
+"""Compact binary telemetry wire format.
+
+Packet layout (little-endian)::
+
+    header   <2sBBH   magic b"BT", version, flags, frame count
+    static   <H + N   only if FLAG_STATIC: byte length + UTF-8 JSON of
+                      pid/setpoint/mode/imu_model
+    frames   count x <Idfffhhii
+             seq, ts, angle_deg, gyro_dps, accel_g,
+             pwm_left, pwm_right, enc_left, enc_right
+
+Static fields are only included when they change (or on request), so the
+per-sample cost is a fixed 36 bytes. ``assets/app.js`` holds the matching
+decoder.
+"""
+
+import json
+import struct
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Sequence
+
+MAGIC = b"BT"
+VERSION = 1
+FLAG_STATIC = 0x01
+
+HEADER = struct.Struct("<2sBBH")
+STATIC_LEN = struct.Struct("<H")
+FRAME = struct.Struct("<Idfffhhii")
+
+MAX_FRAMES = 0xFFFF
+
+
+def static_fields(frame: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "pid": frame.get("pid"),
+        "setpoint": frame.get("setpoint"),
+        "mode": frame.get("mode"),
+        "imu_model": frame.get("imu_model"),
+    }
+
+
+def rows_from_history(rows: Dict[str, List[Any]]) -> List[Sequence[Any]]:
+    """Convert ``TelemetryHistory.since()`` columns into frame tuples."""
+    pwm = rows.get("pwm", [])
+    return list(
+        zip(
+            rows.get("seq", []),
+            rows.get("ts", []),
+            rows.get("angle_deg", []),
+            rows.get("gyro_dps", []),
+            rows.get("accel_g", []),
+            pwm,
+            pwm,
+            rows.get("enc_left", []),
+            rows.get("enc_right", []),
+        )
+    )
+
+
+def row_from_frame(frame: Dict[str, Any]) -> Sequence[Any]:
+    pwm = frame.get("motor_pwm", {})
+    enc = frame.get("encoders", {})
+    return (
+        frame.get("seq", 0),
+        frame.get("ts", 0.0),
+        frame.get("angle_deg", 0.0),
+        frame.get("gyro_dps", 0.0),
+        frame.get("accel_g", 0.0),
+        pwm.get("left", 0),
+        pwm.get("right", 0),
+        enc.get("left", 0),
+        enc.get("right", 0),
+    )
+
+
+def encode(rows: Sequence[Sequence[Any]], static: Optional[Dict[str, Any]] = None) -> bytes:
+    rows = rows[-MAX_FRAMES:]
+    flags = FLAG_STATIC if static is not None else 0
+    parts = [HEADER.pack(MAGIC, VERSION, flags, len(rows))]
+    if static is not None:
+        blob = json.dumps(static, separators=(",", ":")).encode("utf-8")
+        parts.append(STATIC_LEN.pack(len(blob)))
+        parts.append(blob)
+    pack = FRAME.pack
+    for seq, ts, angle, gyro, accel, pwm_l, pwm_r, enc_l, enc_r in rows:
+        parts.append(
+            pack(
+                int(seq) & 0xFFFFFFFF,
+                float(ts),
+                float(angle),
+                float(gyro),
+                float(accel),
+                _clamp16(pwm_l),
+                _clamp16(pwm_r),
+                _clamp32(enc_l),
+                _clamp32(enc_r),
+            )
+        )
+    return b"".join(parts)
+
+
+def decode(packet: bytes) -> Dict[str, Any]:
+    magic, version, flags, count = HEADER.unpack_from(packet, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a telemetry packet")
+    offset = HEADER.size
+    static = None
+    if flags & FLAG_STATIC:
+        (length,) = STATIC_LEN.unpack_from(packet, offset)
+        offset += STATIC_LEN.size
+        static = json.loads(packet[offset:offset + length].decode("utf-8"))
+        offset += length
+    frames = [FRAME.unpack_from(packet, offset + i * FRAME.size) for i in range(count)]
+    return {"static": static, "frames": frames}
+
+
+def static_crc(static: Dict[str, Any]) -> int:
+    return zlib.crc32(json.dumps(static, sort_keys=True).encode("utf-8"))
+
+
+class WireEncoder:
+    """Stateful encoder that only resends static fields when they change.
+
+    Static fields are also repeated every ``static_every_s`` seconds so that
+    clients joining mid-stream pick them up.
+    """
+
+    def __init__(self, static_every_s: float = 2.0):
+        self.static_every_s = static_every_s
+        self._last_static: Optional[Dict[str, Any]] = None
+        self._last_static_at = 0.0
+        self.bytes_sent = 0
+
+    def force_static(self) -> None:
+        self._last_static = None
+
+    def encode(self, rows: Sequence[Sequence[Any]], static: Dict[str, Any]) -> bytes:
+        now = time.monotonic()
+        include = (
+            static != self._last_static
+            or now - self._last_static_at >= self.static_every_s
+        )
+        if include:
+            self._last_static = static
+            self._last_static_at = now
+        packet = encode(rows, static if include else None)
+        self.bytes_sent += len(packet)
+        return packet
+
+
+def _clamp16(value) -> int:
+    return max(-32768, min(32767, int(value)))
+
+
+def _clamp32(value) -> int:
+    return max(-2147483648, min(2147483647, int(value)))
@@ -11,26 +11,46 @@ app_bricks.__path__.append(str(LOCAL_BRICKS))
 
 from arduino.app_bricks.balancing_robot import BalancingRobot  # noqa: E402
 
-ui = WebUI()
+# Autotune workers (forkserver/spawn) re-import this module: only the path
+# setup above may run there, the app itself starts under __main__.
+if __name__ == "__main__":
+    ui = WebUI()
 
-bot = BalancingRobot(imu_model="mpu6050", simulated=True, update_hz=50)
-bot.attach_webui(ui)
-bot.attach_bridge(Bridge)
-bot.start()
+    # publish_batch sends the samples between pushes so the chart gets every one.
+    bot = BalancingRobot(imu_model="mpu6050", simulated=True, update_hz=50, publish_batch=True)
+    bot.attach_webui(ui)
+    bot.attach_bridge(Bridge)
+    bot.start()
 
-# HTTP endpoints for polling mode (no socket.io)
-ui.expose_api("GET", "/status", lambda: bot.get_state())
-ui.expose_api("GET", "/set_pid", lambda p=None, i=None, d=None: bot.http_set_pid(p, i, d))
-ui.expose_api("GET", "/set_pid_hz", lambda pid_hz=None: bot.http_set_pid_hz(pid_hz))
-ui.expose_api("GET", "/set_setpoint", lambda setpoint=None: bot.http_set_setpoint(setpoint))
-ui.expose_api("GET", "/set_imu_model", lambda imu_model=None: bot.http_set_imu_model(imu_model))
-ui.expose_api("GET", "/set_axis_mode", lambda axis_mode=None: bot.http_set_axis_mode(axis_mode))
-ui.expose_api("GET", "/set_axis_sign", lambda axis_sign=None: bot.http_set_axis_sign(axis_sign))
-ui.expose_api("GET", "/set_motor_invert", lambda left=None, right=None: bot.http_set_motor_invert(left, right))
-ui.expose_api("GET", "/set_encoder_invert", lambda left=None, right=None: bot.http_set_encoder_invert(left, right))
-ui.expose_api("GET", "/motor_test", lambda left=None, right=None, duration_ms=None: bot.http_motor_test(left, right, duration_ms))
-ui.expose_api("GET", "/stop_motor_test", lambda: bot.http_stop_motor_test())
-ui.expose_api("GET", "/set_mode", lambda mode=None: bot.http_set_mode(mode))
-ui.expose_api("GET", "/kick", lambda angle=None: bot.http_kick(angle))
+    # HTTP endpoints for polling mode (no socket.io)
+    ui.expose_api("GET", "/status", lambda since=None, timeout=None, crc=None: bot.http_status(since, timeout, crc))
+    ui.expose_api("GET", "/config", lambda: bot.http_config())
+    ui.expose_api("GET", "/status_bin", lambda since=None, crc=None: bot.http_status_bin(since, crc))
+    ui.expose_api("GET", "/metrics", lambda: bot.http_metrics())
+    ui.expose_api("GET", "/latency", lambda reset=None: bot.http_latency(reset))
+    ui.expose_api("GET", "/quality", lambda reset=None: bot.http_quality(reset))
+    ui.expose_api("GET", "/history", lambda seconds=None, start=None, end=None, points=None, fields=None: bot.http_history(seconds, start, end, points, fields))
+    ui.expose_api("GET", "/export", lambda source=None, format=None, seconds=None, start=None, end=None, fields=None: bot.http_export(source, format, seconds, start, end, fields))
+    ui.expose_api("GET", "/set_pid", lambda p=None, i=None, d=None: bot.http_set_pid(p, i, d))
+    ui.expose_api("GET", "/set_pid_hz", lambda pid_hz=None: bot.http_set_pid_hz(pid_hz))
+    ui.expose_api("GET", "/set_telemetry_hz", lambda telemetry_hz=None: bot.http_set_telemetry_hz(telemetry_hz))
+    ui.expose_api("GET", "/set_setpoint", lambda setpoint=None: bot.http_set_setpoint(setpoint))
+    ui.expose_api("GET", "/set_imu_model", lambda imu_model=None: bot.http_set_imu_model(imu_model))
+    ui.expose_api("GET", "/set_axis_mode", lambda axis_mode=None: bot.http_set_axis_mode(axis_mode))
+    ui.expose_api("GET", "/set_axis_sign", lambda axis_sign=None: bot.http_set_axis_sign(axis_sign))
+    ui.expose_api("GET", "/set_motor_invert", lambda left=None, right=None: bot.http_set_motor_invert(left, right))
+    ui.expose_api("GET", "/set_encoder_invert", lambda left=None, right=None: bot.http_set_encoder_invert(left, right))
+    ui.expose_api("GET", "/set_raw_imu", lambda enabled=None: bot.http_set_raw_imu(enabled))
+    ui.expose_api("GET", "/set_fusion", lambda filter=None, alpha=None, q_angle=None, q_bias=None, r_measure=None: bot.http_set_fusion(filter, alpha, q_angle, q_bias, r_measure))
+    ui.expose_api("GET", "/imu_raw", lambda points=None, fields=None, filter=None, alpha=None, q_angle=None, q_bias=None, r_measure=None: bot.http_imu_raw(points, fields, filter, alpha, q_angle, q_bias, r_measure))
+    ui.expose_api("GET", "/motor_test", lambda left=None, right=None, duration_ms=None: bot.http_motor_test(left, right, duration_ms))
+    ui.expose_api("GET", "/stop_motor_test", lambda: bot.http_stop_motor_test())
+    ui.expose_api("GET", "/set_mode", lambda mode=None: bot.http_set_mode(mode))
+    ui.expose_api("GET", "/kick", lambda angle=None: bot.http_kick(angle))
+    ui.expose_api("GET", "/autotune", lambda action=None, samples=None, rounds=None, duration=None: bot.http_autotune(action, samples, rounds, duration))
+    ui.expose_api("GET", "/record_start", lambda session=None: bot.http_record_start(session))
+    ui.expose_api("GET", "/record_stop", lambda: bot.http_record_stop())
+    ui.expose_api("GET", "/record_status", lambda: bot.http_record_status())
+    ui.expose_api("GET", "/replay", lambda action=None, path=None, speed=None, position=None, loop=None: bot.http_replay(action, path, speed, position, loop))
 
-App.run(user_loop=lambda: time.sleep(1))
+    App.run(user_loop=lambda: time.sleep(1))
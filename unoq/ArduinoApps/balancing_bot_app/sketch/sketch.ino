@@ -60,11 +60,77 @@ static bool simulatedImu = true;
 static bool imuReady = false;
 static char imuModel[8] = "mpu6050";
 
-static unsigned long lastTelemetryMs = 0;
-static const unsigned long telemetryIntervalMs = 66; // ~15 Hz
+// --- Control and telemetry scheduling (micros) ---
+// The PID runs at controlPeriodUs; telemetry samples are taken at their own
+// telemetryPeriodUs. Both are set with set_control_rate / set_telemetry_rate
+// or the "hz" / "th" apply_config keys.
+static const unsigned long CONTROL_HZ_MIN = 50;
+// PID_v1 gates Compute() on millis(), so steps must stay at least 1 ms apart:
+// 500 Hz plus the half-period resync in loop() guarantees that.
+static const unsigned long CONTROL_HZ_MAX = 500;
+static const unsigned long TELEMETRY_HZ_MIN = 10;
+static const unsigned long TELEMETRY_HZ_MAX = 500;
+static unsigned long controlPeriodUs = 5000;    // 200 Hz
+static unsigned long telemetryPeriodUs = 5000;  // 200 Hz samples
+static unsigned long lastControlUs = 0;
+static unsigned long lastTelemetryUs = 0;
+
+// Achieved control rate over the last second, reported in the batch header.
+static unsigned long controlTicks = 0;
+static unsigned long controlWindowUs = 0;
+static uint16_t controlHz = 0;
+static uint16_t controlMaxUs = 0;
+static uint16_t controlWindowMaxUs = 0;
+
+static float lastGyroDps = 0.0f;
+static float lastAccelG = 0.0f;
+
+// --- Batched telemetry (record_telemetry_batch) ---
+// Samples are taken every telemetrySampleMs and sent in one bridge message
+// once telemetryBatchSize samples are queued (or telemetryFlushMs passes).
+// Layout must match python/.../balancing_robot/protocol.py.
+struct __attribute__((packed)) TelemetrySample {
+  uint32_t mcuMs;
+  float angleDeg;
+  float gyroDps;
+  float accelG;
+  int16_t pwm;
+  int32_t encLeft;
+  int32_t encRight;
+};
+static const uint8_t TELEMETRY_BATCH_VERSION = 3;
+// version, flags, count(u16), config version(u32), control Hz(u16), control max us(u16)
+static const uint8_t TELEMETRY_BATCH_HEADER = 12;
+static const uint8_t TELEMETRY_BATCH_MAX = 16;
+static const unsigned long telemetryFlushMs = 50;   // at most 50 ms of latency
+static const uint8_t telemetryBatchSize = 8;        // ~25 bridge messages/s
+static uint8_t telemetryBatch[TELEMETRY_BATCH_HEADER + TELEMETRY_BATCH_MAX * sizeof(TelemetrySample)];
+static uint8_t telemetryBatchCount = 0;
+static unsigned long lastFlushMs = 0;
+
+// --- Raw IMU mode (record_imu_raw_batch) ---
+// When enabled (set_raw_imu or the "raw" apply_config key) every IMU read in
+// the control step is also queued with its micros() timestamp, the 14
+// register bytes as read and the fused angle, so the brick can run its own
+// fusion. Layout must match protocol.py.
+struct __attribute__((packed)) ImuRawSample {
+  uint32_t mcuUs;
+  uint8_t regs[14];
+  float angleDeg;
+};
+static const uint8_t IMU_RAW_BATCH_VERSION = 1;
+static const uint8_t IMU_RAW_BATCH_HEADER = 4;  // version, flags, count(u16)
+static const uint8_t IMU_RAW_BATCH_MAX = 16;
+static uint8_t imuRawBatch[IMU_RAW_BATCH_HEADER + IMU_RAW_BATCH_MAX * sizeof(ImuRawSample)];
+static uint8_t imuRawBatchCount = 0;
+static unsigned long imuRawFlushMs = 0;
+static bool rawImuEnabled = false;
+
+// Last apply_config version applied (0 after reset), echoed back to the brick.
+static uint32_t configVersion = 0;
 
 static float angleEstimate = 0.0f;
-static unsigned long lastImuMs = 0;
+static unsigned long lastImuUs = 0;
 
 void onEncLeft() {
   int b = digitalRead(PIN_ENC_L_B);
@@ -148,6 +214,37 @@ double readImuAngleSim() {
   return 10.0 * sin(phase);
 }
 
+void flushImuRawBatch() {
+  if (imuRawBatchCount == 0) {
+    return;
+  }
+  imuRawBatch[0] = IMU_RAW_BATCH_VERSION;
+  imuRawBatch[1] = 0; // flags
+  imuRawBatch[2] = imuRawBatchCount & 0xFF;
+  imuRawBatch[3] = 0;
+  size_t len = IMU_RAW_BATCH_HEADER + imuRawBatchCount * sizeof(ImuRawSample);
+  MsgPack::bin_t<uint8_t> payload;
+  payload.reserve(len);
+  for (size_t i = 0; i < len; i++) {
+    payload.push_back(imuRawBatch[i]);
+  }
+  Bridge.notify("record_imu_raw_batch", payload);
+  imuRawBatchCount = 0;
+  imuRawFlushMs = millis();
+}
+
+void queueImuRaw(unsigned long nowUs, const uint8_t *regs, float angleDeg) {
+  ImuRawSample sample;
+  sample.mcuUs = nowUs;
+  memcpy(sample.regs, regs, sizeof(sample.regs));
+  sample.angleDeg = angleDeg;
+  memcpy(&imuRawBatch[IMU_RAW_BATCH_HEADER + imuRawBatchCount * sizeof(ImuRawSample)], &sample, sizeof(sample));
+  imuRawBatchCount++;
+  if (imuRawBatchCount >= IMU_RAW_BATCH_MAX) {
+    flushImuRawBatch();
+  }
+}
+
 bool readImuFiltered(float &angleDeg, float &gyroDps, float &accelG) {
   uint8_t raw[14];
   if (!imuReadBytes(REG_ACCEL_XOUT_H, raw, sizeof(raw))) {
@@ -179,12 +276,12 @@ bool readImuFiltered(float &angleDeg, float &gyroDps, float &accelG) {
     gyroRate = gy_dps;
   }
 
-  unsigned long now = millis();
-  float dt = (now - lastImuMs) / 1000.0f;
-  if (lastImuMs == 0) {
+  unsigned long now = micros();
+  float dt = (now - lastImuUs) / 1000000.0f;
+  if (lastImuUs == 0) {
     dt = 0.0f;
   }
-  lastImuMs = now;
+  lastImuUs = now;
 
   angleEstimate = 0.98f * (angleEstimate + gyroRate * dt) + 0.02f * accelAngle;
 
@@ -192,14 +289,50 @@ bool readImuFiltered(float &angleDeg, float &gyroDps, float &accelG) {
   gyroDps = gyroRate * axisSign;
   accelG = sqrtf(ax_g * ax_g + ay_g * ay_g + az_g * az_g);
   (void)gz_dps;
+  if (rawImuEnabled) {
+    queueImuRaw(now, raw, angleDeg);
+  }
   return true;
 }
 
+// PID_v1 scales Ki/Kd by its millisecond SampleTime and gates Compute() on
+// millis(). The control step is paced by micros() instead, so SampleTime
+// stays at 1 ms (Compute() never skips a step) and the real period is
+// folded into the gains here.
+void applyTunings() {
+  double periodMs = controlPeriodUs / 1000.0;
+  pid.SetTunings(Kp, Ki * periodMs, Kd / periodMs);
+}
+
+unsigned long periodForHz(long hz, unsigned long minHz, unsigned long maxHz) {
+  unsigned long clamped = hz < static_cast<long>(minHz) ? minHz : static_cast<unsigned long>(hz);
+  if (clamped > maxHz) {
+    clamped = maxHz;
+  }
+  return 1000000UL / clamped;
+}
+
 void set_pid(double p, double i, double d) {
   Kp = p;
   Ki = i;
   Kd = d;
-  pid.SetTunings(Kp, Ki, Kd);
+  applyTunings();
+}
+
+void set_control_rate(int hz) {
+  controlPeriodUs = periodForHz(hz, CONTROL_HZ_MIN, CONTROL_HZ_MAX);
+  applyTunings();
+}
+
+void set_telemetry_rate(int hz) {
+  telemetryPeriodUs = periodForHz(hz, TELEMETRY_HZ_MIN, TELEMETRY_HZ_MAX);
+}
+
+void set_raw_imu(int enabled) {
+  rawImuEnabled = enabled != 0;
+  if (!rawImuEnabled) {
+    imuRawBatchCount = 0;
+  }
 }
 
 void set_setpoint(double sp) {
@@ -268,6 +401,66 @@ void kick(double angle) {
   }
 }
 
+// apply_config(version, "p=12.0;i=0.0;hz=200;th=100;sp=0.0;mi=1,-1;raw=1;mode=real")
+// Applies only the fields present, in order, then records the version.
+void apply_config(long version, String fields) {
+  bool tuningsChanged = false;
+  int start = 0;
+  int len = fields.length();
+  while (start < len) {
+    int end = fields.indexOf(';', start);
+    if (end < 0) {
+      end = len;
+    }
+    int eq = fields.indexOf('=', start);
+    if (eq > start && eq < end) {
+      String key = fields.substring(start, eq);
+      String value = fields.substring(eq + 1, end);
+      if (key == "p") {
+        Kp = value.toDouble();
+        tuningsChanged = true;
+      } else if (key == "i") {
+        Ki = value.toDouble();
+        tuningsChanged = true;
+      } else if (key == "d") {
+        Kd = value.toDouble();
+        tuningsChanged = true;
+      } else if (key == "hz") {
+        controlPeriodUs = periodForHz(value.toInt(), CONTROL_HZ_MIN, CONTROL_HZ_MAX);
+        tuningsChanged = true;
+      } else if (key == "th") {
+        set_telemetry_rate(value.toInt());
+      } else if (key == "sp") {
+        set_setpoint(value.toDouble());
+      } else if (key == "imu") {
+        set_imu_model(value);
+      } else if (key == "axis") {
+        set_axis_mode(value);
+      } else if (key == "sign") {
+        set_axis_sign(value.toInt());
+      } else if (key == "mi" || key == "ei") {
+        int comma = value.indexOf(',');
+        int left = value.toInt();
+        int right = (comma >= 0) ? value.substring(comma + 1).toInt() : left;
+        if (key == "mi") {
+          set_motor_invert(left, right);
+        } else {
+          set_encoder_invert(left, right);
+        }
+      } else if (key == "raw") {
+        set_raw_imu(value.toInt());
+      } else if (key == "mode") {
+        set_mode(value);
+      }
+    }
+    start = end + 1;
+  }
+  if (tuningsChanged) {
+    applyTunings();
+  }
+  configVersion = static_cast<uint32_t>(version);
+}
+
 String axisName() {
   return axisMode == AXIS_ROLL ? String("roll") : String("pitch");
 }
@@ -275,26 +468,62 @@ String axisName() {
 String get_status() {
   String mode = simulatedImu ? "sim" : "real";
   String ready = imuReady ? "ready" : "noimu";
-  return String("ok:") + mode + ":" + ready + ":" + String(imuModel) + ":" + axisName() + ":" + String(axisSign);
+  return String("ok:") + mode + ":" + ready + ":" + String(imuModel) + ":" + axisName() + ":" + String(axisSign) + ":v" + String(configVersion);
 }
 
-void emitTelemetry(double angle, double gyro, double accel) {
-  Bridge.notify("record_telemetry",
-                angle,
-                gyro,
-                accel,
-                static_cast<int>(outputPwm),
-                static_cast<long>(encLeft) * encoderInvertL,
-                static_cast<long>(encRight) * encoderInvertR,
-                simulatedImu ? "sim" : "real",
-                String(imuModel));
+void flushTelemetryBatch() {
+  if (telemetryBatchCount == 0) {
+    return;
+  }
+  telemetryBatch[0] = TELEMETRY_BATCH_VERSION;
+  telemetryBatch[1] = 0; // flags
+  telemetryBatch[2] = telemetryBatchCount & 0xFF;
+  telemetryBatch[3] = 0;
+  telemetryBatch[4] = configVersion & 0xFF;
+  telemetryBatch[5] = (configVersion >> 8) & 0xFF;
+  telemetryBatch[6] = (configVersion >> 16) & 0xFF;
+  telemetryBatch[7] = (configVersion >> 24) & 0xFF;
+  telemetryBatch[8] = controlHz & 0xFF;
+  telemetryBatch[9] = (controlHz >> 8) & 0xFF;
+  telemetryBatch[10] = controlMaxUs & 0xFF;
+  telemetryBatch[11] = (controlMaxUs >> 8) & 0xFF;
+  size_t len = TELEMETRY_BATCH_HEADER + telemetryBatchCount * sizeof(TelemetrySample);
+  MsgPack::bin_t<uint8_t> payload;
+  payload.reserve(len);
+  for (size_t i = 0; i < len; i++) {
+    payload.push_back(telemetryBatch[i]);
+  }
+  Bridge.notify("record_telemetry_batch", payload);
+  telemetryBatchCount = 0;
+  lastFlushMs = millis();
+}
+
+void queueTelemetry(double angle, double gyro, double accel) {
+  TelemetrySample sample;
+  sample.mcuMs = millis();
+  sample.angleDeg = static_cast<float>(angle);
+  sample.gyroDps = static_cast<float>(gyro);
+  sample.accelG = static_cast<float>(accel);
+  sample.pwm = static_cast<int16_t>(outputPwm);
+  sample.encLeft = static_cast<int32_t>(encLeft) * encoderInvertL;
+  sample.encRight = static_cast<int32_t>(encRight) * encoderInvertR;
+  memcpy(&telemetryBatch[TELEMETRY_BATCH_HEADER + telemetryBatchCount * sizeof(TelemetrySample)],
+         &sample, sizeof(sample));
+  telemetryBatchCount++;
+  if (telemetryBatchCount >= telemetryBatchSize || telemetryBatchCount >= TELEMETRY_BATCH_MAX) {
+    flushTelemetryBatch();
+  }
 }
 
 void setup() {
   Wire.begin();
   Bridge.begin();
 
+  Bridge.provide("apply_config", apply_config);
   Bridge.provide("set_pid", set_pid);
+  Bridge.provide("set_control_rate", set_control_rate);
+  Bridge.provide("set_telemetry_rate", set_telemetry_rate);
+  Bridge.provide("set_raw_imu", set_raw_imu);
   Bridge.provide("set_setpoint", set_setpoint);
   Bridge.provide("set_mode", set_mode);
   Bridge.provide("set_imu_model", set_imu_model);
@@ -323,18 +552,21 @@ void setup() {
 
   pid.SetMode(AUTOMATIC);
   pid.SetOutputLimits(-255, 255);
-  pid.SetSampleTime(telemetryIntervalMs);
+  pid.SetSampleTime(1);
+  applyTunings();
+  lastControlUs = micros();
+  lastTelemetryUs = lastControlUs;
+  controlWindowUs = lastControlUs;
 }
 
-void loop() {
-  float gyro = 0.0f;
-  float accel = 0.0f;
-
+void controlStep(unsigned long startUs) {
   if (simulatedImu) {
     inputAngle = readImuAngleSim();
+    lastGyroDps = 0.0f;
+    lastAccelG = 0.0f;
   } else if (imuReady) {
     float angleDeg = 0.0f;
-    if (readImuFiltered(angleDeg, gyro, accel)) {
+    if (readImuFiltered(angleDeg, lastGyroDps, lastAccelG)) {
       inputAngle = angleDeg;
     } else {
       simulatedImu = true;
@@ -352,8 +584,42 @@ void loop() {
     applyMotors(static_cast<int>(outputPwm), static_cast<int>(outputPwm));
   }
 
-  if (millis() - lastTelemetryMs >= telemetryIntervalMs) {
-    lastTelemetryMs = millis();
-    emitTelemetry(inputAngle, gyro, accel);
+  unsigned long took = micros() - startUs;
+  if (took > controlWindowMaxUs) {
+    controlWindowMaxUs = took > 0xFFFF ? 0xFFFF : static_cast<uint16_t>(took);
+  }
+  controlTicks++;
+  unsigned long window = startUs - controlWindowUs;
+  if (window >= 1000000UL) {
+    controlHz = static_cast<uint16_t>((controlTicks * 1000000ULL + window / 2) / window);
+    controlMaxUs = controlWindowMaxUs;
+    controlTicks = 0;
+    controlWindowMaxUs = 0;
+    controlWindowUs = startUs;
+  }
+}
+
+void loop() {
+  unsigned long nowUs = micros();
+  if (nowUs - lastControlUs >= controlPeriodUs) {
+    // Advance by whole periods so the rate does not drift. Resync once half a
+    // period late: catching up faster would put two steps in one millis()
+    // tick and PID_v1 would skip the second Compute().
+    lastControlUs += controlPeriodUs;
+    if (nowUs - lastControlUs >= controlPeriodUs / 2) {
+      lastControlUs = nowUs;
+    }
+    controlStep(nowUs);
+  }
+
+  if (nowUs - lastTelemetryUs >= telemetryPeriodUs) {
+    lastTelemetryUs = nowUs;
+    queueTelemetry(inputAngle, lastGyroDps, lastAccelG);
+  }
+  if (telemetryBatchCount > 0 && millis() - lastFlushMs >= telemetryFlushMs) {
+    flushTelemetryBatch();
+  }
+  if (imuRawBatchCount > 0 && millis() - imuRawFlushMs >= telemetryFlushMs) {
+    flushImuRawBatch();
   }
 }